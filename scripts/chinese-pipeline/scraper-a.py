@@ -100,52 +100,75 @@ def scrape_page_content(url):
     return "\n\n".join(text_parts)
 
 
-def discover_chapter_links(index_url, title_zh):
-    """
-    Discover chapter/volume links from the index page.
-    Returns list of (title_text, full_url) tuples in page order.
-    """
+# Link exclusions are plain ASCII that MediaWiki never percent-encodes, so they
+# can be tested on the raw href before paying for urllib.parse.unquote.
+EXCLUDED_LINK_RE = re.compile("|".join(re.escape(x) for x in (
+    "action=edit", "Talk:", "wikipedia.org", "commons.wikimedia", "wikidata.org",
+    "Special:", "redlink=1",
+)))
+NAV_LINK_TEXTS = frozenset(("编辑", "版本信息", "百科", "图册分类", "数据项"))
+LINK_INDEX_FILE = "_link-index.json"
+
+# Chapter URL -> file it was saved to, shared by every slug in this run so a
+# sub-page linked from several index pages is only fetched once.
+scraped_pages = {}
+
+
+def load_link_index(slug):
+    """Return the persisted {index_url, etag, last_modified, links} for slug."""
+    path = RAW_DIR / slug / LINK_INDEX_FILE
+    if not path.exists():
+        return None
     try:
-        response = session.get(index_url, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-    except Exception as e:
-        log.error(f"Failed to fetch index page {index_url}: {e}")
-        return []
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
 
-    soup = BeautifulSoup(response.content, "html.parser")
+
+def save_link_index(slug, index_url, response, links):
+    out_dir = RAW_DIR / slug
+    out_dir.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "index_url": index_url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "links": [list(link) for link in links],
+    }
+    tmp = out_dir / (LINK_INDEX_FILE + ".tmp")
+    tmp.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(out_dir / LINK_INDEX_FILE)
+
+
+def extract_chapter_links(html, title_zh):
+    """Pull (title_text, full_url) chapter links out of an index page, in page order."""
+    soup = BeautifulSoup(html, "html.parser")
     content_div = soup.find("div", id="mw-content-text")
     if not content_div:
         return []
 
-    all_links = content_div.find_all("a")
+    index_path = f"/wiki/{title_zh}"
+    subpage_prefix = index_path + "/"
     results = []
     seen_urls = set()
 
-    for a in all_links:
-        href = a.get("href", "")
-        text = a.get_text(strip=True)
-        if not href or not text:
-            continue
-
-        decoded = urllib.parse.unquote(href)
-
+    for a in content_div.find_all("a", href=True):
+        href = a["href"]
         # Skip external links, edit links, talk pages, etc.
-        if any(x in decoded for x in ["action=edit", "Talk:", "wikipedia.org",
-                                        "commons.wikimedia", "wikidata.org",
-                                        "Special:", "redlink=1"]):
+        if "/wiki/" not in href or EXCLUDED_LINK_RE.search(href):
             continue
 
         # Must be a subpage of the title or closely related
-        if f"/wiki/{title_zh}/" not in decoded:
+        decoded = urllib.parse.unquote(href)
+        if subpage_prefix not in decoded:
             continue
 
         # Skip the index page itself
-        if decoded.rstrip("/") == f"/wiki/{title_zh}":
+        if decoded.rstrip("/") == index_path:
             continue
 
+        text = a.get_text(strip=True)
         # Skip navigation text
-        if text in ("编辑", "版本信息", "百科", "图册分类", "数据项"):
+        if not text or text in NAV_LINK_TEXTS:
             continue
 
         full_url = BASE_URL + href if href.startswith("/") else href
@@ -156,6 +179,45 @@ def discover_chapter_links(index_url, title_zh):
     return results
 
 
+def discover_chapter_links(index_url, title_zh, slug=None):
+    """
+    Discover chapter/volume links from the index page.
+    Returns list of (title_text, full_url) tuples in page order.
+
+    With a slug, the result is persisted to data/raw/<slug>/_link-index.json
+    and later runs send a conditional request, reusing the stored links when
+    the index page answers 304 Not Modified.
+    """
+    cached = load_link_index(slug) if slug else None
+    if cached and cached.get("index_url") != index_url:
+        cached = None
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = session.get(index_url, timeout=30, headers=headers)
+        if response.status_code == 304 and cached:
+            log.info(f"  Index page unchanged, reusing {len(cached['links'])} stored links")
+            return [tuple(link) for link in cached["links"]]
+        response.raise_for_status()
+        response.encoding = "utf-8"
+    except Exception as e:
+        log.error(f"Failed to fetch index page {index_url}: {e}")
+        if cached:
+            log.warning(f"  Falling back to stored link index for {slug}")
+            return [tuple(link) for link in cached["links"]]
+        return []
+
+    results = extract_chapter_links(response.content, title_zh)
+    if slug and results:
+        save_link_index(slug, index_url, response, results)
+    return results
+
+
 def save_raw(slug, chapter_num, title, content):
     """Save raw text to file."""
     out_dir = RAW_DIR / slug
@@ -183,7 +245,7 @@ def scrape_text(text_info):
     log.info(f"=== Scraping {slug} ({title_zh}) ===")
 
     # Discover links from index page
-    links = discover_chapter_links(wiki_url, title_zh)
+    links = discover_chapter_links(wiki_url, title_zh, slug)
     time.sleep(RATE_LIMIT)
 
     if not links:
@@ -203,12 +265,17 @@ def scrape_text(text_info):
     # But keep them as they may be valid chapters
     count = 0
     for i, (link_text, url) in enumerate(links):
-        content = scrape_page_content(url)
-        time.sleep(RATE_LIMIT)
+        if url in scraped_pages:
+            # Already fetched for this or another slug in this run
+            content = scraped_pages[url].read_text(encoding="utf-8")
+            log.info(f"  Reusing already-scraped page for {link_text}")
+        else:
+            content = scrape_page_content(url)
+            time.sleep(RATE_LIMIT)
 
         if content and len(content.strip()) > 30:
             chapter_num = i + 1
-            save_raw(slug, chapter_num, link_text, content)
+            scraped_pages.setdefault(url, save_raw(slug, chapter_num, link_text, content))
             count += 1
             log.info(f"  [{count}/{len(links)}] {link_text} ({len(content)} chars)")
         else:
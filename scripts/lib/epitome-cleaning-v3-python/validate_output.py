@@ -4,11 +4,15 @@ Validate the cleaned output by checking for remaining contamination.
 Calculates contamination rate and grades the result.
 """
 
-import json
+import os
 import re
+import sys
 from collections import Counter
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import read_chapter
+
 BASE_DIR = Path("/Users/bryancheong/claude_projects/translation-wiki")
 DATA_DIR = BASE_DIR / "data/processed/epitome-of-histories-clean"
 
@@ -72,14 +76,11 @@ def validate_all_chapters():
 
     for chapter_num in range(13, 19):
         filepath = DATA_DIR / f"chapter-{chapter_num:03d}.json"
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+        paragraphs = read_chapter(filepath).paragraphs
         chapter_contaminated = 0
 
         for para in paragraphs:
-            text = para.get('text', '')
+            text = para.text
             total_paragraphs += 1
 
             issues = check_paragraph(text)
@@ -91,7 +92,7 @@ def validate_all_chapters():
                     if len(all_issues) < 50:
                         all_issues.append({
                             'chapter': chapter_num,
-                            'para_idx': para.get('index'),
+                            'para_idx': para.index,
                             'type': issue_type,
                             'match': matched,
                             'context': text[max(0,pos-30):pos+len(matched)+30]
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """Evaluate consolidated Epitome of Histories chapters for apparatus contamination."""
 
-import json
+import os
 import re
 import sys
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import read_chapter
+from trigrams import Sweep
+from unicode_scripts import letter_counts
+
 # TRUE contamination patterns — Latin apparatus terms that should NOT appear in Greek text
 CONTAMINATION_PATTERNS = [
     # Latin apparatus terms (case-insensitive where noted)
@@ -73,16 +78,15 @@ CONTAMINATION_PATTERNS = [
     # Double brackets (apparatus)
     (r'\[\[.+?\]\]', 'Double brackets (apparatus)', False),
 ]
+COMPILED_PATTERNS = [(re.compile(pattern, re.IGNORECASE if case_insensitive else 0), desc)
+                     for pattern, desc, case_insensitive in CONTAMINATION_PATTERNS]
 
-def load_chapter(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def check_contamination(text, para_idx):
+def check_contamination(text, para_idx, candidates=None):
+    """Findings in one paragraph; candidates limits the check to those pattern indexes."""
     findings = []
-    for pattern, desc, case_insensitive in CONTAMINATION_PATTERNS:
-        flags = re.IGNORECASE if case_insensitive else 0
-        for m in re.finditer(pattern, text, flags):
+    for i in range(len(COMPILED_PATTERNS)) if candidates is None else candidates:
+        pattern, desc = COMPILED_PATTERNS[i]
+        for m in pattern.finditer(text):
             ctx_start = max(0, m.start() - 40)
             ctx_end = min(len(text), m.end() + 40)
             findings.append({
@@ -96,14 +100,15 @@ def check_contamination(text, para_idx):
 def check_paragraph_quality(paragraphs):
     issues = []
     for p in paragraphs:
-        idx = p['index']
-        text = p['text']
+        idx = p.index
+        text = p.text
 
         if len(text.strip()) < 20:
             issues.append((idx, f'Orphaned fragment ({len(text.strip())} chars): "{text.strip()}"'))
 
-        latin_chars = len(re.findall(r'[a-zA-Z]', text))
-        greek_chars = len(re.findall(r'[\u0370-\u03FF\u1F00-\u1FFF]', text))
+        letters = letter_counts(text, ascii_latin=True)
+        latin_chars = letters['Latin']
+        greek_chars = letters['Greek']
         total = latin_chars + greek_chars
         if total > 50 and latin_chars > 0.6 * total:
             issues.append((idx, f'High Latin ratio ({latin_chars}/{total} = {latin_chars/total:.0%})'))
@@ -113,17 +118,18 @@ def check_paragraph_quality(paragraphs):
 
     return issues
 
-def evaluate_chapter(filepath):
-    data = load_chapter(filepath)
-    chapter_num = data.get('chapterNumber', '?')
-    paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+def evaluate_chapter(filepath, sweep=None):
+    chapter = read_chapter(filepath)
+    chapter_num = chapter.number if chapter.number is not None else '?'
+    paragraphs = chapter.paragraphs
 
-    total_chars = sum(len(p['text']) for p in paragraphs)
+    total_chars = sum(len(p.text) for p in paragraphs)
     total_paras = len(paragraphs)
 
+    candidates = sweep.candidates(filepath, len(paragraphs)) if sweep is not None else None
     all_findings = []
     for p in paragraphs:
-        all_findings.extend(check_contamination(p['text'], p['index']))
+        all_findings.extend(check_contamination(p.text, p.index, candidates[p.index] if candidates else None))
 
     contaminated_chars = sum(len(f['match']) for f in all_findings)
     quality_issues = check_paragraph_quality(paragraphs)
@@ -161,9 +167,10 @@ def main():
     print(f"Evaluating {len(files)} chapters in {directory}\n")
     print("=" * 80)
 
+    sweep = Sweep([pattern for pattern, _ in COMPILED_PATTERNS])
     all_results = []
     for f in files:
-        result = evaluate_chapter(f)
+        result = evaluate_chapter(f, sweep)
         all_results.append(result)
 
         print(f"\nBook {result['chapter']}: {result['total_paragraphs']} paras, {result['total_chars']} chars")
@@ -5,22 +5,21 @@ Adapts the v3 cleaning approach (clean_paragraphs_v2.py) for books 1-6.
 """
 
 import json
+import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from unicode_scripts import ratio
+
 BASE_DIR = Path("/Users/bryancheong/claude_projects/translation-wiki")
 SRC_DIR = BASE_DIR / "data/processed/epitome-of-histories"
 OUT_DIR = BASE_DIR / "data/processed/epitome-of-histories-final"
 
-GREEK_RE = re.compile(r'[\u0370-\u03FF\u1F00-\u1FFF]')
-
 def greek_ratio(text):
-    """Return fraction of alphabetic chars that are Greek."""
-    greek = len(GREEK_RE.findall(text))
-    alpha = len(re.findall(r'[a-zA-Z\u0370-\u03FF\u1F00-\u1FFF]', text))
-    if alpha == 0:
-        return 0
-    return greek / alpha
+    """Return fraction of alphabetic chars (Greek blocks, ASCII letters) that are Greek."""
+    return ratio(text, 'Greek', among=('Greek', 'Latin'), ascii_latin=True)
 
 def is_apparatus_paragraph(text):
     """Determine if a paragraph is pure apparatus (should be removed entirely)."""
@@ -232,10 +231,7 @@ def process_chapter(chapter_num):
         t = t.strip()
         if len(t) <= 15:
             continue
-        gr = len(GREEK_RE.findall(t))
-        alpha = len(re.findall(r'[a-zA-Z\u0370-\u03FF\u1F00-\u1FFF]', t))
-        ratio = gr / alpha if alpha else 0
-        if ratio < 0.6:
+        if greek_ratio(t) < 0.6:
             continue
         final.append(t)
 
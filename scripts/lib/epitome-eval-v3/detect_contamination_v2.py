@@ -4,12 +4,16 @@ Contamination detection v2 for Epitome of Histories Vol. 3 (Books 13-18).
 More conservative patterns to reduce false positives.
 """
 
-import json
+import os
 import re
 import sys
 from pathlib import Path
 from typing import List, Dict, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import read_chapter
+from trigrams import Sweep
+
 # ACTUAL apparatus patterns - more specific to avoid Greek word matches
 SIGLA_PATTERNS = [
     r'\bRwp[JID]+[ti]?\b',  # RwpJDi, RwpJDt, etc (compound sigla only)
@@ -101,14 +105,13 @@ def check_paragraph(text: str, patterns: List[Tuple[str, re.Pattern]]) -> List[D
             })
     return issues
 
-def analyze_chapter(filepath: Path, patterns: List[Tuple[str, re.Pattern]]) -> Dict:
+def analyze_chapter(filepath: Path, patterns: List[Tuple[str, re.Pattern]], sweep: Sweep) -> Dict:
     """Analyze a single chapter file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+    chapter = read_chapter(filepath)
+    paragraphs = chapter.paragraphs
+    candidates = sweep.candidates(filepath, len(paragraphs))
     results = {
-        'chapter': data.get('chapterNumber', 'unknown'),
+        'chapter': chapter.number,
         'total_paragraphs': len(paragraphs),
         'contaminated_paragraphs': 0,
         'issues': [],
@@ -116,9 +119,9 @@ def analyze_chapter(filepath: Path, patterns: List[Tuple[str, re.Pattern]]) -> D
     }
 
     for para in paragraphs:
-        idx = para.get('index', -1)
-        text = para.get('text', '')
-        para_issues = check_paragraph(text, patterns)
+        idx = para.index
+        text = para.text
+        para_issues = check_paragraph(text, [patterns[i] for i in candidates[idx]])
 
         if para_issues:
             results['contaminated_paragraphs'] += 1
@@ -136,6 +139,7 @@ def analyze_chapter(filepath: Path, patterns: List[Tuple[str, re.Pattern]]) -> D
 def main():
     base_dir = Path('/Users/bryancheong/claude_projects/translation-wiki/data/processed/epitome-of-histories-clean')
     patterns = compile_patterns()
+    sweep = Sweep([pattern for _, pattern in patterns])
 
     overall = {
         'total_paragraphs': 0,
@@ -150,7 +154,7 @@ def main():
             print(f"Warning: {filepath} not found", file=sys.stderr)
             continue
 
-        result = analyze_chapter(filepath, patterns)
+        result = analyze_chapter(filepath, patterns, sweep)
         overall['total_paragraphs'] += result['total_paragraphs']
         overall['contaminated_paragraphs'] += result['contaminated_paragraphs']
         overall['chapters'].append(result)
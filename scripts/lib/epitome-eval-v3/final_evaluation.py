@@ -4,12 +4,16 @@ Final evaluation of Epitome Vol. 3 cleaning.
 Focus on patterns that actually cause translation problems.
 """
 
-import json
+import os
 import re
 import sys
 from pathlib import Path
 from typing import List, Dict, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import read_chapter
+from trigrams import Sweep
+
 # CRITICAL patterns - these WILL cause translation problems
 CRITICAL_PATTERNS = [
     # Latin apparatus terms that should NEVER appear
@@ -50,6 +54,7 @@ def analyze_all_chapters() -> Dict:
             patterns.append((re.compile(pattern_str, re.IGNORECASE), category, desc))
         except re.error as e:
             print(f"Warning: Invalid pattern '{pattern_str}': {e}", file=sys.stderr)
+    sweep = Sweep([pattern for pattern, _, _ in patterns])
 
     overall = {
         'total_paragraphs': 0,
@@ -63,10 +68,9 @@ def analyze_all_chapters() -> Dict:
         if not filepath.exists():
             continue
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+        chapter = read_chapter(filepath)
+        paragraphs = chapter.paragraphs
+        candidates = sweep.candidates(filepath, len(paragraphs))
         chapter_results = {
             'total': len(paragraphs),
             'contaminated': 0,
@@ -74,11 +78,12 @@ def analyze_all_chapters() -> Dict:
         }
 
         for para in paragraphs:
-            idx = para.get('index', -1)
-            text = para.get('text', '')
+            idx = para.index
+            text = para.text
 
             para_issues = []
-            for pattern, category, desc in patterns:
+            for i in candidates[idx]:
+                pattern, category, desc = patterns[i]
                 for m in pattern.finditer(text):
                     start = max(0, m.start() - 30)
                     end = min(len(text), m.end() + 30)
@@ -3,12 +3,16 @@
 Random paragraph sampler for manual inspection.
 """
 
-import json
+import os
 import random
 import sys
 from pathlib import Path
 from typing import List, Dict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import read_chapter
+from unicode_scripts import count
+
 def sample_paragraphs(n: int = 30, seed: int = None) -> List[Dict]:
     """Sample n random paragraphs from all chapters."""
     if seed is not None:
@@ -23,15 +27,13 @@ def sample_paragraphs(n: int = 30, seed: int = None) -> List[Dict]:
         if not filepath.exists():
             continue
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+        chapter = read_chapter(filepath)
+        paragraphs = chapter.paragraphs
         for para in paragraphs:
             all_paragraphs.append({
                 'chapter': chapter_num,
-                'index': para.get('index', -1),
-                'text': para.get('text', ''),
+                'index': para.index,
+                'text': para.text,
             })
 
     # Sample
@@ -44,7 +46,7 @@ def sample_paragraphs(n: int = 30, seed: int = None) -> List[Dict]:
 
 def calculate_greek_ratio(text: str) -> float:
     """Calculate the ratio of Greek characters in text."""
-    greek_chars = sum(1 for c in text if '\u0370' <= c <= '\u03FF' or '\u1F00' <= c <= '\u1FFF')
+    greek_chars = count(text, 'Greek')
     total_chars = len(text.replace(' ', '').replace('\n', ''))
     if total_chars == 0:
         return 0.0
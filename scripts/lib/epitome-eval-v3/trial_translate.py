@@ -4,12 +4,15 @@ Trial translation tester - sends sample paragraphs to DeepSeek API
 and checks for gibberish/contamination in translation output.
 """
 
-import json
 import os
 import random
 import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from batches import split_paragraph
+from corpus import read_chapter
+
 try:
     import openai
 except ImportError:
@@ -27,15 +30,13 @@ def get_random_paragraphs(n: int = 5, seed: int = 42) -> list:
         if not filepath.exists():
             continue
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        paragraphs = data.get('sourceContent', {}).get('paragraphs', [])
+        chapter = read_chapter(filepath)
+        paragraphs = chapter.paragraphs
         for para in paragraphs:
             all_paragraphs.append({
                 'chapter': chapter_num,
-                'index': para.get('index', -1),
-                'text': para.get('text', ''),
+                'index': para.index,
+                'text': para.text,
             })
 
     return random.sample(all_paragraphs, min(n, len(all_paragraphs)))
@@ -116,7 +117,9 @@ def main():
         print(f"Source: {para['text'][:200]}...")
 
         try:
-            translation = translate_text(client, para['text'][:1500])  # Limit length
+            # Limit length: first piece of the paragraph, cut at a sentence end
+            start, end, _ = split_paragraph(para['text'], 1000)[0]
+            translation = translate_text(client, para['text'][start:end])
             print(f"Translation: {translation[:300]}...")
 
             quality = check_translation_quality(translation)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Chapter boundary detection for raw OCR files.
+
+A ChapterSpec names a text's heading regex (ΚΕΦ, CAPITOLO, standalone
+numerals...) and how to read the chapter number from it. One pass over the raw
+file collects heading candidates, scores them (isolated, short lines score
+higher) and keeps the highest-scoring chain of strictly increasing chapter
+numbers, so page numbers, running heads and stray matches drop out. Chapters
+whose heading the OCR lost can be found through a text anchor instead.
+
+The result is persisted next to the raw file as <name>.chapters.json together
+with the file's size/mtime/sha1 and a signature of the spec; processors call
+load_chapter_index() and the file is rescanned only when the raw text (or the
+spec) has changed.
+
+Boundary lines are 1-indexed: for a heading it is the heading line itself, for
+an anchored chapter it is the line just before the anchor, so in both cases
+the chapter's content starts on the next line.
+
+    python3 scripts/lib/ocr-lines/chapters.py mai-ve-siyah data/raw/mai_ve_saiyah/mai_ve_saiyah.txt
+    python3 scripts/lib/ocr-lines/chapters.py <spec> <raw file> --rescan
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from writer import write_bytes
+
+INDEX_VERSION = 1
+GAP_PENALTY = 0.5
+
+# Greek alphabetic numerals (πβʹ = 82, ριηʹ = 118)
+GREEK_NUMERALS = {
+    'α': 1, 'β': 2, 'γ': 3, 'δ': 4, 'ε': 5, 'ϛ': 6, 'ϝ': 6, 'ζ': 7, 'η': 8, 'θ': 9,
+    'ι': 10, 'κ': 20, 'λ': 30, 'μ': 40, 'ν': 50, 'ξ': 60, 'ο': 70, 'π': 80,
+    'ϟ': 90, 'ϙ': 90, 'ρ': 100, 'σ': 200, 'τ': 300,
+}
+
+
+def greek_numeral(text: str):
+    """Value of a Greek numeral such as 'πβ' or 'ριη'', or None."""
+    letters = ''.join(c for c in unicodedata.normalize('NFD', text.lower())
+                      if not unicodedata.combining(c))
+    letters = letters.replace('στ', 'ϛ').strip("'ʹ’΄.")
+    if not letters or any(c not in GREEK_NUMERALS for c in letters):
+        return None
+    return sum(GREEK_NUMERALS[c] for c in letters)
+
+
+def heading_number(match):
+    """Default number reader: the 'num' group (or group 1) as a decimal."""
+    text = match.groupdict().get('num') or match.group(1)
+    return int(text) if text and text.isdigit() else None
+
+
+class ChapterSpec:
+    """How to find the chapters of one raw file.
+
+    heading:  regex matched (re.match) against each line minus its newline
+    number:   match -> chapter number or None (default: decimal 'num' group)
+    first, last: expected chapter numbers
+    anchors:  {chapter number: regex} for chapters whose heading is missing,
+              plus optional 'start' / 'end' regexes marking the first and last
+              line of the text proper (first / last match wins)
+    """
+
+    def __init__(self, name, heading=None, number=heading_number, first=1, last=None, anchors=None):
+        self.name = name
+        self.heading = re.compile(heading) if isinstance(heading, str) else heading
+        self.number = number
+        self.first = first
+        self.last = last
+        self.anchors = {k: re.compile(v) if isinstance(v, str) else v
+                        for k, v in (anchors or {}).items()}
+
+    def signature(self) -> str:
+        parts = [self.name, self.heading.pattern if self.heading else '',
+                 getattr(self.number, '__name__', ''), self.first, self.last,
+                 sorted((str(k), v.pattern) for k, v in self.anchors.items())]
+        return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def index_path(raw_path: str) -> str:
+    return os.path.splitext(raw_path)[0] + '.chapters.json'
+
+
+def _score(line: str, prev_line: str) -> float:
+    score = 1.0
+    if not prev_line.strip():
+        score += 0.5
+    if len(line.strip()) <= 40:
+        score += 0.5
+    return score
+
+
+def _best_chain(candidates, first):
+    """Highest-scoring run of candidates with strictly increasing numbers.
+
+    Skipped chapter numbers cost GAP_PENALTY each; on equal scores the later
+    candidate wins, so a table of contents loses to the real headings.
+
+    Candidates come in line order, so the best predecessor of a candidate is
+    the best earlier one with a smaller number. Extending chain j to number n
+    scores best[j] + GAP_PENALTY * (number_j + 1) + score - GAP_PENALTY * n,
+    so a Fenwick tree over chapter numbers holding the running maximum of
+    (best[j] + GAP_PENALTY * number_j, j) finds it in O(log c). Scores and
+    GAP_PENALTY are multiples of 0.5, so ties compare exactly.
+    """
+    if not candidates:
+        return []
+    low = min(c['number'] for c in candidates)
+    size = max(c['number'] for c in candidates) - low + 1
+    tree = [None] * (size + 1)   # 1-based; tree[k] = max (key, j) over its range
+
+    best, back = [], []
+    for i, cand in enumerate(candidates):
+        top = cand['score'] - GAP_PENALTY * (cand['number'] - first)
+        prev = None
+        k, found = cand['number'] - low, None   # numbers below cand's: slots 1..k
+        while k > 0:
+            if tree[k] is not None and (found is None or tree[k] > found):
+                found = tree[k]
+            k -= k & -k
+        if found is not None:
+            score = found[0] + GAP_PENALTY + cand['score'] - GAP_PENALTY * cand['number']
+            if score >= top:
+                top, prev = score, found[1]
+        best.append(top)
+        back.append(prev)
+        entry = (top + GAP_PENALTY * cand['number'], i)
+        k = cand['number'] - low + 1
+        while k <= size:
+            if tree[k] is None or entry > tree[k]:
+                tree[k] = entry
+            k += k & -k
+
+    end = max(range(len(candidates)), key=lambda i: (best[i], i))
+    chain = []
+    while end is not None:
+        chain.append(candidates[end])
+        end = back[end]
+    return chain[::-1]
+
+
+def scan(raw_path: str, spec: ChapterSpec) -> dict:
+    """Scan the raw file once and build its chapter index."""
+    sha1 = hashlib.sha1()
+    candidates, unnumbered = [], []
+    anchored, start, end = {}, None, None
+    prev_line = ''
+    line_count = 0
+
+    with open(raw_path, 'rb') as f:
+        for line_count, raw in enumerate(f, 1):
+            sha1.update(raw)
+            line = raw.decode('utf-8').rstrip('\n').rstrip('\r')
+            if spec.heading is not None:
+                m = spec.heading.match(line)
+                if m:
+                    entry = {'line': line_count, 'heading': line.strip(),
+                             'score': _score(line, prev_line), 'source': 'heading'}
+                    number = spec.number(m)
+                    if number is None:
+                        unnumbered.append(entry)
+                    elif spec.first <= number <= (spec.last or number):
+                        candidates.append({'number': number, **entry})
+            for key, regex in spec.anchors.items():
+                if regex.search(line):
+                    if key == 'start':
+                        start = start or line_count
+                    elif key == 'end':
+                        end = line_count
+                    elif key not in anchored:
+                        anchored[key] = line_count
+            prev_line = line
+
+    chain = _best_chain(candidates, spec.first)
+    chapters = {c['number']: c for c in chain}
+
+    # A single unnumbered (garbled) heading between chapters n-1 and n+1 is n.
+    numbers = sorted(chapters)
+    for a, b in zip(numbers, numbers[1:]):
+        if b - a != 2:
+            continue
+        between = [u for u in unnumbered if chapters[a]['line'] < u['line'] < chapters[b]['line']]
+        if len(between) == 1:
+            chapters[a + 1] = {'number': a + 1, **between[0], 'source': 'inferred'}
+
+    for number, line in anchored.items():
+        if number not in chapters:
+            chapters[number] = {'number': number, 'line': line - 1, 'heading': '',
+                                'score': 0.0, 'source': 'anchor'}
+
+    # Chapter text before the first heading found starts at the top of the text.
+    if spec.heading is not None and spec.first not in chapters:
+        chapters[spec.first] = {'number': spec.first, 'line': (start or 1) - 1,
+                                'heading': '', 'score': 0.0, 'source': 'inferred'}
+
+    stat = os.stat(raw_path)
+    expected = range(spec.first, (spec.last or max(chapters, default=spec.first - 1)) + 1)
+    return {
+        'version': INDEX_VERSION,
+        'spec': spec.name,
+        'specSignature': spec.signature(),
+        'source': {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha1': sha1.hexdigest()},
+        'lineCount': line_count,
+        'span': {'start': start or 1, 'end': end or line_count},
+        'chapters': sorted(chapters.values(), key=lambda c: c['line']),
+        'missing': [n for n in expected if n not in chapters],
+        'unnumberedHeadings': [u['line'] for u in unnumbered],
+    }
+
+
+def _is_current(index: dict, raw_path: str, spec: ChapterSpec) -> bool:
+    if index.get('version') != INDEX_VERSION or index.get('specSignature') != spec.signature():
+        return False
+    stat = os.stat(raw_path)
+    source = index.get('source', {})
+    return source.get('size') == stat.st_size and source.get('mtimeNs') == stat.st_mtime_ns
+
+
+def save_index(index: dict, path: str):
+    write_bytes(path, json.dumps(index, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def load_chapter_index(raw_path: str, spec: ChapterSpec, rescan: bool = False) -> dict:
+    """The chapter index for raw_path, rescanning when the file or spec changed."""
+    path = index_path(raw_path)
+    if not rescan and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if _is_current(index, raw_path, spec):
+            return index
+    index = scan(raw_path, spec)
+    save_index(index, path)
+    return index
+
+
+def chapter_ranges(index: dict, end_line: int = None, include_heading: bool = False):
+    """[(chapter number, start, end)] as 0-indexed half-open line slices.
+
+    A chapter runs from the line after its boundary (or from its heading line
+    with include_heading) to the line before the next boundary; the last one
+    runs to end_line (default: the end of the indexed span).
+    """
+    chapters = index['chapters']
+    if end_line is None:
+        end_line = index['span']['end']
+    ranges = []
+    for i, chapter in enumerate(chapters):
+        start = chapter['line']
+        if include_heading and chapter['heading']:
+            start -= 1
+        stop = chapters[i + 1]['line'] - 1 if i + 1 < len(chapters) else end_line
+        ranges.append((chapter['number'], start, stop))
+    return ranges
+
+
+def boundary_mismatches(index: dict, expected: dict) -> list:
+    """[(key, expected line, indexed line)] where the index disagrees with
+    known boundaries: {chapter number: boundary line}, plus 'start' / 'end'
+    for the span. A chapter found but not expected is listed with None."""
+    found = {c['number']: c['line'] for c in index['chapters']}
+    mismatches = [(key, line, index['span'][key] if key in ('start', 'end') else found.get(key))
+                  for key, line in expected.items()]
+    mismatches = [m for m in mismatches if m[1] != m[2]]
+    mismatches += [(number, None, line) for number, line in found.items() if number not in expected]
+    return mismatches
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: chapters.py <spec|path.py:NAME> <raw file> [--rescan]")
+        return 1
+    from classify import load_attr
+    if ':' in argv[0]:
+        spec = load_attr(*argv[0].rsplit(':', 1))
+    else:
+        from profiles import CHAPTER_SPECS
+        spec = CHAPTER_SPECS[argv[0]]
+    index = load_chapter_index(argv[1], spec, rescan='--rescan' in argv)
+
+    print(f"{spec.name}: {index['lineCount']} lines, span {index['span']['start']}-{index['span']['end']}")
+    for c in index['chapters']:
+        print(f"  {c['number']:4d}  line {c['line']:6d}  {c['source']:8s}  {c['heading'][:50]}")
+    if index['missing']:
+        print(f"  missing: {index['missing']}")
+    print(f"Index: {index_path(argv[1])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
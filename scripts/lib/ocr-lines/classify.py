@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Line-role classification for OCR'd texts.
+
+Each text describes its page furniture (page numbers, running heads, footnotes,
+library stamps, noise) as a Profile: an ordered list of rules where the first
+matching rule decides the line's role. A profile is compiled once -- every run
+of consecutive regex rules becomes a single alternation tried with one match()
+call -- and classify() turns a whole file into a bytearray with one role code
+per line. Processors walk their lines together with that array instead of
+calling their own is_page_number()/is_footnote_line() helpers on every line.
+
+Usage from a process-*.py script:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+    from classify import TEXT, PAGE_NUMBER, classify
+    from profiles import MAI_VE_SIYAH
+
+    roles = classify(lines, MAI_VE_SIYAH)
+    for line, role in zip(lines, roles):
+        if role == TEXT:
+            ...
+
+Onboarding a new OCR text means adding a Profile to profiles.py (or next to
+the text's own cleaning lib) and checking it against the raw file:
+
+    python3 scripts/lib/ocr-lines/classify.py mai-ve-siyah data/raw/mai_ve_saiyah/mai_ve_saiyah.txt
+    python3 scripts/lib/ocr-lines/classify.py mai-ve-siyah <file> --show FOOTNOTE
+    python3 scripts/lib/ocr-lines/classify.py scripts/lib/semeioseis-cleaning-v4/filters.py:PROFILE <file>
+"""
+
+import importlib.util
+import os
+import re
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from cli import option, positionals
+
+# --- Roles (one byte per line) ---
+
+TEXT = 0
+BLANK = 1
+PAGE_NUMBER = 2
+PAGE_HEADER = 3
+FOOTNOTE = 4
+APPARATUS = 5
+LATIN_EDITORIAL = 6
+FOREIGN_SCRIPT = 7
+OCR_NOISE = 8
+INDEX = 9
+STAMP = 10
+SECTION_BREAK = 11
+HEADING = 12
+
+ROLE_NAMES = (
+    'TEXT', 'BLANK', 'PAGE_NUMBER', 'PAGE_HEADER', 'FOOTNOTE', 'APPARATUS',
+    'LATIN_EDITORIAL', 'FOREIGN_SCRIPT', 'OCR_NOISE', 'INDEX', 'STAMP',
+    'SECTION_BREAK', 'HEADING',
+)
+ROLES = {name: code for code, name in enumerate(ROLE_NAMES)}
+
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+_BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class Rule:
+    """One classification rule: a regex (match or search) or a predicate."""
+    __slots__ = ('role', 'pattern', 'flags', 'func', 'search', 'max_len')
+
+    def __init__(self, role, test, search=False, max_len=None):
+        self.role = role
+        self.search = search
+        self.max_len = max_len
+        self.func = None
+        self.pattern = None
+        self.flags = 0
+        if callable(test) and not isinstance(test, re.Pattern):
+            self.func = test
+        elif isinstance(test, re.Pattern):
+            self.pattern, self.flags = test.pattern, test.flags
+        else:
+            self.pattern = test
+
+    def mergeable(self):
+        """Regex rules without group names or backreferences can share an alternation."""
+        if self.func is not None:
+            return False
+        compiled = re.compile(self.pattern, self.flags)
+        return not compiled.groupindex and not _BACKREF_RE.search(self.pattern)
+
+    def scoped_pattern(self):
+        """The pattern with its flags inlined, so it can be combined with others."""
+        scoped = ''.join(c for flag, c in _SCOPED_FLAGS if self.flags & flag)
+        return f'(?{scoped}:{self.pattern})' if scoped else f'(?:{self.pattern})'
+
+    def absorb(self, other):
+        """Fold a following search rule with the same role into this one.
+
+        Which of the two matches first cannot change the role, so one scan
+        for either pattern replaces two.
+        """
+        if not (self.search and other.search and other.role == self.role
+                and other.max_len == self.max_len and self.mergeable() and other.mergeable()):
+            return False
+        self.pattern = f'{self.scoped_pattern()}|{other.scoped_pattern()}'
+        self.flags = 0
+        return True
+
+    def anchored_pattern(self):
+        """This rule as a pattern for re.match() on the whole line."""
+        pattern = self.scoped_pattern()
+        if self.search:
+            pattern = f'(?s:.)*?(?:{pattern})'
+        if self.max_len is not None:
+            pattern = f'(?=(?s:.){{0,{self.max_len}}}\\Z)(?:{pattern})'
+        return pattern
+
+
+def rule(role, test, *, search=False, max_len=None):
+    """Build a rule.
+
+    test is a regex (string or compiled, tried with re.match unless search=True)
+    or a predicate taking the normalized line. max_len limits a regex rule to
+    lines of at most that many characters.
+    """
+    return Rule(role, test, search=search, max_len=max_len)
+
+
+class Profile:
+    """Ordered classification rules for one text.
+
+    strip: classify line.strip() (True) or the line minus its newline (False)
+    blank: role given to empty/whitespace-only lines before any rule runs,
+           or None to let the rules see them
+    """
+
+    def __init__(self, name, rules, strip=True, blank=BLANK):
+        self.name = name
+        self.rules = list(rules)
+        self.strip = strip
+        self.blank = blank
+        self._steps = None
+
+    def _compile(self):
+        """Group consecutive mergeable regex rules into one alternation each."""
+        steps = []
+        run = []
+
+        def flush():
+            if not run:
+                return
+            if len(run) == 1:
+                steps.append(('regex', re.compile(run[0].anchored_pattern()), run[0].role))
+            else:
+                regex = re.compile('|'.join(f'(?P<r{i}>{r.anchored_pattern()})' for i, r in enumerate(run)))
+                steps.append(('alt', regex, {f'r{i}': r.role for i, r in enumerate(run)}))
+            run.clear()
+
+        rules = []
+        for r in self.rules:
+            if not (rules and rules[-1].absorb(r)):
+                rules.append(Rule(r.role, re.compile(r.pattern, r.flags) if r.func is None else r.func,
+                                  search=r.search, max_len=r.max_len))
+
+        for r in rules:
+            if r.search and r.max_len is None:
+                # re.search() scans for literal prefixes far faster than a
+                # lazy .*? inside an anchored alternation would.
+                flush()
+                steps.append(('search', re.compile(r.scoped_pattern()), r.role))
+                continue
+            if r.mergeable():
+                run.append(r)
+                continue
+            flush()
+            if r.func is not None:
+                steps.append(('func', r.func, r.role))
+            else:
+                # Named groups or backreferences: keep the rule on its own.
+                steps.append(('regex', re.compile(r.anchored_pattern()), r.role))
+        flush()
+        self._steps = steps
+        return steps
+
+    def role(self, line: str) -> int:
+        """Role code for a single line."""
+        text = line.strip() if self.strip else line.rstrip('\n')
+        if self.blank is not None and (not text or text.isspace()):
+            return self.blank
+        for kind, test, role in self._steps or self._compile():
+            if kind == 'alt':
+                m = test.match(text)
+                if m:
+                    return role[m.lastgroup]
+            elif kind == 'regex':
+                if test.match(text):
+                    return role
+            elif kind == 'search':
+                if test.search(text):
+                    return role
+            elif test(text):
+                return role
+        return TEXT
+
+
+def iter_classified(lines, profile: Profile):
+    """Yield (line, role) for each line of any iterable, e.g. an open file.
+
+    Rules only look at the line itself, so repeated lines (running heads,
+    page furniture, blank lines) are classified once.
+    """
+    seen = {}
+    role_of = profile.role
+    for line in lines:
+        role = seen.get(line)
+        if role is None:
+            role = seen[line] = role_of(line)
+        yield line, role
+
+
+def classify(lines, profile: Profile) -> bytearray:
+    """Classify every line, returning one role code per line."""
+    return bytearray(role for _, role in iter_classified(lines, profile))
+
+
+def role_counts(roles) -> Counter:
+    """Count lines per role name."""
+    return Counter({ROLE_NAMES[code]: n for code, n in Counter(roles).items()})
+
+
+def keep(lines, roles, drop):
+    """Lines whose role is not in drop."""
+    return [line for line, role in zip(lines, roles) if role not in drop]
+
+
+def load_attr(path: str, attr: str):
+    """Load NAME from a module file, e.g. a profile declared in a text's own lib."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    module_spec = importlib.util.spec_from_file_location('_profile_module', path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    return getattr(module, attr)
+
+
+def load_profile(spec: str) -> Profile:
+    """A profile by name from profiles.py, or 'path/to/module.py:NAME'."""
+    if ':' in spec:
+        return load_attr(*spec.rsplit(':', 1))
+    from profiles import PROFILES
+    return PROFILES[spec]
+
+
+def main(argv):
+    args = positionals(argv, ('--show', '--out'))
+    if len(args) < 2:
+        print("usage: classify.py <profile> <file> [--show ROLE] [--out roles.bin]")
+        return 1
+    profile = load_profile(args[0])
+    with open(args[1], 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    roles = classify(lines, profile)
+
+    out = option(argv, '--out')
+    if out is not None:
+        with open(out, 'wb') as f:
+            f.write(roles)
+    show = option(argv, '--show')
+    if show is not None:
+        wanted = ROLES[show]
+        for n, (line, role) in enumerate(zip(lines, roles), 1):
+            if role == wanted:
+                print(f"{n:6d}  {line.rstrip()}")
+        return 0
+
+    print(f"{profile.name}: {len(lines)} lines")
+    for name, n in role_counts(roles).most_common():
+        print(f"  {name:16s} {n}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
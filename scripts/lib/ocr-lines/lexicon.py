@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Lexicon-backed OCR confusion correction.
+
+The hand-written fixes for each text (scapigliatura's l/t table, mai ve
+siyah's rn -> m and oı -> or, syair's ! / 1 / I -> l) are all instances of the
+same idea: the OCR confuses a few character sequences, and the right reading
+is the one that is a common word elsewhere in the same text. This module does
+that without a curated dictionary:
+
+1. A Lexicon (a trie of case-folded words with their frequencies) is built
+   from the clean part of the text, e.g. the processed chapters.
+2. For a rare word, candidate readings are generated by walking the trie while
+   applying the language's confusion pairs (OCR form -> intended form), at
+   most max_edits of them per word. Branches with no word in the trie are cut
+   off immediately, so candidates are only ever real lexicon entries.
+3. Only words seen fewer than min_count times are corrected: a real word
+   that happens to be one confusion away from a commoner one (stelle/stette,
+   molo/moto) is still a word once it recurs. The most frequent candidate
+   wins if it is at least `ratio` times more frequent than the word itself.
+   Decisions are cached per surface form.
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+    from lexicon import ConfusionCorrector, Lexicon, LANGUAGES
+
+    lexicon = Lexicon.from_texts(paragraphs, LANGUAGES['tr'])
+    corrector = ConfusionCorrector(lexicon, LANGUAGES['tr'])
+    text = corrector.correct_text(text)
+    corrector.counts.most_common()
+
+Review what it would change in a processed text before wiring it in:
+
+    python3 scripts/lib/ocr-lines/lexicon.py tr data/processed/mai-ve-siyah
+    python3 scripts/lib/ocr-lines/lexicon.py it data/processed/scapigliatura-e-il-6-febbraio --ratio 10
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from cli import option, positionals
+from corpus import chapter_files, iter_paragraphs
+
+
+class Language:
+    """Tokenization and OCR confusion pairs for one language.
+
+    confusions: (OCR form, intended form) pairs, matched against the word
+                and its lowercase form (so 'l' -> 't' also fires on 'L', while
+                'I' -> 'l' needs a capital I) and producing lexicon text
+    word:       regex for a word; confusable punctuation such as '!' may
+                appear inside a word but not at its edges
+    """
+
+    def __init__(self, code, confusions, word=r'\w+'):
+        self.code = code
+        self.confusions = list(confusions)
+        self.word = re.compile(word)
+        self.by_first = {}
+        for ocr, intended in self.confusions:
+            self.by_first.setdefault(ocr[0], []).append((ocr, intended))
+
+    def words(self, text: str):
+        return self.word.findall(text)
+
+
+LANGUAGES = {
+    # Italian (scapigliatura): t read as l (stato -> stalo, tutto -> lullo)
+    'it': Language('it', [
+        ('l', 't'), ('rn', 'm'), ('li', 'h'), ('cl', 'd'), ('c', 'e'),
+    ]),
+    # Turkish (mai ve siyah): rn -> m, ı for a lost r, ii for ü. Dotted and
+    # dotless i (and o/ö, u/ü) are left out: both readings are usually words.
+    'tr': Language('tr', [
+        ('rn', 'm'), ('ı', 'r'), ('ii', 'ü'), ('lı', 'h'), ('c', 'e'),
+    ]),
+    # Malay (syair): l read as !, 1 or I. The OCR also reads rn as m, so rn -> m
+    # turns a rare genuine rn word into its commoner misreading (bernama ->
+    # bemama, pernah -> pemah); review those in the CLI output.
+    'ms': Language('ms', [
+        ('!', 'l'), ('1', 'l'), ('I', 'l'), ('rn', 'm'), ('li', 'h'), ('c', 'e'),
+    ], word=r'\w+(?:!\w+)*'),
+}
+
+
+class Lexicon:
+    """Case-folded words and their frequencies, stored as a trie.
+
+    Nodes are dicts of child characters; a node's count of complete words is
+    stored under the key ''. Words sharing a prefix share its nodes.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, word: str, count: int = 1):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        if '' not in node:
+            self.size += 1
+        node[''] = node.get('', 0) + count
+
+    def count(self, word: str) -> int:
+        node = self.root
+        for ch in word:
+            node = node.get(ch)
+            if node is None:
+                return 0
+        return node.get('', 0)
+
+    @classmethod
+    def from_texts(cls, texts, language: Language, min_count: int = 1) -> 'Lexicon':
+        """Lexicon of the letters-only words in texts seen at least min_count times."""
+        counts = Counter()
+        for text in texts:
+            counts.update(w.lower() for w in language.words(text) if w.isalpha())
+        lexicon = cls()
+        for word, n in counts.items():
+            if n >= min_count:
+                lexicon.add(word, n)
+        return lexicon
+
+    def candidates(self, word: str, language: Language, max_edits: int = 2):
+        """{lexicon word: fewest confusions} for readings of word that differ from it."""
+        lower = word.lower()
+        found = {}
+        stack = [(0, self.root, 0, '')]
+        while stack:
+            i, node, edits, prefix = stack.pop()
+            if i == len(word):
+                if edits and '' in node and edits < found.get(prefix, max_edits + 1):
+                    found[prefix] = edits
+                continue
+            child = node.get(lower[i])
+            if child is not None:
+                stack.append((i + 1, child, edits, prefix + lower[i]))
+            if edits == max_edits:
+                continue
+            pairs = language.by_first.get(word[i], ())
+            if lower[i] != word[i]:
+                pairs = (*pairs, *language.by_first.get(lower[i], ()))
+            for ocr, intended in pairs:
+                if not (word.startswith(ocr, i) or lower.startswith(ocr, i)):
+                    continue
+                target = node
+                for ch in intended:
+                    target = target.get(ch)
+                    if target is None:
+                        break
+                else:
+                    stack.append((i + len(ocr), target, edits + 1, prefix + intended))
+        return found
+
+
+def match_case(source: str, word: str) -> str:
+    """word in the capitalisation of source (lower, Capitalised or UPPER)."""
+    if len(source) > 1 and source.isupper():
+        return word.upper()
+    if source[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+class ConfusionCorrector:
+    """Corrects rare words to frequent lexicon words reachable by confusions.
+
+    A word is left alone when it is shorter than min_length or the lexicon has
+    it at least min_count times. Otherwise the most frequent candidate (fewest
+    confusions on ties) replaces it if it occurs at least min_count times and
+    `ratio` times as often as the word.
+    """
+
+    def __init__(self, lexicon: Lexicon, language: Language, max_edits: int = 2,
+                 ratio: float = 5.0, min_count: int = 2, min_length: int = 3):
+        self.lexicon = lexicon
+        self.language = language
+        self.max_edits = max_edits
+        self.ratio = ratio
+        self.min_count = min_count
+        self.min_length = min_length
+        self.cache = {}
+        self.counts = Counter()
+
+    def decide(self, word: str) -> str:
+        """The corrected form of one word (cached per surface form)."""
+        decided = self.cache.get(word)
+        if decided is not None:
+            return decided
+        decided = word
+        own = self.lexicon.count(word.lower())
+        if own < self.min_count and len(word) >= self.min_length:
+            best = None
+            for candidate, edits in self.lexicon.candidates(word, self.language, self.max_edits).items():
+                key = (self.lexicon.count(candidate), -edits, candidate)
+                if best is None or key > best:
+                    best = key
+            if best is not None and best[0] >= self.min_count and best[0] >= self.ratio * max(own, 1):
+                decided = match_case(word, best[2])
+        self.cache[word] = decided
+        return decided
+
+    def correct_text(self, text: str) -> str:
+        def replace(m):
+            word = m.group()
+            fixed = self.decide(word)
+            if fixed != word:
+                self.counts[f'{word} -> {fixed}'] += 1
+            return fixed
+        return self.language.word.sub(replace, text)
+
+
+def iter_processed_paragraphs(path: str):
+    """Paragraph texts from a processed chapter directory (or one JSON/text file)."""
+    if os.path.isfile(path) and not path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from f
+        return
+    for filepath in chapter_files(path):
+        for p in iter_paragraphs(filepath):
+            yield p.text
+
+
+def main(argv):
+    args = positionals(argv, ('--ratio', '--min-count'))
+    if len(args) < 2 or args[0] not in LANGUAGES:
+        print(f"usage: lexicon.py <{'|'.join(LANGUAGES)}> <processed dir|file> [--ratio R] [--min-count N]")
+        return 1
+    language = LANGUAGES[args[0]]
+    options = {}
+    for flag, cast in (('--ratio', float), ('--min-count', int)):
+        value = option(argv, flag, cast)
+        if value is not None:
+            options[flag[2:].replace('-', '_')] = value
+
+    paragraphs = list(iter_processed_paragraphs(args[1]))
+    lexicon = Lexicon.from_texts(paragraphs, language)
+    corrector = ConfusionCorrector(lexicon, language, **options)
+    for p in paragraphs:
+        corrector.correct_text(p)
+
+    print(f"{language.code}: {len(paragraphs)} paragraphs, {lexicon.size} lexicon words")
+    for correction, n in corrector.counts.most_common():
+        print(f"  {n:5d}  {correction}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
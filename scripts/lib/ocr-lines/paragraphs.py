@@ -0,0 +1,142 @@
+"""
+Paragraph-boundary scoring for OCR'd texts.
+
+OCR output often has no blank lines between paragraphs, so a break has to be
+guessed from the lines around it. Each text line is turned into a small
+feature vector in one pass:
+
+    length       characters in the (stripped) line
+    width        length relative to the median width of the recent lines,
+                 i.e. roughly the printed page's measure
+    terminal     ends with sentence-terminal punctuation
+    capital      starts with a capital letter of the text's script
+    dialogue     starts with a dialogue dash
+
+A ParagraphModel weighs the previous line's features against the current
+line's and breaks when the score reaches its threshold. Blank lines always
+end a paragraph, so a model with no weights just splits on blank lines.
+
+Usage from a process-*.py script:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+    from paragraphs import iter_paragraphs
+    from profiles import MAI_VE_SIYAH_PARAGRAPHS
+
+    for paragraph in iter_paragraphs(lines, MAI_VE_SIYAH_PARAGRAPHS):
+        ...
+"""
+
+import bisect
+import re
+from collections import deque, namedtuple
+
+LineFeatures = namedtuple('LineFeatures', 'length width terminal capital dialogue')
+
+
+class ParagraphModel:
+    """Boundary scoring for one text.
+
+    capital:   regex matched at the start of a line that opens a sentence
+    terminal:  endings (str or tuple) that close a sentence
+    dialogue:  regex matched at the start of a dialogue line, or None
+    weights:   {feature: weight}; features are 'dialogue', 'capital' (of the
+               current line), 'terminal' and 'short' (of the previous line,
+               short meaning narrower than short_width of the page measure)
+    threshold: score at which a new paragraph starts
+    min_line, min_chars: scored breaks need a current line longer than
+               min_line and a paragraph so far longer than min_chars
+    window:    number of recent lines the page measure is taken over
+    """
+
+    def __init__(self, name, capital=r'[A-Z]', terminal=('.', '!', '?'), dialogue=None,
+                 weights=None, threshold=1.0, short_width=0.75, min_line=0, min_chars=0,
+                 window=40):
+        self.name = name
+        self.capital = re.compile(capital)
+        self.terminal = terminal if isinstance(terminal, str) else tuple(terminal)
+        self.dialogue = re.compile(dialogue) if dialogue else None
+        self.weights = dict(weights or {})
+        self.threshold = threshold
+        self.short_width = short_width
+        self.min_line = min_line
+        self.min_chars = min_chars
+        self.window = window
+
+    def features(self, text: str, width: float) -> LineFeatures:
+        """Feature vector of a stripped, non-empty line; width is its page ratio."""
+        return LineFeatures(
+            len(text), width, text.endswith(self.terminal),
+            self.capital.match(text) is not None,
+            self.dialogue is not None and self.dialogue.match(text) is not None,
+        )
+
+    def score(self, prev: LineFeatures, cur: LineFeatures) -> float:
+        w = self.weights
+        score = 0.0
+        if cur.dialogue:
+            score += w.get('dialogue', 0.0)
+        if cur.capital:
+            score += w.get('capital', 0.0)
+        if prev.terminal:
+            score += w.get('terminal', 0.0)
+        if prev.width < self.short_width:
+            score += w.get('short', 0.0)
+        return score
+
+    def breaks(self, prev: LineFeatures, cur: LineFeatures, para_chars: int) -> bool:
+        """Whether cur starts a new paragraph after prev."""
+        if cur.length <= self.min_line or para_chars <= self.min_chars:
+            return False
+        return self.score(prev, cur) >= self.threshold
+
+
+class PageWidth:
+    """Running median of the last `window` line lengths."""
+
+    def __init__(self, window: int):
+        self.recent = deque()
+        self.ordered = []
+        self.window = window
+
+    def ratio(self, length: int) -> float:
+        """length relative to the current median, then record it."""
+        ordered = self.ordered
+        ratio = length / ordered[len(ordered) // 2] if ordered else 1.0
+        if len(self.recent) == self.window:
+            del ordered[bisect.bisect_left(ordered, self.recent.popleft())]
+        self.recent.append(length)
+        bisect.insort(ordered, length)
+        return ratio
+
+
+def iter_paragraphs(lines, model: ParagraphModel):
+    """Yield paragraphs (lines joined with ' ') from any iterable of lines.
+
+    Lines are stripped; blank lines end the current paragraph.
+    """
+    width = PageWidth(model.window)
+    current = []
+    para_chars = 0
+    prev = None
+    for line in lines:
+        text = line.strip()
+        if not text:
+            if current:
+                yield ' '.join(current)
+                current = []
+                para_chars = 0
+            continue
+        cur = model.features(text, width.ratio(len(text)))
+        if current and model.breaks(prev, cur, para_chars):
+            yield ' '.join(current)
+            current = []
+            para_chars = 0
+        current.append(text)
+        para_chars += cur.length
+        prev = cur
+    if current:
+        yield ' '.join(current)
+
+
+# Blank-line delimited paragraphs only.
+BLANK_LINES = ParagraphModel('blank-lines')
@@ -0,0 +1,121 @@
+"""
+In-memory post-stages for processed chapters.
+
+Fixes that used to be separate scripts re-reading and rewriting every chapter
+JSON (fix-*.py) are declared as PostStages instead and run on each chapter's
+paragraphs right after a processor builds them, before the file is written.
+A stage is an ordered list of rules -- literal replacements, regex
+substitutions, or report-only markers that change nothing -- optionally
+restricted to some chapters or paragraph indices. Every rule counts its hits.
+
+Usage from a process-*.py script:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+    from poststages import PostStage, PostStages, literal, pattern, report
+
+    POST_STAGES = PostStages()
+    POST_STAGES.register(PostStage('rn-to-m', [literal('Cernil', 'Cemil')]))
+
+    paragraphs = POST_STAGES.apply(chapter_num, paragraphs)
+    POST_STAGES.print_summary()
+"""
+
+import re
+from collections import Counter
+
+
+class Rule:
+    """One rewrite (or report-only check) inside a stage."""
+    __slots__ = ('name', 'old', 'new', 'regex', 'paragraphs', 'report')
+
+    def __init__(self, name, old, new='', regex=None, paragraphs=None, report=False):
+        self.name = name
+        self.old = old
+        self.new = new
+        self.regex = regex
+        self.paragraphs = set(paragraphs) if paragraphs is not None else None
+        self.report = report
+
+    def apply(self, text: str):
+        """(new text, hit count)."""
+        if self.regex is not None:
+            return self.regex.subn(self.new, text)
+        n = text.count(self.old)
+        if n and not self.report:
+            text = text.replace(self.old, self.new)
+        return text, n
+
+
+def literal(old, new, name=None, paragraphs=None):
+    """Replace every occurrence of old with new."""
+    return Rule(name or old, old, new, paragraphs=paragraphs)
+
+
+def pattern(regex, repl, name=None, paragraphs=None):
+    """re.sub(regex, repl, text)."""
+    compiled = re.compile(regex) if isinstance(regex, str) else regex
+    return Rule(name or compiled.pattern, compiled.pattern, repl, regex=compiled, paragraphs=paragraphs)
+
+
+def report(needle, name=None):
+    """Count occurrences of needle (a literal) without changing the text."""
+    return Rule(name or needle, needle, report=True)
+
+
+class PostStage:
+    """A named, ordered list of rules; chapters limits it to those chapter numbers."""
+
+    def __init__(self, name, rules, chapters=None):
+        self.name = name
+        self.rules = list(rules)
+        self.chapters = set(chapters) if chapters is not None else None
+
+    def applies_to(self, chapter) -> bool:
+        return self.chapters is None or chapter in self.chapters
+
+
+class PostStages:
+    """Registered post-stages, run in registration order, with hit counts."""
+
+    def __init__(self):
+        self.stages = []
+        self.hits = Counter()              # (stage, rule) -> hits
+        self.paragraphs_changed = Counter()  # stage -> paragraphs changed
+        self.reported = []                 # (stage, rule, chapter, paragraph index)
+
+    def register(self, stage: PostStage) -> PostStage:
+        self.stages.append(stage)
+        return stage
+
+    def apply(self, chapter, paragraphs: list) -> list:
+        """Run every stage over one chapter's paragraphs."""
+        stages = [s for s in self.stages if s.applies_to(chapter)]
+        if not stages:
+            return paragraphs
+        out = []
+        for i, text in enumerate(paragraphs):
+            for stage in stages:
+                before = text
+                for rule in stage.rules:
+                    if rule.paragraphs is not None and i not in rule.paragraphs:
+                        continue
+                    text, n = rule.apply(text)
+                    if n:
+                        self.hits[stage.name, rule.name] += n
+                        if rule.report:
+                            self.reported.append((stage.name, rule.name, chapter, i))
+                if text != before:
+                    self.paragraphs_changed[stage.name] += 1
+            out.append(text)
+        return out
+
+    def print_summary(self):
+        print("\nPost-stages:")
+        for stage in self.stages:
+            print(f"  {stage.name}: {self.paragraphs_changed[stage.name]} paragraphs changed")
+            for rule in stage.rules:
+                n = self.hits[stage.name, rule.name]
+                if n:
+                    print(f"    {n:5d}  {rule.name}")
+        for stage, rule, chapter, i in self.reported:
+            print(f"  {stage}: '{rule}' in chapter {chapter} para {i}")
@@ -0,0 +1,69 @@
+"""
+Line-classification profiles, chapter specs and paragraph models for the
+single-script OCR texts.
+
+Texts with their own cleaning lib declare these there
+(scapigliatura-cleaning-v1/patterns.py, semeioseis-cleaning-v4/filters.py and
+cleaner.py).
+"""
+
+from chapters import ChapterSpec
+from classify import (
+    BLANK, FOOTNOTE, PAGE_NUMBER, SECTION_BREAK, STAMP, Profile, rule,
+)
+from paragraphs import ParagraphModel
+
+# Mai ve Siyah (Turkish): page numbers are bare numbers (sometimes with a
+# trailing dot) or roman numerals; footnotes at page bottoms start with a
+# footnote digit, often OCR'd as ı/i.
+MAI_VE_SIYAH = Profile('mai-ve-siyah', [
+    rule(PAGE_NUMBER, r'\d{1,3}\s*\.?\s*$'),
+    rule(PAGE_NUMBER, r'[IVXLCivxlc]+\s*$'),
+    rule(SECTION_BREAK, r'\*\*\*\s*$'),
+    # "ı Korist, koro şarkıcısı.", "2 İki şair."
+    rule(FOOTNOTE, r'[ıi12]\s+[A-ZÇĞİÖŞÜa-zçğıöşü]', max_len=79),
+    rule(FOOTNOTE, r'\d\s+(Bu konuda|Eskiyazı|Eskiden|bkz)'),
+])
+
+# Syair Siti Zubaidah (Malay): the library stamp on the first pages, page
+# numbers including OCR-garbled ones ("S4", "J27", "i48", "30)", "f8f"), and
+# lone bullets.
+SYAIR_SITI_ZUBAIDAH = Profile('syair-siti-zubaidah', [
+    rule(STAMP, r'PERPU>TAK', search=True),
+    rule(STAMP, r'PUS\s*~\s*T\s*rE', search=True),
+    rule(STAMP, r'PE\s*j\s*,Ff', search=True),
+    rule(STAMP, r'OEP\s*~TE', search=True),
+    rule(STAMP, r'DAN\s+KEBU[DO]AYAAN', search=True),
+    rule(PAGE_NUMBER, r'\d{1,3}\s*$'),
+    rule(PAGE_NUMBER, r'[IVX]{1,4}\s*$'),
+    # Short line with a digit and no run of 3+ letters
+    rule(PAGE_NUMBER, r'(?=.*\d)(?!.*[a-zA-Z]{3})', max_len=5),
+    rule(PAGE_NUMBER, r'ISS$'),
+    rule(BLANK, r'•$'),
+])
+
+PROFILES = {p.name: p for p in (MAI_VE_SIYAH, SYAIR_SITI_ZUBAIDAH)}
+
+# Chapter markers are standalone numbers with NO trailing space (page numbers
+# have one). The chapter 9 marker is missing from the OCR; the chapter starts
+# at this line (placed by content analysis).
+MAI_VE_SIYAH_CHAPTERS = ChapterSpec(
+    'mai-ve-siyah', heading=r'(?P<num>\d{1,2})$', first=1, last=20,
+    anchors={9: r'hakkında bir taze şevk uyandırmıştı'},
+)
+
+# No chapter headings; the poem runs from its first stanza to its last line,
+# between the editor's introduction and the back matter.
+SYAIR_SITI_ZUBAIDAH_CHAPTERS = ChapterSpec(
+    'syair-siti-zubaidah',
+    anchors={'start': r'Orang Fabian naik berperi', 'end': r'Muatap dan tangis'},
+)
+
+CHAPTER_SPECS = {s.name: s for s in (MAI_VE_SIYAH_CHAPTERS, SYAIR_SITI_ZUBAIDAH_CHAPTERS)}
+
+# The OCR has no blank lines between paragraphs: a dialogue line always starts
+# one, and so does a capitalised line after a sentence end.
+MAI_VE_SIYAH_PARAGRAPHS = ParagraphModel(
+    'mai-ve-siyah', capital=r'[A-ZÇĞİÖŞÜ]', terminal=('.', '!', '?', '…'), dialogue=r'-',
+    weights={'dialogue': 1.0, 'terminal': 0.5, 'capital': 0.5},
+)
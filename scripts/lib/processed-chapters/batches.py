@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Pack a processed text's paragraphs into translation requests near a token budget.
+
+Paragraph sizes vary wildly across the corpus (whole juan in ouyangxiu-ji,
+four-line quatrains in syair), so requests are built here rather than by each
+processor. Consecutive paragraphs of a chapter are packed until the next one
+would exceed the budget; a paragraph that is over budget on its own is split
+at sentence ends (and, failing that, at spaces) into pieces that fit.
+
+Token counts are estimated per Unicode script (see unicode_scripts.py): a Han
+character costs about a token, polytonic Greek about two characters per
+token, Latin-script prose about four. Batches never cross chapters.
+
+The manifest records, for every batch, the parts it holds as
+(paragraph index, character span), so results can be mapped back:
+
+    {"text": ..., "budget": ..., "batches": [
+        {"id": 0, "chapter": "chapter-001.json", "tokens": 1480,
+         "parts": [{"paragraph": 0, "start": 0, "end": 812, "tokens": 610}, ...]}]}
+
+A paragraph split into pieces appears as consecutive parts with the same
+paragraph index, possibly spread over several batches. merge_results() joins
+per-part outputs back into one string per paragraph.
+
+    python3 scripts/lib/processed-chapters/batches.py <text> [--budget 1500] [--overhead 8]
+                                                      [--out manifest.json] [--with-text]
+"""
+
+import json
+import math
+import os
+import re
+import sys
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, chapter_files, read_chapter
+from unicode_scripts import script_counts
+
+DEFAULT_BUDGET = 1500
+DEFAULT_OVERHEAD = 8
+
+# Characters per token, by script. Rough figures for BPE tokenizers; Common
+# (spaces, digits, punctuation) mostly merges into neighbouring words.
+CHARS_PER_TOKEN = {
+    'Latin': 4.0,
+    'Common': 4.0,
+    'Greek': 2.0,
+    'Cyrillic': 2.5,
+    'Armenian': 1.5,
+    'Georgian': 1.5,
+    'Hebrew': 2.0,
+    'Arabic': 2.5,
+    'Devanagari': 1.5,
+    'Tamil': 1.2,
+    'Telugu': 1.2,
+    'Han': 0.8,
+    'Hiragana': 1.0,
+    'Katakana': 1.0,
+    'Hangul': 1.0,
+    'Inherited': 1.0,
+}
+OTHER_CHARS_PER_TOKEN = 1.5
+
+# Split after a sentence end: Latin/Greek/Armenian/Devanagari marks followed
+# by a space, or CJK full-width marks (which take no space).
+SENTENCE_END = re.compile(r'(?<=[.!?;·;։।॥])\s+|(?<=[。！？；])(?![。！？；」』”])|(?<=[。！？][」』”])')
+SPACE = re.compile(r'\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated token count of a string."""
+    total = 0.0
+    for script, n in script_counts(text).items():
+        total += n / CHARS_PER_TOKEN.get(script, OTHER_CHARS_PER_TOKEN)
+    return math.ceil(total)
+
+
+def _spans(text: str, pattern, start: int, end: int):
+    """Split text[start:end] after each match; the spans cover it exactly."""
+    spans = []
+    for m in pattern.finditer(text, start, end):
+        if m.end() > start and m.end() < end:
+            spans.append((start, m.end()))
+            start = m.end()
+    spans.append((start, end))
+    return spans
+
+
+def _hard_spans(text: str, start: int, end: int, budget: int):
+    """Cut text[start:end] into character windows that fit the budget."""
+    spans = []
+    while start < end:
+        lo, hi = start + 1, end
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if estimate_tokens(text[start:mid]) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        spans.append((start, lo))
+        start = lo
+    return spans
+
+
+def split_paragraph(text: str, budget: int):
+    """(start, end, tokens) pieces of text, each within budget where possible.
+
+    Pieces are packed sentence by sentence; a sentence over budget is cut at
+    spaces, and a run without spaces (unpunctuated CJK) by character count.
+    Joining text[start:end] over the pieces gives back the paragraph.
+    """
+    units = []
+    for s, e in _spans(text, SENTENCE_END, 0, len(text)):
+        if estimate_tokens(text[s:e]) <= budget:
+            units.append((s, e))
+            continue
+        for ws, we in _spans(text, SPACE, s, e):
+            if estimate_tokens(text[ws:we]) <= budget:
+                units.append((ws, we))
+            else:
+                units.extend(_hard_spans(text, ws, we, budget))
+
+    pieces = []
+    start = end = None
+    for s, e in units:
+        if start is not None and estimate_tokens(text[start:e]) > budget:
+            pieces.append((start, end, estimate_tokens(text[start:end])))
+            start = None
+        if start is None:
+            start = s
+        end = e
+    if start is not None:
+        pieces.append((start, end, estimate_tokens(text[start:end])))
+    return pieces
+
+
+def plan_chapter(chapter, budget: int = DEFAULT_BUDGET, overhead: int = DEFAULT_OVERHEAD):
+    """Batches for one chapter, as lists of part dicts (without ids).
+
+    overhead is added per part for the markers a request puts between them.
+    """
+    batches = []
+    parts = []
+    used = 0
+    for p in chapter.paragraphs:
+        if not p.text.strip():
+            continue
+        tokens = estimate_tokens(p.text)
+        if tokens + overhead <= budget:
+            pieces = [(0, len(p.text), tokens)]
+        else:
+            pieces = split_paragraph(p.text, budget - overhead)
+        for start, end, tokens in pieces:
+            if parts and used + tokens + overhead > budget:
+                batches.append(parts)
+                parts, used = [], 0
+            parts.append({'paragraph': p.index, 'start': start, 'end': end, 'tokens': tokens})
+            used += tokens + overhead
+    if parts:
+        batches.append(parts)
+    return batches
+
+
+def build_manifest(text: str, processed_dir=PROCESSED_DIR, budget: int = DEFAULT_BUDGET,
+                   overhead: int = DEFAULT_OVERHEAD, with_text: bool = False) -> dict:
+    """The batch manifest for every chapter of a processed text."""
+    root = os.path.join(processed_dir, text)
+    batches = []
+    for path in chapter_files(root):
+        chapter = read_chapter(path)
+        rel = os.path.relpath(path, root).replace(os.sep, '/')
+        for parts in plan_chapter(chapter, budget, overhead):
+            if with_text:
+                for part in parts:
+                    part['text'] = chapter.paragraphs[part['paragraph']].text[part['start']:part['end']]
+            batches.append({
+                'id': len(batches),
+                'chapter': rel,
+                'number': chapter.number,
+                'tokens': sum(part['tokens'] + overhead for part in parts),
+                'parts': parts,
+            })
+    return {'text': text, 'budget': budget, 'overhead': overhead, 'batches': batches}
+
+
+def batch_texts(manifest: dict, batch: dict, processed_dir=PROCESSED_DIR):
+    """The source strings of a batch's parts, read from the chapter file."""
+    if all('text' in part for part in batch['parts']):
+        return [part['text'] for part in batch['parts']]
+    chapter = read_chapter(os.path.join(processed_dir, manifest['text'], batch['chapter']))
+    return [chapter.paragraphs[part['paragraph']].text[part['start']:part['end']]
+            for part in batch['parts']]
+
+
+def merge_results(manifest: dict, results: dict, sep: str = ' ') -> dict:
+    """Map per-batch outputs back to paragraphs.
+
+    results maps a batch id to the list of outputs for its parts, in order.
+    Returns {chapter: {paragraph index: text}}, pieces of a split paragraph
+    joined with sep. Paragraphs of missing batches are left out.
+    """
+    merged = {}
+    for batch in manifest['batches']:
+        outputs = results.get(batch['id'], results.get(str(batch['id'])))
+        if outputs is None:
+            continue
+        if len(outputs) != len(batch['parts']):
+            raise ValueError(f"batch {batch['id']}: {len(outputs)} outputs for {len(batch['parts'])} parts")
+        paragraphs = merged.setdefault(batch['chapter'], {})
+        for part, output in zip(batch['parts'], outputs):
+            i = part['paragraph']
+            paragraphs[i] = paragraphs[i] + sep + output if i in paragraphs else output
+    return merged
+
+
+def summarize(manifest: dict) -> str:
+    batches = manifest['batches']
+    if not batches:
+        return f"{manifest['text']}: no paragraphs"
+    tokens = sorted(b['tokens'] for b in batches)
+    parts = sum(len(b['parts']) for b in batches)
+    split = len({(b['chapter'], p['paragraph']) for b in batches for p in b['parts'] if p['start'] > 0})
+    over = sum(1 for t in tokens if t > manifest['budget'])
+    return (f"{manifest['text']}: {len(batches)} batches, {parts} parts, {split} paragraphs split; "
+            f"tokens min {tokens[0]}, median {tokens[len(tokens) // 2]}, max {tokens[-1]} "
+            f"(budget {manifest['budget']}, {over} over)")
+
+
+def main(argv):
+    args = positionals(argv, ('--budget', '--overhead', '--out'))
+    if not args:
+        print(__doc__)
+        return 1
+    text = args[0]
+    if not os.path.isdir(os.path.join(PROCESSED_DIR, text)):
+        print(f'No such text: {os.path.join(PROCESSED_DIR, text)}', file=sys.stderr)
+        return 1
+    manifest = build_manifest(text, budget=option(argv, '--budget', int, DEFAULT_BUDGET),
+                              overhead=option(argv, '--overhead', int, DEFAULT_OVERHEAD),
+                              with_text='--with-text' in argv)
+    print(summarize(manifest))
+    out = option(argv, '--out')
+    if out is not None:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        print(f'Wrote {out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
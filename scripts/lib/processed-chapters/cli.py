@@ -0,0 +1,41 @@
+"""
+Command-line options for the processed-chapters tools.
+
+Each tool's main(argv) gets argv without the program name and reads it
+through these two helpers, so every tool accepts both "--flag V" and
+"--flag=V" and never looks at sys.argv behind its caller's back:
+
+    args = positionals(argv[1:], VALUED)           # skip flags and their values
+    jobs = option(argv, '--jobs', int, os.cpu_count() or 1)
+    show = '--show' in argv                        # plain switches stay as they are
+"""
+
+
+def option(argv, flag: str, cast=str, default=None):
+    """The value of "--flag V" or "--flag=V" in argv, cast; default if absent.
+
+    A flag given as the last argument, with no value after it, counts as
+    absent.
+    """
+    prefix = flag + '='
+    for i, arg in enumerate(argv):
+        if arg.startswith(prefix):
+            return cast(arg[len(prefix):])
+        if arg == flag and i + 1 < len(argv):
+            return cast(argv[i + 1])
+    return default
+
+
+def positionals(argv, valued=()) -> list:
+    """The arguments of argv that are neither flags nor the value following one
+    of the flags in valued (written "--flag V"; "--flag=V" is one argument)."""
+    args = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg.startswith('--'):
+            skip = arg in valued
+        else:
+            args.append(arg)
+    return args
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Canonical reader for processed chapter JSON (data/processed/<text>/chapter-NNN.json).
+
+Processors have written chapters in several shapes over the years:
+
+    {"chapterNumber", "title", "sourceContent": {"paragraphs": [{"index", "text"}]}}
+        most texts; indices start at 0 or at 1
+    {"chapterNumber", "title", "sourceContent": {"paragraphs": [str]}}
+    {"title", "paragraphs": [str]}                      mai-ve-siyah, yesou-puyan, ...
+    {"title", "genre", "subCollection", "paragraphs": [{"index", "text"}]}
+        ouyangxiu-ji
+
+read_chapter() turns any of them into one Chapter of Paragraphs, so evaluators
+and post-processors no longer need their own json.load() plus
+.get('sourceContent', {}).get('paragraphs', []). Paragraph.index is always the
+0-based position in the chapter; Chapter keeps what it needs (the stored index
+base, the paragraph and top-level keys and their order) to write the file back
+in its own shape with to_dict().
+
+Files are read with a small streaming parser: the document's top level is
+walked key by key and each element of a paragraphs array is decoded on its
+own, so iter_paragraphs() never holds more than one paragraph of a chapter in
+memory. Anything odd found while normalizing (a missing text, a gap in the
+stored indices) is recorded in Chapter.issues instead of raising.
+
+Usage:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'processed-chapters'))
+    from corpus import iter_chapters, read_chapter
+
+    for chapter in iter_chapters('data/processed/semeioseis-gnomikai'):
+        for p in chapter.paragraphs:
+            ... chapter.number, p.index, p.text
+
+Validate every processed chapter (in parallel):
+
+    python3 scripts/lib/processed-chapters/corpus.py data/processed --jobs 8
+    python3 scripts/lib/processed-chapters/corpus.py data/processed/mai-ve-siyah --show
+"""
+
+import io
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+
+PROCESSED_DIR = 'data/processed'
+
+_FILE_NUMBER_RE = re.compile(r'chapter-(\d+)')
+_WS_RE = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL_RE = re.compile(r'[0-9.eE+-]*\Z')
+_DECODER = json.JSONDecoder()
+_CHUNK = 1 << 16
+
+
+class Paragraph:
+    """One paragraph: its 0-based position in the chapter and its text."""
+    __slots__ = ('index', 'text')
+
+    def __init__(self, index: int, text: str):
+        self.index = index
+        self.text = text
+
+    def __repr__(self):
+        return f'Paragraph({self.index}, {self.text[:40]!r})'
+
+
+class Chapter:
+    """A processed chapter, whatever shape its file had.
+
+    number:     chapterNumber, or the number in the file name when there is none
+    title:      the title, '' when missing
+    paragraphs: list of Paragraph
+    extra:      other top-level keys (genre, subCollection, ...), in file order;
+                unknown keys inside sourceContent appear as 'sourceContent.<key>'
+    layout:     top-level keys in file order ('sourceContent' or 'paragraphs'
+                tells where the paragraphs were stored)
+    base:       first stored paragraph index (0 or 1), None for bare strings
+    item_keys:  keys of the paragraph objects in file order, () for bare strings
+    issues:     problems found while normalizing, as short strings
+    """
+    __slots__ = ('number', 'title', 'paragraphs', 'extra', 'layout', 'base', 'item_keys', 'path',
+                 'issues')
+
+    def __init__(self, path=None):
+        self.path = path
+        self.number = file_number(path) if path else None
+        self.title = ''
+        self.paragraphs = []
+        self.extra = {}
+        self.layout = []
+        self.base = None
+        self.item_keys = ('index', 'text')
+        self.issues = []
+
+    def __repr__(self):
+        return f'Chapter({self.number}, {self.title[:40]!r}, {len(self.paragraphs)} paragraphs)'
+
+    def texts(self) -> list:
+        return [p.text for p in self.paragraphs]
+
+    def to_dict(self) -> dict:
+        """The chapter in the shape its file was read from (paragraphs renumbered)."""
+        if not self.item_keys:
+            paragraphs = [p.text for p in self.paragraphs]
+        else:
+            base = self.base or 0
+            paragraphs = [{k: p.index + base if k == 'index' else p.text for k in self.item_keys}
+                          for p in self.paragraphs]
+        nested = {k.split('.', 1)[1]: v for k, v in self.extra.items() if k.startswith('sourceContent.')}
+        data = {}
+        for key in self.layout or ['chapterNumber', 'title', 'sourceContent']:
+            if key == 'chapterNumber':
+                data[key] = self.number
+            elif key == 'title':
+                data[key] = self.title
+            elif key == 'sourceContent':
+                data[key] = {'paragraphs': paragraphs, **nested}
+            elif key == 'paragraphs':
+                data[key] = paragraphs
+            else:
+                data[key] = self.extra[key]
+        return data
+
+
+def file_number(path) -> int:
+    """The chapter number in a file name like chapter-012.json, or None."""
+    m = _FILE_NUMBER_RE.search(os.path.basename(path))
+    return int(m.group(1)) if m else None
+
+
+# --- Streaming JSON ---------------------------------------------------------
+
+class _Stream:
+    """A text file read in chunks, decoded one JSON value at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        chunk = self.f.read(max(_CHUNK, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character ('' at the end of the file)."""
+        while True:
+            self.pos = _WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"expected one of {chars!r}, found {c or 'end of file'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decode the next complete value, reading more of the file as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._more():
+                    raise
+                continue
+            # A number followed by nothing but number characters up to the end
+            # of the buffer ("2." of "2.5", "1e" of "1e5") may continue.
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and _NUMBER_TAIL_RE.match(self.buf, end) and self._more()):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_events(f):
+    """Walk a chapter document, yielding (event, path, value).
+
+    'value': a complete member, path being its keys, e.g. ('title',)
+    'array': a paragraphs array starts (value is None)
+    'item':  one element of that array
+
+    Only the top-level object and sourceContent are walked key by key; every
+    other value is decoded whole. A document that is not an object is yielded
+    as one 'value' with path ().
+    """
+    stream = _Stream(f)
+    if stream.peek() != '{':
+        yield 'value', (), stream.value()
+    else:
+        yield from _walk_object(stream, ())
+    if stream.peek():
+        raise ValueError('extra data after the document')
+
+
+def _walk_object(stream, path):
+    stream.expect('{')
+    if stream.peek() == '}':
+        stream.pos += 1
+        return
+    while True:
+        key = stream.value()
+        if not isinstance(key, str):
+            raise ValueError(f'object key expected at {path}')
+        stream.expect(':')
+        c = stream.peek()
+        member = path + (key,)
+        if c == '{' and member == ('sourceContent',):
+            yield from _walk_object(stream, member)
+        elif c == '[' and key == 'paragraphs':
+            yield 'array', member, None
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    yield 'item', member, stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            yield 'value', member, stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+# --- Normalization ----------------------------------------------------------
+
+def _normalize(chapter: Chapter, f):
+    """Fill chapter's fields from f's events, yielding its Paragraphs as they arrive."""
+    position = 0
+    shape = None        # str or dict, from the first paragraph
+    numbered = True     # stored indices consecutive so far
+    for event, path, value in iter_events(f):
+        if not path:
+            chapter.issues.append(f'document is a {type(value).__name__}, not an object')
+            return
+        if path[0] not in chapter.layout:
+            chapter.layout.append(path[0])
+        if event == 'item':
+            stored = None
+            if isinstance(value, str):
+                text = value
+            elif isinstance(value, dict):
+                text, stored = value.get('text'), value.get('index')
+                if position == 0:
+                    chapter.item_keys = tuple(k for k in value if k in ('index', 'text'))
+                unknown = value.keys() - {'index', 'text'}
+                if unknown:
+                    chapter.issues.append(f'paragraph {position}: unknown keys {sorted(unknown)}')
+                if not isinstance(text, str):
+                    chapter.issues.append(f'paragraph {position}: text is {type(text).__name__}')
+                    text = '' if text is None else str(text)
+            else:
+                chapter.issues.append(f'paragraph {position}: {type(value).__name__} instead of text')
+                text = '' if value is None else str(value)
+            if position == 0:
+                shape = type(value)
+                if shape is str:
+                    chapter.item_keys = ()
+                elif shape is dict and 'index' not in value:
+                    numbered = False
+                elif shape is dict:
+                    chapter.base = stored if stored in (0, 1) else 0
+                    if stored not in (0, 1):
+                        chapter.issues.append(f'paragraph indices start at {stored}')
+                        numbered = False
+            elif type(value) is not shape and shape in (str, dict) and type(value) in (str, dict):
+                chapter.issues.append(f'paragraph {position}: mixes strings and objects')
+                shape = None
+            elif numbered and shape is dict and stored != chapter.base + position:
+                chapter.issues.append(f'paragraph {position}: index {stored}, expected {chapter.base + position}')
+                numbered = False
+            yield Paragraph(position, text)
+            position += 1
+        elif event == 'array':
+            if path == ('paragraphs',) and 'sourceContent' in chapter.layout:
+                chapter.issues.append('paragraphs both at the top level and in sourceContent')
+        elif path == ('chapterNumber',):
+            if not isinstance(value, int) or isinstance(value, bool):
+                chapter.issues.append(f'chapterNumber is {value!r}')
+            chapter.number = value
+        elif path == ('title',):
+            if not isinstance(value, str):
+                chapter.issues.append(f'title is {type(value).__name__}')
+            chapter.title = value if isinstance(value, str) else ''
+        elif path == ('sourceContent',):
+            chapter.issues.append(f'sourceContent is {type(value).__name__}')
+        else:
+            chapter.extra['.'.join(path)] = value
+    if 'paragraphs' not in chapter.layout and 'sourceContent' not in chapter.layout:
+        chapter.issues.append('no paragraphs')
+
+
+def read_chapter(path) -> Chapter:
+    """Read and normalize one chapter file."""
+    chapter = Chapter(str(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        chapter.paragraphs = list(_normalize(chapter, f))
+    return chapter
+
+
+def loads_chapter(data: str, path=None) -> Chapter:
+    """Normalize a chapter document already in memory; path only names it."""
+    chapter = Chapter(str(path) if path else None)
+    chapter.paragraphs = list(_normalize(chapter, io.StringIO(data)))
+    return chapter
+
+
+def iter_paragraphs(path, chapter: Chapter = None):
+    """Stream one chapter's Paragraphs without keeping them.
+
+    Pass a Chapter to have its metadata filled in as the file is read; its
+    paragraphs list stays empty.
+    """
+    chapter = chapter if chapter is not None else Chapter(str(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _normalize(chapter, f)
+
+
+def chapter_files(path) -> list:
+    """chapter-*.json files under path (a file, a text's directory or data/processed)."""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, n) for n in sorted(names)
+                     if n.startswith('chapter-') and n.endswith('.json'))
+    return files
+
+
+def iter_chapters(path):
+    """Chapters under path, in file name order."""
+    for filepath in chapter_files(path):
+        yield read_chapter(filepath)
+
+
+# --- Validation -------------------------------------------------------------
+
+def validate_chapter(chapter: Chapter) -> list:
+    """Normalization issues plus content checks for one chapter."""
+    issues = list(chapter.issues)
+    if not chapter.title:
+        issues.append('no title')
+    if chapter.number is None:
+        issues.append('no chapter number')
+    if not chapter.paragraphs and 'no paragraphs' not in issues:
+        issues.append('empty chapter')
+    blank = sum(1 for p in chapter.paragraphs if not p.text.strip())
+    if blank:
+        issues.append(f'{blank} blank paragraphs')
+    return issues
+
+
+def validate_file(path):
+    """(path, paragraph count, issues) for one file; unreadable JSON is an issue too."""
+    try:
+        chapter = read_chapter(path)
+    except (ValueError, UnicodeDecodeError) as e:
+        return path, 0, [f'unreadable: {e}']
+    return path, len(chapter.paragraphs), validate_chapter(chapter)
+
+
+def validate_all(paths, jobs: int = 1):
+    """validate_file() over every chapter file under paths, in file order."""
+    files = [f for p in paths for f in chapter_files(p)]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(validate_file, files, chunksize=64)
+    else:
+        yield from map(validate_file, files)
+
+
+def issue_kind(issue: str) -> str:
+    """An issue without its paragraph number and values, for counting."""
+    return re.sub(r'\d+', 'N', re.sub(r'(is|at|found) .*', r'\1 ...', issue))
+
+
+def main(argv):
+    paths = positionals(argv, ('--jobs',)) or [PROCESSED_DIR]
+    jobs = option(argv, '--jobs', int, os.cpu_count() or 1)
+    show = '--show' in argv
+
+    files = paragraphs = 0
+    kinds = Counter()
+    texts = Counter()
+    for path, n, issues in validate_all(paths, jobs):
+        files += 1
+        paragraphs += n
+        for issue in issues:
+            kinds[issue_kind(issue)] += 1
+            texts[os.path.basename(os.path.dirname(path))] += 1
+            if show:
+                print(f'  {path}: {issue}')
+
+    print(f'{files} chapter files, {paragraphs} paragraphs, {sum(kinds.values())} issues')
+    for kind, n in kinds.most_common():
+        print(f'  {n:6d}  {kind}')
+    if texts:
+        print('By text:')
+        for text, n in texts.most_common():
+            print(f'  {n:6d}  {text}')
+    return 1 if kinds else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Corpus-wide paragraph index for duplicate and leak detection.
+
+Every paragraph in data/processed gets:
+
+    exact hash  blake2b of the text reduced to case-folded NFKC letters and
+                digits, so OCR spacing and punctuation differences still match
+    signature   a one-permutation MinHash of its character 5-gram shingles:
+                each shingle is hashed (crc32) once, the hash range is split
+                into BINS bins and the signature keeps the smallest hash in
+                each bin. The share of equal non-empty bins estimates the
+                Jaccard similarity of two paragraphs' shingle sets.
+
+The signature is cut into BANDS bands of ROWS bins; a paragraph is put in one
+LSH bucket per band (and one more for its exact hash), so near-duplicates
+share at least one bucket with high probability while unrelated paragraphs
+almost never do. Character shingles work the same for Classical Chinese (no
+spaces) and for Greek, Latin or Turkish.
+
+The index is one file, data/packed/paragraphs.idx: a header, the file names,
+one fixed-width record per paragraph (file, paragraph, length, exact hash,
+signature) and the bucket table sorted by key, all read in place from a
+memory map. Finding a paragraph's duplicates is a binary search per band plus
+a signature comparison per candidate.
+
+    python3 scripts/lib/processed-chapters/duplicates.py build [--jobs N]
+    python3 scripts/lib/processed-chapters/duplicates.py query semeioseis-gnomikai 110 0
+    python3 scripts/lib/processed-chapters/duplicates.py report [--threshold 0.8] [--min-chars 40] [--show 5]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, chapter_files, file_number, read_chapter
+from store import PACKED_DIR, text_dirs
+
+INDEX_PATH = os.path.join(PACKED_DIR, 'paragraphs.idx')
+
+SHINGLE = 5
+BINS = 32
+ROWS = 4
+BANDS = BINS // ROWS
+MIN_CHARS = 20          # shorter paragraphs get an exact hash only
+EMPTY = 0xFFFFFFFF
+EXACT_BAND = 0xFF
+
+MAGIC = b'PIDX'
+VERSION = 1
+# magic, version, shingle, bins, rows, paragraphs, names offset, names length,
+# records offset, buckets offset, bucket count
+HEADER = struct.Struct('<4sIIIIIQIQQQ')
+RECORD = struct.Struct(f'<III8s{BINS}I')     # file id, paragraph, length, exact, signature
+BUCKET = struct.Struct('<QI')                # key, row
+_KEY = struct.Struct('<Q')
+
+_NON_WORD_RE = re.compile(r'[\W_]+')
+_BIN_SHIFT = 32 - (BINS - 1).bit_length()
+_BIN_BOUNDS = [b << _BIN_SHIFT for b in range(1, BINS + 1)]
+
+
+def normalize(text: str) -> str:
+    """Case-folded NFKC letters and digits only."""
+    return _NON_WORD_RE.sub('', unicodedata.normalize('NFKC', text).casefold())
+
+
+def exact_hash(norm: str) -> bytes:
+    return hashlib.blake2b(norm.encode('utf-8'), digest_size=8).digest()
+
+
+def signature(norm: str) -> tuple:
+    """One-permutation MinHash of norm's shingles; EMPTY for bins nothing hashed into."""
+    n = len(norm) - SHINGLE + 1
+    if n < 1:
+        return (EMPTY,) * BINS
+    shingles = map(norm.__getitem__, map(slice, range(n), range(SHINGLE, n + SHINGLE)))
+    hashes = sorted(set(map(zlib.crc32, map(str.encode, shingles))))
+    sig = []
+    lo = 0
+    for bound in _BIN_BOUNDS:
+        hi = bisect_left(hashes, bound, lo)
+        sig.append(hashes[lo] if hi > lo else EMPTY)
+        lo = hi
+    return tuple(sig)
+
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    both = same = 0
+    for x, y in zip(a, b):
+        if x != EMPTY or y != EMPTY:
+            both += 1
+            same += x == y
+    return same / both if both else 0.0
+
+
+def band_keys(sig) -> list:
+    """Bucket keys of a signature's bands (bands with no hashed bin are skipped)."""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        if all(v == EMPTY for v in rows):
+            continue
+        digest = hashlib.blake2b(struct.pack(f'<{ROWS}I', *rows), digest_size=7).digest()
+        keys.append(band << 56 | int.from_bytes(digest, 'little'))
+    return keys
+
+
+def exact_key(exact: bytes) -> int:
+    return EXACT_BAND << 56 | int.from_bytes(exact[:7], 'little')
+
+
+# --- Building ---------------------------------------------------------------
+
+def _index_text(text: str, processed_dir=PROCESSED_DIR):
+    """[(file name, [(length, exact, signature) per paragraph])] for one text."""
+    directory = os.path.join(processed_dir, text)
+    files = []
+    for filepath in chapter_files(directory):
+        if os.path.dirname(filepath) != directory:
+            continue
+        entries = []
+        for p in read_chapter(filepath).paragraphs:
+            norm = normalize(p.text)
+            sig = signature(norm) if len(norm) >= MIN_CHARS else (EMPTY,) * BINS
+            entries.append((len(norm), exact_hash(norm), sig))
+        files.append((os.path.basename(filepath), entries))
+    return files
+
+
+def build_index(processed_dir=PROCESSED_DIR, path=INDEX_PATH, jobs: int = 1) -> int:
+    """Index every paragraph under processed_dir; returns the paragraph count."""
+    texts = text_dirs(processed_dir)
+    names = {'texts': texts, 'files': []}
+    records = []
+    buckets = []
+    dirs = [processed_dir] * len(texts)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            indexed = list(pool.map(_index_text, texts, dirs))
+    else:
+        indexed = list(map(_index_text, texts, dirs))
+    for text_id, files in enumerate(indexed):
+        for filename, entries in files:
+            file_id = len(names['files'])
+            names['files'].append([text_id, filename, len(records)])
+            for i, (length, exact, sig) in enumerate(entries):
+                row = len(records)
+                records.append(RECORD.pack(file_id, i, length, exact, *sig))
+                # key << 32 | row: sorts by key, and is far smaller than a tuple
+                buckets.append(exact_key(exact) << 32 | row)
+                if length >= MIN_CHARS:
+                    buckets.extend(key << 32 | row for key in band_keys(sig))
+    buckets.sort()
+
+    names_blob = zlib.compress(json.dumps(names, ensure_ascii=False).encode('utf-8'))
+    names_offset = HEADER.size
+    records_offset = names_offset + len(names_blob)
+    buckets_offset = records_offset + RECORD.size * len(records)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SHINGLE, BINS, ROWS, len(records), names_offset,
+                            len(names_blob), records_offset, buckets_offset, len(buckets)))
+        f.write(names_blob)
+        f.write(b''.join(records))
+        f.write(b''.join(BUCKET.pack(v >> 32, v & 0xFFFFFFFF) for v in buckets))
+    os.replace(tmp, path)
+    return len(records)
+
+
+# --- Querying ---------------------------------------------------------------
+
+class ParagraphIndex:
+    """The on-disk index, memory-mapped.
+
+    Paragraphs are addressed by row; locate() and row() convert between rows
+    and (text, chapter file, paragraph index).
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, shingle, bins, rows, self.count, names_offset, names_length,
+         self.records_offset, self.buckets_offset, self.bucket_count) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or (shingle, bins, rows) != (SHINGLE, BINS, ROWS):
+            self.mm.close()
+            raise ValueError(f'{path}: built with other settings; rebuild the index')
+        names = json.loads(zlib.decompress(self.mm[names_offset:names_offset + names_length]))
+        self.texts = names['texts']
+        self.files = names['files']
+        self.first_rows = [first for _, _, first in self.files]
+        self.file_ids = {}
+        for i, (t, name, _) in enumerate(self.files):
+            self.file_ids[self.texts[t], name] = i
+            self.file_ids.setdefault((self.texts[t], file_number(name)), i)
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, row: int):
+        """(file id, paragraph, length, exact hash, signature) of a row."""
+        values = RECORD.unpack_from(self.mm, self.records_offset + row * RECORD.size)
+        return values[0], values[1], values[2], values[3], values[4:]
+
+    def locate(self, row: int) -> tuple:
+        """(text, chapter file, paragraph index) of a row."""
+        file_id, paragraph = RECORD.unpack_from(self.mm, self.records_offset + row * RECORD.size)[:2]
+        text_id, filename, _ = self.files[file_id]
+        return self.texts[text_id], filename, paragraph
+
+    def row(self, text: str, chapter, paragraph: int) -> int:
+        """Row of a paragraph; chapter is a file name or the number in one."""
+        if isinstance(chapter, str) and not chapter.endswith('.json'):
+            chapter += '.json'
+        file_id = self.file_ids[text, chapter]
+        first = self.first_rows[file_id]
+        end = self.first_rows[file_id + 1] if file_id + 1 < len(self.files) else self.count
+        if not 0 <= paragraph < end - first:
+            raise IndexError(f'{text} {chapter}: no paragraph {paragraph}')
+        return first + paragraph
+
+    def _bucket(self, key: int) -> list:
+        """Rows in the bucket with this key (binary search over the sorted table)."""
+        lo, hi = 0, self.bucket_count
+        base, size = self.buckets_offset, BUCKET.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(self.mm, base + mid * size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        rows = []
+        while lo < self.bucket_count:
+            k, row = BUCKET.unpack_from(self.mm, base + lo * size)
+            if k != key:
+                break
+            rows.append(row)
+            lo += 1
+        return rows
+
+    def matches(self, length: int, exact: bytes, sig, threshold: float = 0.8, skip=None) -> list:
+        """[(row, similarity)] of indexed paragraphs duplicating the given one, best first.
+
+        Exact-hash matches have similarity 1.0.
+        """
+        found = {row: 1.0 for row in self._bucket(exact_key(exact))
+                 if self.record(row)[3] == exact}
+        if length >= MIN_CHARS:
+            for key in band_keys(sig):
+                for row in self._bucket(key):
+                    if row in found:
+                        continue
+                    score = similarity(sig, self.record(row)[4])
+                    if score >= threshold:
+                        found[row] = score
+        found.pop(skip, None)
+        return sorted(found.items(), key=lambda item: (-item[1], item[0]))
+
+    def duplicates(self, row: int, threshold: float = 0.8) -> list:
+        """[(row, similarity)] of the paragraphs duplicating an indexed one."""
+        _, _, length, exact, sig = self.record(row)
+        return self.matches(length, exact, sig, threshold, skip=row)
+
+    def search(self, text: str, threshold: float = 0.8) -> list:
+        """[(row, similarity)] of indexed paragraphs duplicating any text."""
+        norm = normalize(text)
+        sig = signature(norm) if len(norm) >= MIN_CHARS else (EMPTY,) * BINS
+        return self.matches(len(norm), exact_hash(norm), sig, threshold)
+
+    def iter_buckets(self):
+        """(key, [rows]) for every bucket with more than one row."""
+        key, rows = None, []
+        for i in range(self.bucket_count):
+            k, row = BUCKET.unpack_from(self.mm, self.buckets_offset + i * BUCKET.size)
+            if k != key:
+                if len(rows) > 1:
+                    yield key, rows
+                key, rows = k, []
+            rows.append(row)
+        if len(rows) > 1:
+            yield key, rows
+
+
+# --- Report -----------------------------------------------------------------
+
+def duplicate_clusters(index: ParagraphIndex, threshold: float = 0.8, min_chars: int = 40,
+                       all_pairs: int = 16) -> list:
+    """Groups of rows that duplicate each other, largest first.
+
+    Buckets of up to all_pairs rows are compared pairwise; larger ones (mostly
+    boilerplate) are compared against their first row only.
+    """
+    parent = {}
+
+    def find(r):
+        root = r
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while r != root:
+            parent[r], r = root, parent[r]
+        return root
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent.setdefault(ra, ra)
+            parent.setdefault(rb, rb)
+            parent[max(ra, rb)] = min(ra, rb)
+
+    records = {}
+
+    def record(row):
+        rec = records.get(row)
+        if rec is None:
+            rec = records[row] = index.record(row)
+        return rec
+
+    for key, rows in index.iter_buckets():
+        rows = [r for r in rows if record(r)[2] >= min_chars]
+        if len(rows) < 2:
+            continue
+        if key >> 56 == EXACT_BAND:
+            by_hash = defaultdict(list)
+            for r in rows:
+                by_hash[record(r)[3]].append(r)
+            for same in by_hash.values():
+                for r in same[1:]:
+                    union(same[0], r)
+            continue
+        pairs = ((a, b) for i, a in enumerate(rows) for b in rows[i + 1:]) if len(rows) <= all_pairs \
+            else ((rows[0], b) for b in rows[1:])
+        for a, b in pairs:
+            if find(a) != find(b) and similarity(record(a)[4], record(b)[4]) >= threshold:
+                union(a, b)
+
+    groups = defaultdict(list)
+    for row in parent:
+        groups[find(row)].append(row)
+    return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g[0]))
+
+
+def report(index: ParagraphIndex, clusters: list, show: int = 5):
+    intra = Counter()
+    cross = Counter()
+    intra_examples = defaultdict(list)
+    cross_examples = defaultdict(list)
+    for group in clusters:
+        places = [index.locate(r) for r in group]
+        texts = sorted({text for text, _, _ in places})
+        if len(texts) == 1:
+            intra[texts[0]] += len(group)
+            intra_examples[texts[0]].append(places)
+        else:
+            for i, a in enumerate(texts):
+                for b in texts[i + 1:]:
+                    cross[a, b] += sum(1 for text, _, _ in places if text in (a, b))
+                    cross_examples[a, b].append(places)
+
+    def where(places):
+        return ', '.join(f'{t}/{f}#{p}' for t, f, p in places[:4]) + (' ...' if len(places) > 4 else '')
+
+    print(f'{len(clusters)} duplicate groups, {sum(len(g) for g in clusters)} paragraphs')
+    print(f'\nWithin one text ({len(intra)} texts):')
+    for text, n in intra.most_common():
+        print(f'  {n:6d}  {text}')
+        for places in intra_examples[text][:show]:
+            print(f'            {where(places)}')
+    print(f'\nAcross texts ({len(cross)} pairs):')
+    for (a, b), n in cross.most_common():
+        print(f'  {n:6d}  {a} <-> {b}')
+        for places in cross_examples[a, b][:show]:
+            print(f'            {where(places)}')
+
+
+def main(argv):
+    command = argv[0] if argv else ''
+    args = positionals(argv[1:], ('--threshold', '--jobs', '--min-chars', '--show'))
+    threshold = option(argv, '--threshold', float, 0.8)
+
+    if command == 'build':
+        count = build_index(jobs=option(argv, '--jobs', int, os.cpu_count() or 1))
+        print(f'{count} paragraphs indexed into {INDEX_PATH}')
+        return 0
+
+    if command == 'query' and len(args) == 3:
+        with ParagraphIndex() as index:
+            chapter = int(args[1]) if args[1].isdigit() else args[1]
+            for row, score in index.duplicates(index.row(args[0], chapter, int(args[2])), threshold):
+                text, filename, paragraph = index.locate(row)
+                print(f'  {score:.2f}  {text}/{filename}#{paragraph}')
+        return 0
+
+    if command == 'report':
+        with ParagraphIndex() as index:
+            clusters = duplicate_clusters(index, threshold, option(argv, '--min-chars', int, 40))
+            report(index, clusters, option(argv, '--show', int, 5))
+        return 0
+
+    print('usage: duplicates.py build [--jobs N]\n'
+          '       duplicates.py query <text> <chapter> <paragraph> [--threshold T]\n'
+          '       duplicates.py report [--threshold T] [--min-chars N] [--show N]')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
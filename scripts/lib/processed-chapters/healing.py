@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Heal paragraphs that OCR page or column breaks split mid-sentence.
+
+A paragraph is folded into the one before it when the earlier one is left
+open and the later one reads as its continuation. What counts as open or as a
+continuation depends on the language, so the tests are a HealRules:
+
+    terminal      characters that end a sentence; None when every paragraph
+                  ends one, so only hyphenated words are joined
+    closers       closing quotes and brackets skipped before looking for one
+    lowercase     predicate on the next paragraph's first character, or None
+                  for scripts without case
+    hyphens       (suffix, needs lowercase) pairs: a paragraph ending in suffix
+                  is a word broken across the split and is joined to the next
+                  without the suffix or a space, always or only when the next
+                  starts lowercase
+    dangling      endings (a bare '-' in the Greek OCR) after which the next
+                  paragraph is merged, with a space, whatever it starts with
+    continuation  first words that continue a sentence (Greek καὶ, δὲ, ...)
+    apparatus     prefixes of critical-apparatus text that belongs to the
+                  previous paragraph
+    short         an open paragraph followed by one shorter than this is
+                  merged (0 turns the test off)
+    section       regex for a paragraph that starts a new section and is
+                  never merged
+
+GREEK is the rule set epitome heal_paragraphs.py has always applied and
+ALPHABETIC (Latin, Armenian, Cyrillic, ...) covers the rest of the corpus,
+chosen per text from its dominant script unless TEXT_RULES names one. VERSE is
+for texts whose paragraphs are verses or stanzas, which neither end in
+punctuation nor start in capitals; only words hyphenated across a break are
+joined.
+
+CJK texts (UNHEALED_SCRIPTS) are not healed. They have no case and no
+hyphenation, and a paragraph left open is a title, a recorder's name
+(zhuziyulei), a line of verse or a classic's sentence set apart from its
+commentary (shuijing-zhu) far more often than an OCR break: even the pairs
+whose first paragraph ends mid-clause in ，、 are nearly all such structure.
+
+heal() makes one streaming pass over a chapter's paragraph texts. Over whole
+texts, in parallel, with a per-text report of merges by reason:
+
+    python3 scripts/lib/processed-chapters/healing.py [text ...] [--jobs N]
+                                                      [--rules greek] [--show] [--write]
+
+Without --write nothing is changed; with it, healed chapters are written back
+(through writer.py, so untouched chapters keep their mtime).
+"""
+
+import fnmatch
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, Paragraph, chapter_files, read_chapter
+from unicode_scripts import dominant_script, script_of
+from writer import write_json
+
+CLOSERS = '"\'»”’)]}」』）'
+
+
+def lowercase_in(script: str):
+    """Predicate: ch is a lowercase letter (category Ll) of script."""
+    return lambda ch: unicodedata.category(ch) == 'Ll' and script_of(ch) == script
+
+
+def any_lowercase(ch: str) -> bool:
+    return ch.islower()
+
+
+class HealRules:
+    """Continuation tests for one language or script (see the module docstring)."""
+
+    def __init__(self, name, terminal, closers=CLOSERS, lowercase=any_lowercase, hyphens=(),
+                 dangling=(), continuation=(), apparatus=(), short=0, section=r'\d+[\.,]'):
+        self.name = name
+        self.terminal = frozenset(terminal) if terminal is not None else None
+        self.closers = closers
+        self.lowercase = lowercase
+        self.hyphens = tuple(hyphens)
+        self.dangling = tuple(dangling)
+        self.continuation = frozenset(continuation)
+        self.apparatus = tuple(apparatus)
+        self.short = short
+        self.section = re.compile(section) if section else None
+
+    def is_open(self, text: str) -> bool:
+        """text (right-stripped) does not end a sentence."""
+        if self.terminal is None:
+            return False
+        end = text.rstrip(self.closers) if self.closers else text
+        return not end or end[-1] not in self.terminal
+
+    def join(self, prev: str, curr: str):
+        """(reason, characters to drop from prev, separator) when curr
+        continues prev, else None.
+
+        prev is right-stripped and curr stripped, both non-empty.
+        """
+        if self.section is not None and self.section.match(curr):
+            return None
+        lower = self.lowercase is not None and self.lowercase(curr[0])
+        for suffix, needs_lower in self.hyphens:
+            if prev.endswith(suffix) and (lower or not needs_lower):
+                return 'hyphen', len(suffix), ''
+        if not self.is_open(prev):
+            return None
+        if lower:
+            reason = 'lowercase'
+        elif self.short and len(curr) < self.short:
+            reason = 'short'
+        elif curr.startswith(self.apparatus):
+            reason = 'apparatus'
+        elif self.dangling and prev.endswith(self.dangling):
+            reason = 'dangling'
+        elif self.continuation and curr.split(None, 1)[0].rstrip(',') in self.continuation:
+            reason = 'continuation'
+        else:
+            return None
+        return reason, 0, ' '
+
+
+GREEK = HealRules(
+    'greek',
+    terminal='.;·',
+    closers='',
+    lowercase=lowercase_in('Greek'),
+    dangling=('-',),
+    continuation=('καὶ', 'δὲ', 'τε', 'γὰρ', 'ἀλλὰ', 'ἀλλ᾽', 'οὐδὲ'),
+    apparatus=('Wolfius', 'Syncellus', 'cangii', 'codices', 'codex', 'nap!', 'losephus', 'Ducangii'),
+    short=50,
+)
+ALPHABETIC = HealRules(
+    'alphabetic',
+    terminal='.!?…:;։',
+    hyphens=(('¬', False), ('-', True)),
+)
+VERSE = HealRules(
+    'verse',
+    terminal=None,
+    hyphens=(('¬', False), ('-', True)),
+)
+RULES = {rules.name: rules for rules in (GREEK, ALPHABETIC, VERSE)}
+SCRIPT_RULES = {'Greek': GREEK}
+UNHEALED_SCRIPTS = frozenset({'Han', 'Hiragana', 'Katakana', 'Hangul'})
+# Texts (fnmatch patterns) whose rules are not the ones their script picks.
+TEXT_RULES = {
+    'carmina-*': 'verse',
+    'catomyomachia': 'verse',
+    'eis-tin-tou-biou-anisotita': 'verse',
+    'gregory-carmina': 'verse',
+    'ptochoprodromos': 'verse',
+    'syair-*': 'verse',
+}
+
+
+def rules_for(text: str, sample: str = ''):
+    """The rules for a text: TEXT_RULES, else by the dominant script of sample;
+    None for a text in one of UNHEALED_SCRIPTS."""
+    for pattern, name in TEXT_RULES.items():
+        if fnmatch.fnmatchcase(text, pattern):
+            return RULES[name]
+    script = dominant_script(sample)
+    if script in UNHEALED_SCRIPTS:
+        return None
+    return SCRIPT_RULES.get(script, ALPHABETIC)
+
+
+def heal(texts, rules: HealRules):
+    """Yield (text, merged) for each healed paragraph, in one pass.
+
+    merged lists (source index, reason) for every later paragraph folded into
+    this one; the paragraph itself is the first source index not listed.
+    Blank paragraphs are passed through and never merged.
+    """
+    pending = None
+    merged = []
+    for i, text in enumerate(texts):
+        curr = text.strip()
+        if pending is not None and curr and pending.strip():
+            prev = pending.rstrip()
+            joined = rules.join(prev, curr)
+            if joined is not None:
+                reason, cut, sep = joined
+                pending = prev[:len(prev) - cut] + sep + text.lstrip()
+                merged.append((i, reason))
+                continue
+        if pending is not None:
+            yield pending, merged
+        pending, merged = text, []
+    if pending is not None:
+        yield pending, merged
+
+
+def heal_chapter(chapter, rules: HealRules) -> Counter:
+    """Heal chapter.paragraphs in place; returns merges by reason."""
+    reasons = Counter()
+    healed = []
+    for text, merged in heal(chapter.texts(), rules):
+        healed.append(Paragraph(len(healed), text))
+        reasons.update(reason for _, reason in merged)
+    chapter.paragraphs = healed
+    return reasons
+
+
+def _heal_file(job):
+    """(path, paragraphs before, after, merges by reason) for one chapter file."""
+    path, rules_name, write = job
+    chapter = read_chapter(path)
+    before = len(chapter.paragraphs)
+    reasons = heal_chapter(chapter, RULES[rules_name])
+    if write and reasons:
+        write_json(path, chapter.to_dict())
+    return path, before, len(chapter.paragraphs), reasons
+
+
+def heal_texts(texts, processed_dir=PROCESSED_DIR, jobs: int = 1, rules: str = None, write: bool = False):
+    """Heal every chapter of texts; yields (text, rules name, per-chapter results).
+
+    A text rules_for() leaves unhealed comes back with None and no results.
+    """
+    jobs_todo = []
+    for text in texts:
+        files = chapter_files(os.path.join(processed_dir, text))
+        if not files:
+            continue
+        name = rules
+        if name is None:
+            found = rules_for(text, ' '.join(read_chapter(files[0]).texts()[:50]))
+            name = found.name if found is not None else None
+        jobs_todo.append((text, name, [(f, name, write) for f in files] if name else []))
+    flat = [job for _, _, file_jobs in jobs_todo for job in file_jobs]
+    if jobs > 1 and len(flat) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = iter(pool.map(_heal_file, flat, chunksize=16))
+            for text, name, file_jobs in jobs_todo:
+                yield text, name, [next(results) for _ in file_jobs]
+    else:
+        for text, name, file_jobs in jobs_todo:
+            yield text, name, [_heal_file(job) for job in file_jobs]
+
+
+def main(argv):
+    texts = positionals(argv, ('--jobs', '--rules'))
+    if not texts:
+        texts = sorted(d for d in os.listdir(PROCESSED_DIR) if os.path.isdir(os.path.join(PROCESSED_DIR, d)))
+    rules = option(argv, '--rules')
+    if rules is not None and rules not in RULES:
+        print(f"Unknown rules {rules!r}; one of: {', '.join(RULES)}", file=sys.stderr)
+        return 1
+    write = '--write' in argv
+    show = '--show' in argv
+
+    grand = Counter()
+    for text, name, results in heal_texts(texts, jobs=option(argv, '--jobs', int, os.cpu_count() or 1),
+                                          rules=rules, write=write):
+        if name is None:
+            print(f'{text}: not healed (CJK)')
+            continue
+        reasons = Counter()
+        for _, _, _, r in results:
+            reasons.update(r)
+        before = sum(b for _, b, _, _ in results)
+        after = sum(a for _, _, a, _ in results)
+        changed = sum(1 for _, b, a, _ in results if a != b)
+        grand.update(reasons)
+        detail = ', '.join(f'{reason} {n}' for reason, n in reasons.most_common()) or '-'
+        print(f'{text} [{name}]: {before} -> {after} paragraphs in {changed}/{len(results)} chapters; {detail}')
+        if show:
+            for path, b, a, r in results:
+                if a != b:
+                    print(f'  {os.path.basename(path)}: {b} -> {a}')
+    total = sum(grand.values())
+    print(f"{total} merges{' written' if write and total else ''}: "
+          + (', '.join(f'{reason} {n}' for reason, n in grand.most_common()) or '-'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
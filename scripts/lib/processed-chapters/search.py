@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+"""
+Full-text index over the paragraphs of data/processed.
+
+Paragraphs are tokenized by script: alphabetic text into words (case-folded,
+accents stripped, so λόγος finds Λόγος and λογος), CJK runs into overlapping
+character bigrams plus the run's last character, one token per character.
+Every token's ordinal in its paragraph is kept, so a query is matched as a
+phrase: its tokens must follow each other. Punctuation and spacing are
+ignored, so "ead." matches "ead" and 子，曰 matches 子曰; a one-character CJK
+query matches every token starting with that character.
+
+The index lives in data/packed/search/ as segments plus a manifest:
+
+    seg-NNNNN.fts   header; the chapter files it covers (relative path, first
+                    document, paragraph count) as deflated JSON; a term table
+                    sorted by UTF-8 bytes, read in place from the memory map
+                    and binary-searched; and per term its postings
+    manifest.json   per chapter file its size, mtime, sha1 and the segment
+                    holding its current paragraphs
+
+A term's postings are varint-coded: document delta, occurrence count and
+ordinal deltas per document, with a skip entry every BLOCK documents so that
+checking a frequent term against a few candidate paragraphs does not decode
+all of it. build re-indexes only chapter files whose content changed, into a
+new segment that shadows their old entries; a full rebuild (--full, or once
+there are MAX_SEGMENTS segments) folds everything back into one.
+
+    python3 scripts/lib/processed-chapters/search.py build [--full] [--jobs N]
+    python3 scripts/lib/processed-chapters/search.py query "omissis" [--text T] [--n 20] [--context 60]
+    python3 scripts/lib/processed-chapters/search.py query "Καὶ ὁ λόγος" --all-words
+    python3 scripts/lib/processed-chapters/search.py show epitome-of-histories-clean/chapter-013.json#17
+    python3 scripts/lib/processed-chapters/search.py status
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, chapter_files, loads_chapter, read_chapter
+from store import PACKED_DIR
+from unicode_scripts import SCRIPT_RANGES
+
+SEARCH_DIR = os.path.join(PACKED_DIR, 'search')
+MAGIC = b'FTS1'
+VERSION = 1
+BLOCK = 128
+MAX_SEGMENTS = 8
+# magic, version, files, documents, terms, files offset, files length, table offset,
+# term bytes offset, postings offset
+HEADER = struct.Struct('<4sIIIIQIQQQ')
+TERM = struct.Struct('<IQII')    # term bytes offset, postings offset, postings length, documents
+
+CJK_SCRIPTS = ('Han', 'Hiragana', 'Katakana', 'Hangul')
+_CJK = ''.join(f'\\U{first:08x}-\\U{last:08x}' for first, last, script in SCRIPT_RANGES
+               if script in CJK_SCRIPTS)
+TOKEN_RE = re.compile(f'([{_CJK}]+)|[^\\W{_CJK}]+')
+
+
+# --- Tokens -----------------------------------------------------------------
+
+@lru_cache(maxsize=1 << 18)
+def fold(word: str) -> str:
+    """A word case-folded and without accents."""
+    if word.isascii():
+        return word.lower()
+    stripped = ''.join(c for c in unicodedata.normalize('NFD', word) if not unicodedata.combining(c))
+    return unicodedata.normalize('NFC', stripped).casefold()
+
+
+def terms(text: str) -> list:
+    """The paragraph's tokens; a token's ordinal is its position in the list."""
+    out = []
+    for m in TOKEN_RE.finditer(text):
+        run = m.group(1)
+        if run is None:
+            out.append(fold(m.group()))
+        else:
+            out.extend([run[i:i + 2] for i in range(len(run) - 1)])
+            out.append(run[-1])
+    return out
+
+
+def spans(text: str) -> list:
+    """(start, end) in text of each token ordinal; a CJK token covers its first character."""
+    out = []
+    for m in TOKEN_RE.finditer(text):
+        if m.group(1) is None:
+            out.append(m.span())
+        else:
+            out.extend((i, i + 1) for i in range(m.start(), m.end()))
+    return out
+
+
+def query_slots(query: str):
+    """([(offset, term, prefix)], ordinals spanned) for a phrase query.
+
+    A CJK run of n characters gives its n - 1 bigrams and leaves the last
+    ordinal free (the bigram before it already fixes that character); a run
+    of one character matches any token starting with it.
+    """
+    slots = []
+    offset = 0
+    for m in TOKEN_RE.finditer(query):
+        run = m.group(1)
+        if run is None:
+            slots.append((offset, fold(m.group()), False))
+            offset += 1
+        elif len(run) == 1:
+            slots.append((offset, run, True))
+            offset += 1
+        else:
+            slots.extend((offset + i, run[i:i + 2], False) for i in range(len(run) - 1))
+            offset += len(run)
+    return slots, offset
+
+
+# --- Varints ----------------------------------------------------------------
+
+def put_varint(buf: bytearray, n: int):
+    while n >= 0x80:
+        buf.append(n & 0x7F | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def get_varint(data, pos: int) -> tuple:
+    """(value, position after it)."""
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    n = b & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class _Postings:
+    """A term's postings while a segment is built."""
+    __slots__ = ('buf', 'docs', 'last', 'skips')
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.docs = 0
+        self.last = -1
+        self.skips = []
+
+    def add(self, doc: int, ordinals: list):
+        if self.docs and self.docs % BLOCK == 0:
+            self.skips.append((self.last, len(self.buf)))
+        buf = self.buf
+        put_varint(buf, doc - self.last)
+        put_varint(buf, len(ordinals))
+        prev = 0
+        for o in ordinals:
+            put_varint(buf, o - prev)
+            prev = o
+        self.last = doc
+        self.docs += 1
+
+    def serialize(self) -> bytes:
+        head = bytearray()
+        put_varint(head, len(self.skips))
+        prev_doc = prev_offset = 0
+        for doc, offset in self.skips:
+            put_varint(head, doc - prev_doc)
+            put_varint(head, offset - prev_offset)
+            prev_doc, prev_offset = doc, offset
+        return bytes(head) + bytes(self.buf)
+
+
+# --- Building ---------------------------------------------------------------
+
+def _tokenize_file(path: str):
+    """(size, mtime_ns, sha1, [{term: ordinals}] per paragraph) of a chapter file."""
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    paragraphs = []
+    for p in loads_chapter(raw.decode('utf-8'), path).paragraphs:
+        ordinals = {}
+        for ordinal, term in enumerate(terms(p.text)):
+            found = ordinals.get(term)
+            if found is None:
+                ordinals[term] = [ordinal]
+            else:
+                found.append(ordinal)
+        paragraphs.append(ordinals)
+    return st.st_size, st.st_mtime_ns, hashlib.sha1(raw).hexdigest(), paragraphs
+
+
+def write_segment(path: str, rels: list, processed_dir=PROCESSED_DIR, jobs: int = 1) -> dict:
+    """Index the chapter files rels (relative to processed_dir) into one segment.
+
+    Returns {rel: (size, mtime_ns, sha1)} of the files as they were read.
+    """
+    postings = {}
+    files = []
+    seen = {}
+    doc = 0
+    paths = [os.path.join(processed_dir, rel) for rel in rels]
+    if jobs > 1 and len(paths) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(_tokenize_file, paths, chunksize=8)
+    else:
+        pool = None
+        results = map(_tokenize_file, paths)
+    try:
+        for rel, (size, mtime_ns, sha1, paragraphs) in zip(rels, results):
+            seen[rel] = (size, mtime_ns, sha1)
+            files.append([rel, doc, len(paragraphs)])
+            for ordinals in paragraphs:
+                for term, found in ordinals.items():
+                    entry = postings.get(term)
+                    if entry is None:
+                        entry = postings[term] = _Postings()
+                    entry.add(doc, found)
+                doc += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    encoded = sorted((term.encode('utf-8'), entry) for term, entry in postings.items())
+    files_blob = zlib.compress(json.dumps(files, ensure_ascii=False).encode('utf-8'))
+    files_offset = HEADER.size
+    table_offset = files_offset + len(files_blob)
+    term_offset = table_offset + TERM.size * (len(encoded) + 1)
+    term_bytes = b''.join(term for term, _ in encoded)
+    postings_offset = term_offset + len(term_bytes)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(files), doc, len(encoded), files_offset,
+                            len(files_blob), table_offset, term_offset, postings_offset))
+        f.write(files_blob)
+        table = bytearray()
+        blobs = []
+        at = pos = 0
+        for term, entry in encoded:
+            blob = entry.serialize()
+            table += TERM.pack(at, pos, len(blob), entry.docs)
+            blobs.append(blob)
+            at += len(term)
+            pos += len(blob)
+        table += TERM.pack(at, pos, 0, 0)
+        f.write(table)
+        f.write(term_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return seen
+
+
+def load_manifest(directory=SEARCH_DIR) -> dict:
+    try:
+        with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {'version': VERSION, 'next': 0, 'files': {}}
+    if manifest.get('version') != VERSION:
+        return {'version': VERSION, 'next': manifest.get('next', 0), 'files': {}}
+    return manifest
+
+
+def build_index(processed_dir=PROCESSED_DIR, directory=SEARCH_DIR, full: bool = False, jobs: int = 1):
+    """Bring the index up to date; returns (files indexed, files unchanged, files dropped, segments)."""
+    manifest = load_manifest(directory)
+    old = manifest['files']
+    current = {os.path.relpath(p, processed_dir).replace(os.sep, '/'): p for p in chapter_files(processed_dir)}
+    files = {}
+    changed = []
+    for rel, path in current.items():
+        entry = old.get(rel)
+        st = os.stat(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            files[rel] = entry
+            continue
+        if entry:
+            with open(path, 'rb') as f:
+                if hashlib.sha1(f.read()).hexdigest() == entry[2]:
+                    files[rel] = [st.st_size, st.st_mtime_ns, entry[2], entry[3]]
+                    continue
+        changed.append(rel)
+    dropped = len(old.keys() - current.keys())
+
+    segments = {entry[3] for entry in files.values()}
+    os.makedirs(directory, exist_ok=True)
+    if changed or full:
+        if full or not files or len(segments) + 1 > MAX_SEGMENTS:
+            changed = sorted(current)
+            files = {}
+        name = f"seg-{manifest['next']:05d}.fts"
+        manifest['next'] += 1
+        for rel, (size, mtime_ns, sha1) in write_segment(os.path.join(directory, name), changed,
+                                                         processed_dir, jobs).items():
+            files[rel] = [size, mtime_ns, sha1, name]
+
+    manifest['files'] = dict(sorted(files.items()))
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+    live = {entry[3] for entry in files.values()}
+    for name in os.listdir(directory):
+        if name.endswith('.fts') and name not in live:
+            os.remove(os.path.join(directory, name))
+    return len(changed), len(files) - len(changed), dropped, len(live)
+
+
+# --- Querying ---------------------------------------------------------------
+
+class _Cursor:
+    """Forward-only reader of one term's postings."""
+
+    def __init__(self, data, skips, start: int):
+        self.data = data
+        self.skips = skips          # [(document before the block, block offset)]
+        self.start = start
+        self.pos = start
+        self.doc = -1
+        self.next_skip = 0
+
+    def __iter__(self):
+        """(document, ordinals) for every document."""
+        data, pos, doc = self.data, self.pos, self.doc
+        end = len(data)
+        while pos < end:
+            delta, pos = get_varint(data, pos)
+            count, pos = get_varint(data, pos)
+            doc += delta
+            ordinals = []
+            o = 0
+            for _ in range(count):
+                d, pos = get_varint(data, pos)
+                o += d
+                ordinals.append(o)
+            yield doc, ordinals
+
+    def seek(self, target: int):
+        """Ordinals of document target, or None; targets must not decrease."""
+        skips = self.skips
+        while self.next_skip < len(skips) and skips[self.next_skip][0] < target:
+            self.doc, offset = skips[self.next_skip]
+            self.pos = self.start + offset
+            self.next_skip += 1
+        data, pos = self.data, self.pos
+        end = len(data)
+        while pos < end:
+            delta, after = get_varint(data, pos)
+            doc = self.doc + delta
+            if doc > target:
+                return None
+            count, after = get_varint(data, after)
+            ordinals = []
+            o = 0
+            for _ in range(count):
+                d, after = get_varint(data, after)
+                o += d
+                ordinals.append(o)
+            self.doc, self.pos = doc, pos = doc, after
+            if doc == target:
+                return ordinals
+        return None
+
+
+class Segment:
+    """One memory-mapped segment file."""
+
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, nfiles, self.docs, self.terms, files_offset, files_length,
+         self.table_offset, self.term_offset, self.postings_offset) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f'{path}: not a version {VERSION} search segment; rebuild with --full')
+        self.files = json.loads(zlib.decompress(self.mm[files_offset:files_offset + files_length]))
+        self.first_docs = [first for _, first, _ in self.files]
+
+    def close(self):
+        self.mm.close()
+
+    def _entry(self, i: int) -> tuple:
+        return TERM.unpack_from(self.mm, self.table_offset + i * TERM.size)
+
+    def _term(self, i: int) -> bytes:
+        start = self._entry(i)[0]
+        end = self._entry(i + 1)[0]
+        return self.mm[self.term_offset + start:self.term_offset + end]
+
+    def _bisect(self, key: bytes) -> int:
+        lo, hi = 0, self.terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, term: str):
+        """Index of term in the term table, or None."""
+        key = term.encode('utf-8')
+        i = self._bisect(key)
+        return i if i < self.terms and self._term(i) == key else None
+
+    def prefixed(self, prefix: str) -> range:
+        """Indexes of the terms starting with prefix."""
+        key = prefix.encode('utf-8')
+        return range(self._bisect(key), self._bisect(key + b'\xff'))
+
+    def doc_count(self, i: int) -> int:
+        return self._entry(i)[3]
+
+    def cursor(self, i: int) -> _Cursor:
+        _, offset, length, _ = self._entry(i)
+        start = self.postings_offset + offset
+        data = self.mm[start:start + length]
+        n, pos = get_varint(data, 0)
+        skips = []
+        doc = off = 0
+        for _ in range(n):
+            d, pos = get_varint(data, pos)
+            o, pos = get_varint(data, pos)
+            doc += d
+            off += o
+            skips.append((doc, off))
+        return _Cursor(data, skips, pos)
+
+    def postings(self, ids) -> dict:
+        """{document: sorted ordinals} over the union of terms ids."""
+        merged = {}
+        for i in ids:
+            for doc, ordinals in self.cursor(i):
+                merged.setdefault(doc, []).extend(ordinals)
+        for ordinals in merged.values():
+            ordinals.sort()
+        return merged
+
+    def locate(self, doc: int) -> tuple:
+        """(chapter file, paragraph index) of a document."""
+        k = bisect_right(self.first_docs, doc) - 1
+        return self.files[k][0], doc - self.files[k][1]
+
+    def search(self, slots: list, phrase: bool = True):
+        """Yield (document, first ordinal) of each match; first ordinal is None
+        for word-set matches."""
+        by_term = {}
+        for offset, term, prefix in slots:
+            by_term.setdefault((term, prefix), []).append(offset)
+        groups = []
+        for (term, prefix), offsets in by_term.items():
+            if prefix:
+                ids = list(self.prefixed(term))
+            else:
+                i = self.lookup(term)
+                ids = [] if i is None else [i]
+            if not ids:
+                return
+            groups.append((sum(self.doc_count(i) for i in ids), ids, offsets))
+        groups.sort(key=lambda g: g[0])
+
+        # Candidates from the rarest term, narrowed by each of the others.
+        _, ids, offsets = groups[0]
+        candidates = {}
+        for doc, ordinals in self.postings(ids).items():
+            if not phrase:
+                candidates[doc] = None
+                continue
+            # The term may fill several offsets of the phrase; a start must fill them all.
+            present = set(ordinals)
+            starts = {s for s in (o - off for o in ordinals for off in offsets)
+                      if all(s + off in present for off in offsets)}
+            if starts:
+                candidates[doc] = starts
+        for _, ids, offsets in groups[1:]:
+            if not candidates:
+                return
+            if len(ids) == 1:
+                cursor = self.cursor(ids[0])
+                found = {}
+                for doc in sorted(candidates):
+                    ordinals = cursor.seek(doc)
+                    if ordinals is not None:
+                        found[doc] = ordinals
+            else:
+                found = self.postings(ids)
+            narrowed = {}
+            for doc, starts in candidates.items():
+                ordinals = found.get(doc)
+                if ordinals is None:
+                    continue
+                if phrase:
+                    present = set(ordinals)
+                    starts = {s for s in starts if all(s + off in present for off in offsets)}
+                    if not starts:
+                        continue
+                narrowed[doc] = starts
+            candidates = narrowed
+        for doc in sorted(candidates):
+            starts = candidates[doc]
+            yield doc, (min(starts) if phrase else None)
+
+
+class Hit:
+    """A matching paragraph: chapter file (relative to data/processed), paragraph
+    index and, for phrase matches, the first match's token ordinals."""
+    __slots__ = ('file', 'paragraph', 'start', 'length')
+
+    def __init__(self, file, paragraph, start, length):
+        self.file = file
+        self.paragraph = paragraph
+        self.start = start
+        self.length = length
+
+    def __repr__(self):
+        return f'Hit({self.file!r}, {self.paragraph})'
+
+
+class SearchIndex:
+    """The segments named by the manifest; a chapter file's hits come only
+    from the segment that indexed its current content."""
+
+    def __init__(self, directory=SEARCH_DIR, processed_dir=PROCESSED_DIR):
+        self.processed_dir = processed_dir
+        self.manifest = load_manifest(directory)
+        self.owner = {rel: entry[3] for rel, entry in self.manifest['files'].items()}
+        names = sorted(set(self.owner.values()))
+        self.segments = [Segment(os.path.join(directory, name)) for name in names]
+        self._chapters = {}
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, query: str, text: str = None, phrase: bool = True, limit: int = None) -> list:
+        """Hits for query in file order; text restricts them to one text."""
+        slots, length = query_slots(query)
+        if not slots:
+            return []
+        hits = []
+        for segment in self.segments:
+            for doc, start in segment.search(slots, phrase):
+                rel, paragraph = segment.locate(doc)
+                if self.owner.get(rel) != segment.name:
+                    continue
+                if text is not None and rel.split('/', 1)[0] != text:
+                    continue
+                hits.append(Hit(rel, paragraph, start, length))
+        hits.sort(key=lambda h: (h.file, h.paragraph))
+        return hits[:limit] if limit is not None else hits
+
+    def paragraph_text(self, hit: Hit) -> str:
+        chapter = self._chapters.get(hit.file)
+        if chapter is None:
+            chapter = self._chapters[hit.file] = read_chapter(os.path.join(self.processed_dir, hit.file))
+        return chapter.paragraphs[hit.paragraph].text
+
+    def context(self, hit: Hit, width: int = 60) -> str:
+        """The hit in its paragraph, with up to width characters either side."""
+        text = self.paragraph_text(hit)
+        if hit.start is None:
+            return text[:2 * width].replace('\n', ' ')
+        token_spans = spans(text)
+        if hit.start + hit.length > len(token_spans):
+            return text[:2 * width].replace('\n', ' ')   # file changed since it was indexed
+        start = token_spans[hit.start][0]
+        end = token_spans[hit.start + hit.length - 1][1]
+        before = text[max(0, start - width):start]
+        after = text[end:end + width]
+        return (('…' if start > width else '') + before + '[' + text[start:end] + ']' + after
+                + ('…' if end + width < len(text) else '')).replace('\n', ' ')
+
+
+def stale_files(processed_dir=PROCESSED_DIR, directory=SEARCH_DIR) -> tuple:
+    """(changed or new, removed) chapter files since the index was built, by size and mtime."""
+    files = load_manifest(directory)['files']
+    current = {os.path.relpath(p, processed_dir).replace(os.sep, '/'): p for p in chapter_files(processed_dir)}
+    changed = []
+    for rel, path in current.items():
+        entry = files.get(rel)
+        st = os.stat(path)
+        if not entry or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+            changed.append(rel)
+    return changed, sorted(files.keys() - current.keys())
+
+
+def main(argv):
+    command = argv[0] if argv else ''
+    args = positionals(argv[1:], ('--jobs', '--text', '--n', '--context'))
+
+    if command == 'build':
+        indexed, unchanged, dropped, segments = build_index(
+            full='--full' in argv, jobs=option(argv, '--jobs', int, os.cpu_count() or 1))
+        print(f'{SEARCH_DIR}: {indexed} chapter files indexed, {unchanged} unchanged, '
+              f'{dropped} dropped; {segments} segments')
+        return 0
+
+    if command == 'status':
+        manifest = load_manifest()
+        changed, removed = stale_files()
+        segments = sorted({entry[3] for entry in manifest['files'].values()})
+        print(f"{len(manifest['files'])} chapter files in {len(segments)} segments; "
+              f'{len(changed)} changed or new and {len(removed)} removed since the last build')
+        return 0
+
+    if command == 'query' and args:
+        if not load_manifest()['files']:
+            print(f'No index yet; run: python3 {sys.argv[0]} build')
+            return 1
+        n = option(argv, '--n', int, 20)
+        width = option(argv, '--context', int, 60)
+        with SearchIndex() as index:
+            hits = index.search(' '.join(args), text=option(argv, '--text'),
+                                phrase='--all-words' not in argv)
+            for hit in hits[:n]:
+                print(f'  {hit.file}#{hit.paragraph}: {index.context(hit, width)}')
+        print(f'{len(hits)} paragraphs')
+        return 0
+
+    if command == 'show' and args:
+        for ref in args:
+            rel, _, paragraph = ref.rpartition('#')
+            chapter = read_chapter(os.path.join(PROCESSED_DIR, rel))
+            print(f'{ref}:\n{chapter.paragraphs[int(paragraph)].text}\n')
+        return 0
+
+    print('usage: search.py build [--full] [--jobs N]\n'
+          '       search.py query <words> [--text T] [--n N] [--context N] [--all-words]\n'
+          '       search.py show <chapter file>#<paragraph> ...\n'
+          '       search.py status')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Incremental per-chapter statistics for data/processed.
+
+build walks data/processed once and stores, for every chapter file:
+
+    paragraphs, chars      counts
+    scripts                characters per Unicode script (see unicode_scripts.py)
+    lengths                paragraph length histogram; bin b counts paragraphs of
+                           2**(b-1) .. 2**b - 1 characters, bin 0 empty ones
+    empty, oversized       blank paragraphs and ones over OVERSIZED characters
+    longest                the longest paragraph's length
+    issues                 normalization issues read_chapter() recorded
+
+in data/packed/stats.json, with the file's size, mtime and sha1. Later builds
+re-read only files whose size or mtime changed, and recompute only those whose
+sha1 changed too. The other commands answer from the stored aggregates
+without opening a chapter:
+
+    python3 scripts/lib/processed-chapters/stats.py build [--jobs N] [--force]
+    python3 scripts/lib/processed-chapters/stats.py show [text ...]
+    python3 scripts/lib/processed-chapters/stats.py top oversized [--n 20] [--text T]
+    python3 scripts/lib/processed-chapters/stats.py ratio Greek --below 0.9 [--text T]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, chapter_files, loads_chapter
+from store import PACKED_DIR
+from unicode_scripts import script_counts
+
+STATS_PATH = os.path.join(PACKED_DIR, 'stats.json')
+VERSION = 1
+OVERSIZED = 5000
+FIELDS = ('paragraphs', 'chars', 'empty', 'oversized', 'longest', 'issues')
+NEUTRAL_SCRIPTS = ('Common', 'Inherited')
+
+
+def chapter_stats(chapter) -> dict:
+    chars = Counter()
+    lengths = []
+    empty = oversized = longest = 0
+    for p in chapter.paragraphs:
+        chars.update(p.text)
+        n = len(p.text)
+        b = n.bit_length()
+        if b >= len(lengths):
+            lengths.extend([0] * (b + 1 - len(lengths)))
+        lengths[b] += 1
+        if not p.text.strip():
+            empty += 1
+        if n > OVERSIZED:
+            oversized += 1
+        longest = max(longest, n)
+    return {
+        'number': chapter.number,
+        'paragraphs': len(chapter.paragraphs),
+        'chars': sum(chars.values()),
+        'scripts': dict(script_counts(chars).most_common()),
+        'lengths': lengths,
+        'empty': empty,
+        'oversized': oversized,
+        'longest': longest,
+        'issues': len(chapter.issues),
+    }
+
+
+def _file_stats(job):
+    """(path, size, mtime_ns, sha1, stats or None when the sha1 is unchanged)."""
+    path, old_sha1 = job
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    sha1 = hashlib.sha1(raw).hexdigest()
+    if sha1 == old_sha1:
+        return path, st.st_size, st.st_mtime_ns, sha1, None
+    return path, st.st_size, st.st_mtime_ns, sha1, chapter_stats(loads_chapter(raw.decode('utf-8'), path))
+
+
+def load_stats(path=STATS_PATH) -> dict:
+    """The stored stats, {'version', 'oversized', 'files': {relative path: entry}}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {'version': VERSION, 'oversized': OVERSIZED, 'files': {}}
+    if data.get('version') != VERSION or data.get('oversized') != OVERSIZED:
+        return {'version': VERSION, 'oversized': OVERSIZED, 'files': {}}
+    return data
+
+
+def build_stats(processed_dir=PROCESSED_DIR, path=STATS_PATH, jobs: int = 1, force: bool = False):
+    """Bring the stats file up to date; returns (reused, rehashed, recomputed, dropped)."""
+    data = {'version': VERSION, 'oversized': OVERSIZED, 'files': {}} if force else load_stats(path)
+    old = data['files']
+    files = {}
+    jobs_todo = []
+    for filepath in chapter_files(processed_dir):
+        rel = os.path.relpath(filepath, processed_dir).replace(os.sep, '/')
+        entry = old.get(rel)
+        st = os.stat(filepath)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            files[rel] = entry
+        else:
+            jobs_todo.append((filepath, entry['sha1'] if entry else None))
+
+    rehashed = recomputed = 0
+    if jobs > 1 and len(jobs_todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_file_stats, jobs_todo, chunksize=32))
+    else:
+        results = list(map(_file_stats, jobs_todo))
+    for filepath, size, mtime_ns, sha1, stats in results:
+        rel = os.path.relpath(filepath, processed_dir).replace(os.sep, '/')
+        if stats is None:
+            stats = old[rel]['stats']
+            rehashed += 1
+        else:
+            recomputed += 1
+        files[rel] = {'size': size, 'mtime_ns': mtime_ns, 'sha1': sha1, 'stats': stats}
+
+    data['files'] = dict(sorted(files.items()))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+    return len(files) - rehashed - recomputed, rehashed, recomputed, len(old.keys() - files.keys())
+
+
+# --- Queries ----------------------------------------------------------------
+
+def by_text(data: dict) -> dict:
+    """{text: [(chapter file, stats)]} in file order."""
+    texts = {}
+    for rel, entry in data['files'].items():
+        text, _, filename = rel.rpartition('/')
+        texts.setdefault(text, []).append((filename, entry['stats']))
+    return texts
+
+
+def totals(chapters) -> dict:
+    """Aggregate of a list of chapter stats."""
+    total = dict.fromkeys(FIELDS, 0)
+    scripts = Counter()
+    lengths = []
+    for stats in chapters:
+        for field in FIELDS:
+            total[field] = max(total[field], stats[field]) if field == 'longest' else total[field] + stats[field]
+        scripts.update(stats['scripts'])
+        if len(stats['lengths']) > len(lengths):
+            lengths.extend([0] * (len(stats['lengths']) - len(lengths)))
+        for b, n in enumerate(stats['lengths']):
+            lengths[b] += n
+    total['scripts'] = dict(scripts.most_common())
+    total['lengths'] = lengths
+    total['chapters'] = len(chapters)
+    return total
+
+
+def script_share(stats: dict, script: str) -> float:
+    """script's share of the letters (Common and Inherited characters left out)."""
+    letters = sum(n for s, n in stats['scripts'].items() if s not in NEUTRAL_SCRIPTS)
+    return stats['scripts'].get(script, 0) / letters if letters else 0.0
+
+
+def median_length(lengths) -> str:
+    """The histogram bin holding the median paragraph, as a range."""
+    half = sum(lengths) / 2
+    seen = 0
+    for b, n in enumerate(lengths):
+        seen += n
+        if n and seen >= half:
+            return '0' if b == 0 else f'{2 ** (b - 1)}-{2 ** b - 1}'
+    return '-'
+
+
+def _scripts_summary(stats: dict, top: int = 3) -> str:
+    letters = sum(n for s, n in stats['scripts'].items() if s not in NEUTRAL_SCRIPTS)
+    parts = [f'{s} {n / letters:.0%}' for s, n in stats['scripts'].items()
+             if s not in NEUTRAL_SCRIPTS and letters][:top]
+    return ', '.join(parts) or '-'
+
+
+def show(data: dict, texts: list):
+    grouped = by_text(data)
+    names = texts or sorted(grouped)
+    for text in names:
+        if text not in grouped:
+            print(f'{text}: no stats (not under {PROCESSED_DIR}, or build not run)')
+            continue
+        t = totals([s for _, s in grouped[text]])
+        print(f"{text}: {t['chapters']} chapters, {t['paragraphs']} paragraphs, {t['chars']:,} chars, "
+              f"median paragraph {median_length(t['lengths'])}, longest {t['longest']}, "
+              f"{t['empty']} empty, {t['oversized']} oversized; {_scripts_summary(t)}")
+        if len(names) == 1:
+            for filename, s in grouped[text]:
+                print(f"  {filename:28s} {s['paragraphs']:5d} paras {s['chars']:8,} chars  "
+                      f"longest {s['longest']:6d}  empty {s['empty']:3d}  oversized {s['oversized']:3d}  "
+                      f"{_scripts_summary(s, 2)}")
+
+
+def main(argv):
+    command = argv[0] if argv else ''
+    args = positionals(argv[1:], ('--jobs', '--text', '--n', '--below'))
+
+    if command == 'build':
+        reused, rehashed, recomputed, dropped = build_stats(
+            jobs=option(argv, '--jobs', int, os.cpu_count() or 1), force='--force' in argv)
+        print(f'{STATS_PATH}: {recomputed} chapters computed, {rehashed} unchanged after rehashing, '
+              f'{reused} unchanged, {dropped} dropped')
+        return 0
+
+    data = load_stats()
+    if not data['files']:
+        print(f'No stats yet; run: python3 {sys.argv[0]} build')
+        return 1
+    only = option(argv, '--text')
+    chapters = [(rel, e['stats']) for rel, e in data['files'].items()
+                if only is None or rel.rpartition('/')[0] == only]
+
+    if command == 'show':
+        show(data, args)
+        return 0
+
+    if command == 'top' and args and args[0] in FIELDS:
+        field = args[0]
+        for rel, s in sorted(chapters, key=lambda c: -c[1][field])[:option(argv, '--n', int, 20)]:
+            print(f'  {s[field]:10,}  {rel}')
+        return 0
+
+    if command == 'ratio' and args:
+        below = option(argv, '--below', float, 0.9)
+        found = [(script_share(s, args[0]), rel) for rel, s in chapters if s['chars']]
+        found = sorted((share, rel) for share, rel in found if share < below)
+        for share, rel in found[:option(argv, '--n', int, 50)]:
+            print(f'  {share:6.1%}  {rel}')
+        print(f'{len(found)} chapters with less than {below:.0%} {args[0]}')
+        return 0
+
+    print('usage: stats.py build [--jobs N] [--force]\n'
+          '       stats.py show [text ...]\n'
+          f"       stats.py top <{'|'.join(FIELDS)}> [--n N] [--text T]\n"
+          '       stats.py ratio <script> [--below R] [--n N] [--text T]')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Packed per-text store for data/processed.
+
+Each text's chapter JSON is packed into one file, data/packed/<text>.pack,
+holding every paragraph as its own deflate-compressed UTF-8 blob:
+
+    header    magic, version, counts and the offsets of the sections below
+    table     one (offset, stored length, UTF-8 length) record per paragraph,
+              in chapter order; read in place from the memory-mapped file
+    zdict     preset deflate dictionary sampled from the text, so short
+              paragraphs still compress well on their own
+    meta      deflated JSON: per chapter its file name, number, title, the
+              shape read_chapter() found (layout, base, keys, extra) and its first
+              table row and paragraph count
+    blobs     the paragraphs
+
+Reading paragraph p of a chapter is one table lookup and one slice of the
+mapped file, with no JSON parsing; a blob that would not shrink is stored as
+plain UTF-8 (stored length == UTF-8 length). export() writes the chapter
+files back byte for byte.
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'processed-chapters'))
+    from store import Store
+
+    store = Store()
+    text = store.paragraph('semeioseis-gnomikai', 82, 0)
+    for chapter in store.text('mai-ve-siyah').iter_chapters():
+        ...
+
+    python3 scripts/lib/processed-chapters/store.py pack [text ...] [--jobs N]
+    python3 scripts/lib/processed-chapters/store.py get mai-ve-siyah 3 12
+    python3 scripts/lib/processed-chapters/store.py export mai-ve-siyah /tmp/mai-ve-siyah
+    python3 scripts/lib/processed-chapters/store.py verify [text ...]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, Chapter, Paragraph, chapter_files, read_chapter
+
+PACKED_DIR = 'data/packed'
+
+MAGIC = b'CPAK'
+VERSION = 1
+# magic, version, chapters, paragraphs, zdict offset, zdict length, meta offset, meta length
+HEADER = struct.Struct('<4sIIIQIQI')
+RECORD = struct.Struct('<QII')
+ZDICT_SIZE = 32 * 1024
+LEVEL = 9
+_WBITS = -15  # raw deflate: no per-blob header or checksum
+
+
+# --- Packing ----------------------------------------------------------------
+
+def text_dirs(root=PROCESSED_DIR) -> list:
+    """Text names (paths relative to root) of the directories holding chapter files."""
+    names = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        if any(f.startswith('chapter-') and f.endswith('.json') for f in files):
+            names.append(os.path.relpath(dirpath, root).replace(os.sep, '/'))
+    return names
+
+
+def pack_path(text: str, packed_dir=PACKED_DIR) -> str:
+    return os.path.join(packed_dir, text + '.pack')
+
+
+def sample_zdict(texts, size: int = ZDICT_SIZE) -> bytes:
+    """A preset dictionary of paragraphs taken evenly from the whole text.
+
+    zlib favours the end of the dictionary, so the sample is kept in text
+    order and trimmed from the front.
+    """
+    encoded = [t.encode('utf-8') for t in texts if t]
+    total = sum(len(b) for b in encoded)
+    if not total:
+        return b''
+    step = max(1, total // size)
+    sample = b''.join(b for i, b in enumerate(encoded) if i % step == 0)
+    return sample[-size:]
+
+
+def _text_files(text: str, processed_dir=PROCESSED_DIR) -> list:
+    """The text's own chapter files (not those of texts nested below it)."""
+    directory = os.path.join(processed_dir, text)
+    return [f for f in chapter_files(directory) if os.path.dirname(f) == directory]
+
+
+def pack_text(text: str, processed_dir=PROCESSED_DIR, packed_dir=PACKED_DIR) -> tuple:
+    """Pack one text's chapter files; returns (chapters, paragraphs, source bytes, packed bytes)."""
+    files = _text_files(text, processed_dir)
+    chapters = []
+    meta = []
+    source_bytes = 0
+    for filepath in files:
+        chapter = read_chapter(filepath)
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        source_bytes += len(raw)
+        chapters.append(chapter)
+        meta.append({
+            'file': os.path.basename(filepath), 'number': chapter.number, 'title': chapter.title,
+            'layout': chapter.layout, 'base': chapter.base, 'keys': chapter.item_keys,
+            'extra': chapter.extra,
+            'newline': raw.endswith(b'\n'), 'first': 0, 'count': len(chapter.paragraphs),
+        })
+
+    zdict = sample_zdict(p.text for c in chapters for p in c.paragraphs)
+    # Copying a primed compressor skips re-hashing the dictionary per paragraph.
+    primed = zlib.compressobj(LEVEL, zlib.DEFLATED, _WBITS, zdict=zdict) if zdict else \
+        zlib.compressobj(LEVEL, zlib.DEFLATED, _WBITS)
+    blobs = []
+    row = 0
+    for chapter, m in zip(chapters, meta):
+        m['first'] = row
+        row += len(chapter.paragraphs)
+        for p in chapter.paragraphs:
+            data = p.text.encode('utf-8')
+            deflate = primed.copy()
+            packed = deflate.compress(data) + deflate.flush()
+            blobs.append((packed, len(data)) if len(packed) < len(data) else (data, len(data)))
+
+    meta_blob = zlib.compress(json.dumps({'text': text, 'chapters': meta}, ensure_ascii=False).encode('utf-8'), LEVEL)
+    zdict_offset = HEADER.size + RECORD.size * len(blobs)
+    meta_offset = zdict_offset + len(zdict)
+    offset = meta_offset + len(meta_blob)
+
+    out = pack_path(text, packed_dir)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = out + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta), len(blobs),
+                            zdict_offset, len(zdict), meta_offset, len(meta_blob)))
+        for data, size in blobs:
+            f.write(RECORD.pack(offset, len(data), size))
+            offset += len(data)
+        f.write(zdict)
+        f.write(meta_blob)
+        for data, _ in blobs:
+            f.write(data)
+    os.replace(tmp, out)
+    return len(meta), len(blobs), source_bytes, offset
+
+
+def is_current(text: str, processed_dir=PROCESSED_DIR, packed_dir=PACKED_DIR) -> bool:
+    """Whether the pack exists, holds exactly the text's chapter files and is
+    newer than every one of them."""
+    out = pack_path(text, packed_dir)
+    try:
+        with PackedText(out) as packed:
+            packed_files = [m['file'] for m in packed.chapters]
+    except (FileNotFoundError, ValueError):
+        return False
+    files = _text_files(text, processed_dir)
+    if packed_files != [os.path.basename(f) for f in files]:
+        return False
+    built = os.path.getmtime(out)
+    return all(os.path.getmtime(f) <= built for f in files)
+
+
+# --- Reading ----------------------------------------------------------------
+
+class PackedText:
+    """One text's pack, memory-mapped.
+
+    Chapters are addressed by chapter number (the first chapter with that
+    number) or by file name ('chapter-003.json' or 'chapter-003').
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, chapter_count, self.paragraph_count,
+         zdict_offset, zdict_length, meta_offset, meta_length) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f'{path}: not a version {VERSION} chapter pack')
+        zdict = self.mm[zdict_offset:zdict_offset + zdict_length]
+        self.inflate = zlib.decompressobj(_WBITS, zdict=zdict) if zdict else zlib.decompressobj(_WBITS)
+        meta = json.loads(zlib.decompress(self.mm[meta_offset:meta_offset + meta_length]))
+        self.name = meta['text']
+        self.chapters = meta['chapters']
+        self.keys = {}
+        for i, m in enumerate(self.chapters):
+            self.keys.setdefault(m['number'], i)
+            self.keys[m['file']] = i
+            self.keys[m['file'][:-len('.json')]] = i
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.chapters)
+
+    def _position(self, key) -> int:
+        try:
+            return self.keys[key]
+        except KeyError:
+            raise KeyError(f'{self.name}: no chapter {key!r}') from None
+
+    def _text(self, row: int) -> str:
+        offset, length, size = RECORD.unpack_from(self.mm, HEADER.size + row * RECORD.size)
+        data = self.mm[offset:offset + length]
+        if length != size:
+            data = self.inflate.copy().decompress(data)
+        return data.decode('utf-8')
+
+    def paragraph(self, chapter, index: int) -> str:
+        """Text of paragraph index (0-based) of a chapter."""
+        m = self.chapters[self._position(chapter)]
+        if not 0 <= index < m['count']:
+            raise IndexError(f"{self.name} {m['file']}: no paragraph {index}")
+        return self._text(m['first'] + index)
+
+    def chapter(self, key) -> Chapter:
+        """The whole chapter, as read_chapter() would return it."""
+        return self._chapter_at(self._position(key))
+
+    def _chapter_at(self, position: int) -> Chapter:
+        m = self.chapters[position]
+        chapter = Chapter(os.path.join(self.name, m['file']))
+        chapter.number = m['number']
+        chapter.title = m['title']
+        chapter.layout = list(m['layout'])
+        chapter.base = m['base']
+        chapter.item_keys = tuple(m['keys'])
+        chapter.extra = dict(m['extra'])
+        chapter.paragraphs = [Paragraph(i, self._text(m['first'] + i)) for i in range(m['count'])]
+        return chapter
+
+    def iter_chapters(self):
+        for i in range(len(self.chapters)):
+            yield self._chapter_at(i)
+
+    def export(self, out_dir: str):
+        """Write the chapter files back as they were packed."""
+        os.makedirs(out_dir, exist_ok=True)
+        for i, m in enumerate(self.chapters):
+            text = json.dumps(self._chapter_at(i).to_dict(), ensure_ascii=False, indent=2)
+            with open(os.path.join(out_dir, m['file']), 'w', encoding='utf-8') as f:
+                f.write(text + '\n' if m['newline'] else text)
+
+
+class Store:
+    """All packs under packed_dir, opened on first use."""
+
+    def __init__(self, packed_dir=PACKED_DIR):
+        self.packed_dir = packed_dir
+        self.opened = {}
+
+    def texts(self) -> list:
+        names = []
+        for dirpath, dirs, files in os.walk(self.packed_dir):
+            dirs.sort()
+            for f in sorted(files):
+                if f.endswith('.pack'):
+                    rel = os.path.relpath(os.path.join(dirpath, f), self.packed_dir)
+                    names.append(rel[:-len('.pack')].replace(os.sep, '/'))
+        return names
+
+    def text(self, name: str) -> PackedText:
+        packed = self.opened.get(name)
+        if packed is None:
+            packed = self.opened[name] = PackedText(pack_path(name, self.packed_dir))
+        return packed
+
+    def paragraph(self, text: str, chapter, index: int) -> str:
+        return self.text(text).paragraph(chapter, index)
+
+    def close(self):
+        for packed in self.opened.values():
+            packed.close()
+        self.opened.clear()
+
+
+def verify_text(text: str, processed_dir=PROCESSED_DIR, packed_dir=PACKED_DIR) -> list:
+    """Chapter files whose export differs from the file in processed_dir,
+    including files only one of the two has."""
+    differing = []
+    with PackedText(pack_path(text, packed_dir)) as packed:
+        for i, m in enumerate(packed.chapters):
+            exported = json.dumps(packed._chapter_at(i).to_dict(), ensure_ascii=False, indent=2)
+            if m['newline']:
+                exported += '\n'
+            try:
+                with open(os.path.join(processed_dir, text, m['file']), 'r', encoding='utf-8', newline='') as f:
+                    if f.read() != exported:
+                        differing.append(m['file'])
+            except FileNotFoundError:
+                differing.append(m['file'])
+        packed_files = {m['file'] for m in packed.chapters}
+    differing.extend(name for name in map(os.path.basename, _text_files(text, processed_dir))
+                     if name not in packed_files)
+    return differing
+
+
+def main(argv):
+    command = argv[0] if argv else ''
+    args = positionals(argv[1:], ('--jobs',))
+
+    if command == 'pack':
+        texts = args or text_dirs()
+        if '--force' not in argv:
+            texts = [t for t in texts if not is_current(t)]
+        jobs = option(argv, '--jobs', int, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+            results = list(pool.map(pack_text, texts))
+        source = packed = 0
+        for text, (chapters, paragraphs, src, size) in zip(texts, results):
+            source += src
+            packed += size
+            print(f'  {text}: {chapters} chapters, {paragraphs} paragraphs, {src:,} -> {size:,} bytes')
+        print(f'{len(texts)} texts packed into {PACKED_DIR}: {source:,} -> {packed:,} bytes')
+        return 0
+
+    if command == 'get' and len(args) == 3:
+        chapter = int(args[1]) if args[1].isdigit() else args[1]
+        with PackedText(pack_path(args[0])) as packed:
+            print(packed.paragraph(chapter, int(args[2])))
+        return 0
+
+    if command == 'export' and len(args) == 2:
+        with PackedText(pack_path(args[0])) as packed:
+            packed.export(args[1])
+            print(f'{len(packed)} chapters written to {args[1]}')
+        return 0
+
+    if command == 'verify':
+        failed = 0
+        for text in args or Store().texts():
+            differing = verify_text(text)
+            if differing:
+                failed += 1
+                print(f'  {text}: {len(differing)} chapters differ, e.g. {differing[0]}')
+        print('all packs match data/processed' if not failed else f'{failed} packs out of date')
+        return 1 if failed else 0
+
+    print('usage: store.py pack [text ...] [--jobs N] [--force]\n'
+          '       store.py get <text> <chapter> <paragraph>\n'
+          '       store.py export <text> <out dir>\n'
+          '       store.py verify [text ...]')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
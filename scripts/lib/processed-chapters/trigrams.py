@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Trigram prefilter for regex sweeps over the paragraphs of data/processed.
+
+Contamination checks run dozens of regexes over every paragraph, yet almost
+every pattern needs some literal (omissis, wp, ead., fol.) that few
+paragraphs contain. build records, for every paragraph, which character
+trigrams of its case-folded text occur; plan() turns a regex into an AND/OR
+query over the trigrams any match must contain (the way code-search engines
+prefilter), and a Sweep runs each regex only on the paragraphs its query
+selects. A pattern with no usable literal (\\b[A-Z]{2}\\b) is run everywhere;
+nothing that could match is ever skipped.
+
+Folding is lower() plus the extra equivalences re.IGNORECASE applies (ϑ and
+θ, ς and σ, ſ and s, ...), so the same index serves case-sensitive and
+case-insensitive patterns. Trigrams are hashed into 2**BUCKET_BITS buckets
+(the corpus has some eleven million distinct ones); a collision only adds
+candidates.
+
+data/packed/trigrams.idx holds a header, the chapter files (relative path,
+first paragraph, paragraph count, size, mtime) as deflated JSON, a uint32
+offset per bucket and the buckets' sorted paragraph numbers, all read in
+place from the memory map. build always indexes everything; chapter files
+changed since then are simply scanned in full until the next build.
+
+    python3 scripts/lib/processed-chapters/trigrams.py build [--jobs N]
+    python3 scripts/lib/processed-chapters/trigrams.py plan '\\bead\\.\\s*man\\.'
+    python3 scripts/lib/processed-chapters/trigrams.py sweep 'omissis' '[A-Z]{2,}wp' [--file patterns.txt]
+                                                       [--ignore-case] [--text T] [--n 5] [--brute]
+
+From an evaluator:
+
+    sweep = Sweep([re.compile(p, re.IGNORECASE) for p in PATTERNS])
+    candidates = sweep.candidates(filepath, len(chapter.paragraphs))
+    for para in chapter.paragraphs:
+        for i in candidates[para.index]:      # only patterns that can match
+            ...
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import option, positionals
+from corpus import PROCESSED_DIR, chapter_files, loads_chapter, read_chapter
+from store import PACKED_DIR
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # before Python 3.11
+    import sre_parse
+    import sre_constants
+try:
+    from re._casefix import _EXTRA_CASES
+except ImportError:  # before Python 3.11 the same table lived in sre_compile
+    from sre_compile import _ignorecase_fixes as _EXTRA_CASES
+
+TRIGRAM_PATH = os.path.join(PACKED_DIR, 'trigrams.idx')
+MAGIC = b'TRG1'
+VERSION = 1
+BUCKET_BITS = 21
+# magic, version, bucket bits, files, paragraphs, files offset, files length, table offset, postings offset
+HEADER = struct.Struct('<4sIIIIQIQQ')
+MAX_EXACT = 16      # alternatives tracked per regex fragment before falling back to trigram queries
+
+
+# --- Folding and trigrams -----------------------------------------------------
+
+def _fold_table() -> dict:
+    """Each character of a re.IGNORECASE equivalence class to the smallest one."""
+    table = {}
+    for cp, others in _EXTRA_CASES.items():
+        canonical = min((cp,) + tuple(others))
+        for c in (cp,) + tuple(others):
+            table[c] = min(canonical, table.get(c, canonical))
+    return {c: target for c, target in table.items() if c != target}
+
+
+_PRE_FOLD = {0x0130: 'i'}   # İ, the one character whose lower() is two characters
+_POST_FOLD = _fold_table()
+
+
+def fold(text: str) -> str:
+    """text with every character replaced by its case-insensitive representative."""
+    return text.translate(_PRE_FOLD).lower().translate(_POST_FOLD)
+
+
+def bucket(trigram: str, bits: int = BUCKET_BITS) -> int:
+    return zlib.crc32(trigram.encode('utf-8')) & ((1 << bits) - 1)
+
+
+def buckets(text: str, bits: int = BUCKET_BITS) -> array:
+    """Sorted buckets of the trigrams of fold(text)."""
+    folded = fold(text)
+    mask = (1 << bits) - 1
+    crc32 = zlib.crc32
+    found = {crc32(t.encode('utf-8')) & mask for t in {folded[i:i + 3] for i in range(len(folded) - 2)}}
+    return array('I', sorted(found))
+
+
+# --- Planning -----------------------------------------------------------------
+#
+# A query is None (every paragraph), a trigram string, or ('and' | 'or', [queries]).
+
+def and_(*queries):
+    parts = []
+    for q in queries:
+        if q is None:
+            continue
+        if isinstance(q, tuple) and q[0] == 'and':
+            parts.extend(p for p in q[1] if p not in parts)
+        elif q not in parts:
+            parts.append(q)
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ('and', parts)
+
+
+def or_(*queries):
+    parts = []
+    for q in queries:
+        if q is None:
+            return None
+        if isinstance(q, tuple) and q[0] == 'or':
+            parts.extend(p for p in q[1] if p not in parts)
+        elif q not in parts:
+            parts.append(q)
+    return parts[0] if len(parts) == 1 else ('or', parts)
+
+
+def string_query(s: str):
+    """Every trigram of s."""
+    return and_(*(s[i:i + 3] for i in range(len(s) - 2)))
+
+
+def strings_query(strings):
+    """One of strings occurs."""
+    if not strings or any(len(s) < 3 for s in strings):
+        return None
+    return or_(*(string_query(s) for s in sorted(strings)))
+
+
+class _Info:
+    """What is known about the strings a regex fragment matches.
+
+    exact is the set of them when small, else None; otherwise every match
+    starts with one of prefix, ends with one of suffix and satisfies match.
+    """
+    __slots__ = ('exact', 'prefix', 'suffix', 'match')
+
+    def __init__(self, exact=None, prefix=frozenset(('',)), suffix=frozenset(('',)), match=None):
+        self.exact = exact
+        self.prefix = prefix
+        self.suffix = suffix
+        self.match = match
+
+    def query(self):
+        """The query every match of the fragment satisfies."""
+        if self.exact is not None:
+            return and_(self.match, strings_query(self.exact))
+        return and_(self.match, strings_query(self.prefix), strings_query(self.suffix))
+
+    def inexact(self) -> '_Info':
+        if self.exact is None:
+            return self
+        return _Info(None, self.exact, self.exact, self.query())
+
+
+ANY = _Info()
+EMPTY = frozenset(('',))
+
+
+def _product(left, right):
+    if len(left) * len(right) > MAX_EXACT:
+        return None
+    return frozenset(a + b for a in left for b in right)
+
+
+def _concat(a: _Info, b: _Info) -> _Info:
+    if a.exact is not None and b.exact is not None:
+        exact = _product(a.exact, b.exact)
+        if exact is not None:
+            return _Info(exact)
+    left = a.exact if a.exact is not None else a.suffix
+    right = b.exact if b.exact is not None else b.prefix
+    across = _product({s[-2:] for s in left}, {s[:2] for s in right})
+    match = and_(a.query(), b.query(), strings_query(across) if across is not None else None)
+    prefix = a.prefix
+    if a.exact is not None:
+        prefix = _product(a.exact, {s[:2] for s in b.prefix}) or a.exact
+    suffix = b.suffix
+    if b.exact is not None:
+        suffix = _product({s[-2:] for s in a.suffix}, b.exact) or b.exact
+    # Only two characters either side are needed to find trigrams across later joins.
+    return _Info(None, frozenset(s[:2] for s in prefix), frozenset(s[-2:] for s in suffix), match)
+
+
+def _alternate(infos) -> _Info:
+    if all(i.exact is not None for i in infos):
+        exact = frozenset().union(*(i.exact for i in infos))
+        if len(exact) <= MAX_EXACT:
+            return _Info(exact)
+    infos = [i.inexact() for i in infos]
+    return _Info(None, frozenset().union(*(i.prefix for i in infos)),
+                 frozenset().union(*(i.suffix for i in infos)), or_(*(i.match for i in infos)))
+
+
+def _charset(items):
+    """Folded characters of a [...] set, or None when it is large or negated."""
+    chars = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            chars.add(fold(chr(av)))
+        elif op is sre_constants.RANGE and av[1] - av[0] < MAX_EXACT:
+            chars.update(fold(chr(c)) for c in range(av[0], av[1] + 1))
+        else:
+            return None
+        if len(chars) > MAX_EXACT:
+            return None
+    return frozenset(chars)
+
+
+def _analyze(parsed) -> _Info:
+    info = _Info(EMPTY)
+    for op, av in parsed:
+        info = _concat(info, _analyze_node(op, av))
+    return info
+
+
+def _analyze_node(op, av) -> _Info:
+    c = sre_constants
+    if op is c.LITERAL:
+        return _Info(frozenset((fold(chr(av)),)))
+    if op is c.IN:
+        chars = _charset(av)
+        return ANY if chars is None else _Info(chars)
+    if op is c.SUBPATTERN:
+        return _analyze(av[-1])
+    if op is getattr(c, 'ATOMIC_GROUP', None):
+        return _analyze(av)
+    if op is c.BRANCH:
+        return _alternate([_analyze(branch) for branch in av[1]])
+    if op is c.GROUPREF_EXISTS:
+        return _alternate([_analyze(av[1]), _analyze(av[2]) if av[2] is not None else _Info(EMPTY)])
+    if op in (c.MAX_REPEAT, c.MIN_REPEAT) or op is getattr(c, 'POSSESSIVE_REPEAT', None):
+        low, high, sub = av
+        if low == 0:
+            return ANY
+        inner = _analyze(sub)
+        if low == high and inner.exact is not None and len(inner.exact) ** low <= MAX_EXACT:
+            info = _Info(EMPTY)
+            for _ in range(low):
+                info = _concat(info, inner)
+            return info
+        inner = inner.inexact()
+        return _Info(None, inner.prefix, inner.suffix, inner.match)
+    if op in (c.AT, c.ASSERT, c.ASSERT_NOT):
+        return _Info(EMPTY)    # zero-width
+    return ANY                 # ANY, NOT_LITERAL, CATEGORY, GROUPREF, ...
+
+
+def plan(pattern):
+    """The trigram query for a regex (a string or a compiled pattern)."""
+    if hasattr(pattern, 'pattern'):
+        pattern, flags = pattern.pattern, pattern.flags
+    else:
+        flags = 0
+    if isinstance(pattern, bytes):
+        return None
+    return _analyze(sre_parse.parse(pattern, flags)).query()
+
+
+def describe(query) -> str:
+    if query is None:
+        return '*'
+    if isinstance(query, str):
+        return repr(query)
+    op, parts = query
+    return '(' + f' {op.upper()} '.join(describe(p) for p in parts) + ')'
+
+
+# --- Building -----------------------------------------------------------------
+
+def _file_buckets(path: str):
+    """(size, mtime_ns, [sorted buckets] per paragraph) of a chapter file."""
+    st = os.stat(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        chapter = loads_chapter(f.read(), path)
+    return st.st_size, st.st_mtime_ns, [buckets(p.text) for p in chapter.paragraphs]
+
+
+def build_trigrams(processed_dir=PROCESSED_DIR, path=TRIGRAM_PATH, jobs: int = 1) -> tuple:
+    """Index every chapter file; returns (chapter files, paragraphs, trigram postings)."""
+    paths = chapter_files(processed_dir)
+    postings = [None] * (1 << BUCKET_BITS)
+    files = []
+    doc = 0
+    if jobs > 1 and len(paths) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(_file_buckets, paths, chunksize=8)
+    else:
+        pool = None
+        results = map(_file_buckets, paths)
+    try:
+        for filepath, (size, mtime_ns, paragraphs) in zip(paths, results):
+            rel = os.path.relpath(filepath, processed_dir).replace(os.sep, '/')
+            files.append([rel, doc, len(paragraphs), size, mtime_ns])
+            for found in paragraphs:
+                for b in found:
+                    docs = postings[b]
+                    if docs is None:
+                        postings[b] = array('I', (doc,))
+                    else:
+                        docs.append(doc)
+                doc += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    files_blob = zlib.compress(json.dumps(files, ensure_ascii=False).encode('utf-8'))
+    files_blob += b'\0' * (-len(files_blob) % 4)
+    table = array('I', [0])
+    total = 0
+    for docs in postings:
+        total += len(docs) if docs is not None else 0
+        table.append(total)
+    table_offset = HEADER.size + len(files_blob)
+    postings_offset = table_offset + 4 * len(table)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, BUCKET_BITS, len(files), doc, HEADER.size, len(files_blob),
+                            table_offset, postings_offset))
+        f.write(files_blob)
+        f.write(table.tobytes())
+        for docs in postings:
+            if docs is not None:
+                f.write(docs.tobytes())
+    os.replace(path + '.tmp', path)
+    return len(files), doc, total
+
+
+# --- Querying -----------------------------------------------------------------
+
+class TrigramIndex:
+    """The memory-mapped trigrams.idx."""
+
+    def __init__(self, path=TRIGRAM_PATH, processed_dir=PROCESSED_DIR):
+        self.processed_dir = processed_dir
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.bits, nfiles, self.docs, files_offset, files_length,
+         table_offset, postings_offset) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f'{path}: not a version {VERSION} trigram index; rebuild it')
+        self.files = json.loads(zlib.decompress(self.mm[files_offset:files_offset + files_length]))
+        self.by_rel = {f[0]: f for f in self.files}
+        self.first_docs = [f[1] for f in self.files]
+        view = memoryview(self.mm)
+        self.table = view[table_offset:postings_offset].cast('I')
+        self.postings = view[postings_offset:].cast('I')
+
+    def close(self):
+        self.table.release()
+        self.postings.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def rel(self, path) -> str:
+        """path relative to data/processed, as the index names chapter files."""
+        full = os.path.abspath(path)
+        rel = os.path.relpath(full, os.path.abspath(self.processed_dir))
+        if rel.startswith('..'):
+            marker = os.sep + os.path.normpath(self.processed_dir) + os.sep
+            rel = full.rpartition(marker)[2] if marker in full else rel
+        return rel.replace(os.sep, '/')
+
+    def entry(self, path):
+        """The index's [rel, first paragraph, count, size, mtime] for path, or
+        None when the file is not indexed or has changed since."""
+        entry = self.by_rel.get(self.rel(path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return entry if entry[3] == st.st_size and entry[4] == st.st_mtime_ns else None
+
+    def _span(self, trigram: str, lo: int, hi: int) -> tuple:
+        b = bucket(trigram, self.bits)
+        start, end = self.table[b], self.table[b + 1]
+        if lo > 0:
+            start = bisect_left(self.postings, lo, start, end)
+        if hi < self.docs:
+            end = bisect_left(self.postings, hi, start, end)
+        return start, end
+
+    def _cost(self, query, lo: int, hi: int) -> int:
+        if isinstance(query, str):
+            start, end = self._span(query, lo, hi)
+            return end - start
+        costs = [self._cost(q, lo, hi) for q in query[1]]
+        return min(costs) if query[0] == 'and' else sum(costs)
+
+    def search(self, query, lo: int = 0, hi: int = None):
+        """Set of paragraph numbers in [lo, hi) that may satisfy query, or
+        None for all of them."""
+        hi = self.docs if hi is None else hi
+        if query is None:
+            return None
+        if isinstance(query, str):
+            start, end = self._span(query, lo, hi)
+            return set(self.postings[start:end])
+        op, parts = query
+        if op == 'or':
+            found = set()
+            for q in parts:
+                docs = self.search(q, lo, hi)
+                if docs is None:
+                    return None
+                found |= docs
+            return found
+        found = None
+        for q in sorted(parts, key=lambda q: self._cost(q, lo, hi)):
+            docs = self.search(q, lo, hi)
+            if docs is None:
+                continue
+            found = docs if found is None else found & docs
+            if len(found) <= 4:     # cheaper to run the regex than to keep narrowing
+                break
+        return found
+
+    def locate(self, doc: int) -> tuple:
+        """(chapter file entry, paragraph index) of a paragraph number."""
+        k = bisect_left(self.first_docs, doc + 1) - 1
+        return self.files[k], doc - self.files[k][1]
+
+
+def load_index(path=TRIGRAM_PATH, processed_dir=PROCESSED_DIR):
+    """The trigram index, or None when it has not been built."""
+    try:
+        return TrigramIndex(path, processed_dir)
+    except FileNotFoundError:
+        return None
+
+
+class Sweep:
+    """A list of compiled regexes, each planned once.
+
+    Without an index (or for chapter files changed since it was built) every
+    pattern is a candidate for every paragraph, so results never depend on
+    whether the index is current; only the time does.
+    """
+
+    def __init__(self, patterns, index=None, processed_dir=PROCESSED_DIR):
+        self.patterns = list(patterns)
+        self.queries = [plan(p) for p in self.patterns]
+        self.processed_dir = processed_dir
+        if index is None:
+            index = load_index(processed_dir=processed_dir)
+        self.index = index or None      # index=False: scan everything
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+
+    def candidates(self, path, paragraphs: int) -> list:
+        """For each of a chapter file's paragraphs, the indexes of the patterns
+        that may match it, in pattern order."""
+        entry = self.index.entry(path) if self.index is not None else None
+        everything = list(range(len(self.patterns)))
+        if entry is None or entry[2] != paragraphs:
+            return [everything for _ in range(paragraphs)]
+        first = entry[1]
+        found = [[] for _ in range(paragraphs)]
+        for i, query in enumerate(self.queries):
+            docs = self.index.search(query, first, first + paragraphs)
+            for doc in (range(first, first + paragraphs) if docs is None else sorted(docs)):
+                found[doc - first].append(i)
+        return found
+
+    def run(self, paths=None):
+        """Yield (chapter file, paragraph index, pattern index, match) for every
+        match in paths (default: every chapter file), in file, paragraph and
+        pattern order."""
+        if paths is None:
+            paths = chapter_files(self.processed_dir)
+        index = self.index
+        per_doc = {}
+        if index is not None:
+            for i, query in enumerate(self.queries):
+                docs = index.search(query)
+                if docs is not None:
+                    for doc in docs:
+                        per_doc.setdefault(doc, []).append(i)
+        everything = [i for i, q in enumerate(self.queries) if index is None or q is None]
+        for path in paths:
+            entry = index.entry(path) if index is not None else None
+            if entry is not None:
+                first, count = entry[1], entry[2]
+                selected = {doc - first: sorted(set(per_doc.get(doc, ())) | set(everything))
+                            for doc in range(first, first + count) if doc in per_doc or everything}
+                if not selected:
+                    continue
+            chapter = read_chapter(path)
+            for p in chapter.paragraphs:
+                if entry is None:
+                    todo = range(len(self.patterns))
+                else:
+                    todo = selected.get(p.index, ())
+                for i in todo:
+                    for m in self.patterns[i].finditer(p.text):
+                        yield path, p.index, i, m
+
+
+def main(argv):
+    command = argv[0] if argv else ''
+    args = positionals(argv[1:], ('--jobs', '--file', '--text', '--n'))
+
+    if command == 'build':
+        started = time.time()
+        files, paragraphs, postings = build_trigrams(jobs=option(argv, '--jobs', int, os.cpu_count() or 1))
+        print(f'{TRIGRAM_PATH}: {files} chapter files, {paragraphs} paragraphs, '
+              f'{postings} trigram postings in {time.time() - started:.1f}s')
+        return 0
+
+    import re
+    flags = re.IGNORECASE if '--ignore-case' in argv else 0
+    pattern_file = option(argv, '--file')
+    if pattern_file is not None:
+        with open(pattern_file, 'r', encoding='utf-8') as f:
+            args += [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+
+    if command == 'plan' and args:
+        for pattern in args:
+            print(f'{pattern}\n  {describe(plan(re.compile(pattern, flags)))}')
+        return 0
+
+    if command == 'sweep' and args:
+        patterns = [re.compile(p, flags) for p in args]
+        index = None if '--brute' in argv else load_index()
+        if index is None and '--brute' not in argv:
+            print(f'No trigram index; scanning everything (build it with: python3 {sys.argv[0]} build)')
+        text = option(argv, '--text')
+        root = os.path.join(PROCESSED_DIR, text) if text else PROCESSED_DIR
+        started = time.time()
+        sweep = Sweep(patterns, index=index or False)
+        paragraphs = [set() for _ in patterns]
+        shown = [[] for _ in patterns]
+        n = option(argv, '--n', int, 0)
+        for path, paragraph, i, m in sweep.run(chapter_files(root)):
+            paragraphs[i].add((path, paragraph))
+            if len(shown[i]) < n:
+                s = m.string
+                shown[i].append(f'{os.path.relpath(path, PROCESSED_DIR)}#{paragraph}: '
+                                f'…{s[max(0, m.start() - 30):m.start()]}[{m.group()}]{s[m.end():m.end() + 30]}…'
+                                .replace('\n', ' '))
+        elapsed = time.time() - started
+        for pattern, found, lines in zip(args, paragraphs, shown):
+            print(f'{len(found):8d}  {pattern}')
+            for line in lines:
+                print(f'            {line}')
+        print(f'{len(patterns)} patterns, {len(set().union(*paragraphs))} paragraphs matched in {elapsed:.2f}s')
+        return 0
+
+    print('usage: trigrams.py build [--jobs N]\n'
+          '       trigrams.py plan <regex> ... [--ignore-case]\n'
+          '       trigrams.py sweep <regex> ... [--file patterns.txt] [--ignore-case] [--text T] [--n N] [--brute]')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
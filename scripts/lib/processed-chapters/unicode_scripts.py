@@ -0,0 +1,200 @@
+"""
+Unicode script of a character, for the scripts the corpus is written in.
+
+The standard library has no Script property, so the blocks our texts use are
+listed here. Letters outside them count as 'Other', combining marks as
+'Inherited' and everything else (spaces, digits, punctuation) as 'Common'.
+
+For whole strings, script_of() is precomputed into a one-character-per-code-
+point table (planes 0-2) that str.translate() applies in C; script_runs(),
+dominant_script(), ratio() and count() work on the translated string.
+Text should be NFC (nfc()) first: the raw OCR carries Greek both precomposed
+and as base letter plus combining accents, which would otherwise count as
+separate Inherited characters.
+
+    script_runs('Καὶ ὁ λόγος (verbum)')  ->  [('Greek', 0, 13), ('Latin', 13, 20)]
+    ratio(text, 'Greek', among=('Greek', 'Latin'))
+
+A script's count takes in its whole blocks: Greek is every code point of
+Greek and Coptic and of Greek Extended, its punctuation and numeral signs
+included, as the Greek cleaners' [\u0370-\u03FF\u1F00-\u1FFF] always did.
+Their thresholds were tuned against ASCII letters alone, so ascii_latin=True
+counts Latin as [a-zA-Z] only. The semeioseis v4 is_greek_char() and
+greek_char_count() keep their own class (the Greek blocks plus the two
+combining-diacritics blocks), which Inherited, every combining mark of any
+script, does not reproduce.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from collections import Counter
+
+# (first, last, script), sorted by first code point
+SCRIPT_RANGES = (
+    (0x0041, 0x005A, 'Latin'),
+    (0x0061, 0x007A, 'Latin'),
+    (0x00AA, 0x00AA, 'Latin'),
+    (0x00BA, 0x00BA, 'Latin'),
+    (0x00C0, 0x00D6, 'Latin'),
+    (0x00D8, 0x00F6, 'Latin'),
+    (0x00F8, 0x024F, 'Latin'),
+    (0x0370, 0x03FF, 'Greek'),
+    (0x0400, 0x052F, 'Cyrillic'),
+    (0x0531, 0x058F, 'Armenian'),
+    (0x0591, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'),
+    (0x0900, 0x097F, 'Devanagari'),
+    (0x0B80, 0x0BFF, 'Tamil'),
+    (0x0C00, 0x0C7F, 'Telugu'),
+    (0x10A0, 0x10FF, 'Georgian'),
+    (0x1E00, 0x1EFF, 'Latin'),
+    (0x1F00, 0x1FFF, 'Greek'),
+    (0x2E80, 0x2FDF, 'Han'),
+    (0x3005, 0x3005, 'Han'),
+    (0x3007, 0x3007, 'Han'),
+    (0x3021, 0x3029, 'Han'),
+    (0x3041, 0x309F, 'Hiragana'),
+    (0x30A1, 0x30FF, 'Katakana'),
+    (0x3400, 0x4DBF, 'Han'),
+    (0x4E00, 0x9FFF, 'Han'),
+    (0xAC00, 0xD7AF, 'Hangul'),
+    (0xF900, 0xFAFF, 'Han'),
+    (0xFB1D, 0xFB4F, 'Hebrew'),
+    (0x20000, 0x2FA1F, 'Han'),
+)
+_STARTS = [first for first, _, _ in SCRIPT_RANGES]
+
+
+def script_of(ch: str) -> str:
+    """Script name of one character."""
+    cp = ord(ch)
+    i = bisect_right(_STARTS, cp) - 1
+    if i >= 0 and cp <= SCRIPT_RANGES[i][1]:
+        return SCRIPT_RANGES[i][2]
+    category = unicodedata.category(ch)
+    if category[0] == 'L':
+        return 'Other'
+    if category[0] == 'M':
+        return 'Inherited'
+    return 'Common'
+
+
+_SCRIPT_CACHE = {}
+
+
+def script_counts(text) -> Counter:
+    """Characters per script in a string (or in a Counter of characters)."""
+    chars = text if isinstance(text, Counter) else Counter(text)
+    counts = Counter()
+    cache = _SCRIPT_CACHE
+    for ch, n in chars.items():
+        script = cache.get(ch)
+        if script is None:
+            script = cache[ch] = script_of(ch)
+        counts[script] += n
+    return counts
+
+
+# --- Whole strings ------------------------------------------------------------
+
+NEUTRAL = ('Common', 'Inherited')
+SCRIPTS = NEUTRAL + tuple(sorted({script for _, _, script in SCRIPT_RANGES})) + ('Other',)
+_CODE = {script: chr(i) for i, script in enumerate(SCRIPTS)}
+_TABLE_END = 0x30000
+_table = None
+_RUN = re.compile(r'(.)\1*', re.DOTALL)
+_ASCII_LETTER = re.compile(r'[a-zA-Z]')
+
+
+def _script_table() -> str:
+    """SCRIPTS index of every code point below _TABLE_END, one character each."""
+    global _table
+    if _table is None:
+        _table = ''.join(_CODE[script_of(chr(cp))] if not 0xD800 <= cp <= 0xDFFF else _CODE['Common']
+                         for cp in range(_TABLE_END))
+    return _table
+
+
+def nfc(text: str) -> str:
+    """text in Unicode normalization form C."""
+    if text.isascii() or unicodedata.is_normalized('NFC', text):
+        return text
+    return unicodedata.normalize('NFC', text)
+
+
+def script_codes(text: str) -> str:
+    """text with each character replaced by its script's code (chr(SCRIPTS index))."""
+    codes = text.translate(_script_table())
+    if max(codes, default='\0') >= chr(len(SCRIPTS)):
+        # Code points past the table are left as they were by translate().
+        codes = ''.join(c if c < chr(len(SCRIPTS)) else _CODE[script_of(c)] for c in codes)
+    return codes
+
+
+def script_runs(text: str, resolve: bool = True) -> list:
+    """(script, start, end) runs of text covering it exactly.
+
+    With resolve, Common and Inherited characters (spaces, punctuation,
+    combining marks) join the run before them, or the one after them at the
+    start of the string, so a sentence of Greek words is one Greek run. A
+    string of nothing but Common characters is one Common run.
+    """
+    runs = []
+    for m in _RUN.finditer(script_codes(text)):
+        script = SCRIPTS[ord(m.group(1))]
+        if resolve and runs:
+            last = runs[-1]
+            if script in NEUTRAL:
+                runs[-1] = (last[0], last[1], m.end())
+                continue
+            if last[0] in NEUTRAL:
+                runs[-1] = (script, last[1], m.end())
+                continue
+            if last[0] == script:
+                runs[-1] = (script, last[1], m.end())
+                continue
+        runs.append((script, m.start(), m.end()))
+    return runs
+
+
+def count(text: str, *scripts) -> int:
+    """Characters of text in any of scripts."""
+    codes = script_codes(text)
+    return sum(codes.count(_CODE[script]) for script in scripts)
+
+
+def letter_counts(text: str, ascii_latin: bool = False) -> Counter:
+    """Characters per script, Common and Inherited left out; with ascii_latin,
+    Latin counts only the ASCII letters."""
+    codes = script_codes(text)
+    counts = Counter()
+    for script in SCRIPTS[len(NEUTRAL):]:
+        n = codes.count(_CODE[script])
+        if n:
+            counts[script] = n
+    if ascii_latin:
+        n = len(_ASCII_LETTER.findall(text))
+        if n:
+            counts['Latin'] = n
+        else:
+            counts.pop('Latin', None)
+    return counts
+
+
+def dominant_script(text: str, default: str = 'Common') -> str:
+    """The script most letters of text are in (default when it has none)."""
+    counts = letter_counts(text)
+    return counts.most_common(1)[0][0] if counts else default
+
+
+def ratio(text: str, script: str, among=None, ascii_latin: bool = False) -> float:
+    """script's share of the letters of text, 0.0 when it has none.
+
+    among restricts the denominator to those scripts, e.g. ('Greek', 'Latin')
+    for a Greek-versus-apparatus test that ignores stray Hebrew or digits;
+    ascii_latin is as for letter_counts().
+    """
+    counts = letter_counts(text, ascii_latin)
+    total = sum(counts[s] for s in among) if among is not None else sum(counts.values())
+    return counts[script] / total if total else 0.0
@@ -0,0 +1,155 @@
+"""
+Atomic, skip-if-unchanged writes of chapter JSON.
+
+A chapter is serialized in memory, compared byte for byte with the file
+already on disk, and only when they differ written to a temp file in the same
+directory and moved over the target with os.replace, so a crash never leaves a
+half-written chapter and unchanged chapters keep their mtime (which is what
+stats.py and store.py use to skip work).
+
+    write_json(path, data)                  # one file; True if it was written
+
+    with ChapterWriter() as writer:         # many files, flushed by a thread pool
+        for ...:
+            writer.write(path, data)
+    print(writer.summary())
+
+Output is json.dumps(ensure_ascii=False, indent=2) with no trailing newline,
+as the processors have always written it; compact=True drops the indentation.
+"""
+
+import json
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+WRITE_JOBS = 4
+
+
+def dumps_json(data, compact: bool = False) -> bytes:
+    """The UTF-8 bytes write_json() puts on disk for data."""
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    return text.encode('utf-8')
+
+
+def _unchanged(path, payload: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(payload):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == payload
+    except FileNotFoundError:
+        return False
+
+
+def _create_temp(path: str) -> tuple:
+    """(fd, path) of a new, uniquely named file beside path, created 0666 & ~umask."""
+    directory, name = os.path.split(path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp_path = os.path.join(directory, f'{name}.{secrets.token_hex(4)}.tmp')
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def write_bytes(path, payload: bytes) -> bool:
+    """Atomically replace path with payload unless it already holds it.
+
+    Returns True if the file was written. The file keeps the mode of the one
+    it replaces; a new file gets the usual 0666 & ~umask, applied by open().
+    """
+    path = os.fspath(path)
+    if _unchanged(path, payload):
+        return False
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    fd, tmp_path = _create_temp(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return True
+
+
+def write_json(path, data, compact: bool = False) -> bool:
+    """Serialize data and write it to path if the content changed."""
+    return write_bytes(path, dumps_json(data, compact))
+
+
+class ChapterWriter:
+    """Writes chapters through a small thread pool.
+
+    Serialization happens in the caller's thread when write() is called, so
+    data may be modified or reused afterwards; comparing and writing run in
+    the pool. close() (or leaving the with block) waits for every write
+    and re-raises the first error.
+    """
+
+    def __init__(self, jobs: int = WRITE_JOBS, compact: bool = False):
+        self.compact = compact
+        self.written = []
+        self.unchanged = []
+        self._pool = ThreadPoolExecutor(max_workers=max(1, jobs)) if jobs > 1 else None
+        self._pending = []
+
+    def write(self, path, data):
+        payload = dumps_json(data, self.compact)
+        if self._pool is None:
+            self._record(path, write_bytes(path, payload))
+        else:
+            self._pending.append((path, self._pool.submit(write_bytes, path, payload)))
+
+    def _record(self, path, written: bool):
+        (self.written if written else self.unchanged).append(os.fspath(path))
+
+    def flush(self):
+        """Wait for the writes submitted so far."""
+        pending, self._pending = self._pending, []
+        error = None
+        for path, future in pending:
+            try:
+                self._record(path, future.result())
+            except Exception as ex:
+                error = error or ex
+        if error is not None:
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def summary(self) -> str:
+        return f'{len(self.written)} written, {len(self.unchanged)} unchanged'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        try:
+            self.close()
+        except Exception:
+            pass  # the exception already propagating is the one to report
@@ -3,7 +3,6 @@
 
 Reads raw DJVU text, applies cleaning phases, outputs chapter JSON files.
 """
-import json
 import os
 import re
 import sys
@@ -12,10 +11,16 @@ import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from patterns import (
     FRONT_MATTER_END, CHAPTER_HEADING, INTRODUZIONE_HEADING,
-    PAGE_NUMBER, is_noise_line, LEADING_MARGIN, SOFT_HYPHEN,
-    FOOTNOTE, MULTI_BLANK, STRAY_BULLETS, FINE_MARKER
+    LEADING_MARGIN, SOFT_HYPHEN, MULTI_BLANK, STRAY_BULLETS, FINE_MARKER,
+    PROFILE
 )
-from corrections import apply_corrections
+from classify import FOOTNOTE, OCR_NOISE, PAGE_NUMBER, classify, keep, role_counts
+from paragraphs import BLANK_LINES, iter_paragraphs
+from corrections import CORRECTION_COUNTS, apply_corrections
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from unicode_scripts import nfc
+from writer import ChapterWriter
 
 # Paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -52,9 +57,9 @@ CHAPTER_NAMES = {
 
 
 def read_raw_text() -> list[str]:
-    """Read the raw DJVU text file."""
+    """Read the raw DJVU text file, in NFC."""
     with open(RAW_FILE, 'r', encoding='utf-8') as f:
-        return f.readlines()
+        return [nfc(line) for line in f]
 
 
 def strip_front_matter(lines: list[str]) -> list[str]:
@@ -66,43 +71,13 @@ def strip_front_matter(lines: list[str]) -> list[str]:
     return lines
 
 
-def remove_page_numbers(lines: list[str]) -> list[str]:
-    """Remove page number lines."""
-    result = []
-    for line in lines:
-        stripped = line.strip()
-        if PAGE_NUMBER.match(stripped):
-            continue
-        result.append(line)
-    return result
-
+def remove_structural_lines(lines: list[str]) -> tuple[list[str], dict]:
+    """Remove page number, noise and footnote lines in one classification pass.
 
-def remove_noise_lines(lines: list[str]) -> list[str]:
-    """Remove garbled OCR noise lines."""
-    result = []
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            result.append(line)
-            continue
-        # Keep chapter headings, INTRODUZIONE, FINE
-        if CHAPTER_HEADING.match(stripped) or INTRODUZIONE_HEADING.match(stripped) or FINE_MARKER.match(stripped):
-            result.append(line)
-            continue
-        if is_noise_line(stripped):
-            continue
-        result.append(line)
-    return result
-
-
-def remove_footnotes(lines: list[str]) -> list[str]:
-    """Remove footnote lines."""
-    result = []
-    for line in lines:
-        if FOOTNOTE.match(line.strip()):
-            continue
-        result.append(line)
-    return result
+    Blank lines and chapter headings / INTRODUZIONE / FINE are kept.
+    """
+    roles = classify(lines, PROFILE)
+    return keep(lines, roles, (PAGE_NUMBER, OCR_NOISE, FOOTNOTE)), role_counts(roles)
 
 
 def strip_margin_chars(lines: list[str]) -> list[str]:
@@ -277,31 +252,19 @@ def _heading_to_number(heading: str) -> int:
 def lines_to_paragraphs(lines: list[str]) -> list[str]:
     """Convert lines to paragraphs (blank-line delimited)."""
     paragraphs = []
-    current = []
-
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            if current:
-                para = ' '.join(current)
-                para = re.sub(r'  +', ' ', para).strip()
-                if para:
-                    paragraphs.append(para)
-                current = []
-        else:
-            current.append(stripped)
-
-    if current:
-        para = ' '.join(current)
+    for para in iter_paragraphs(lines, BLANK_LINES):
         para = re.sub(r'  +', ' ', para).strip()
         if para:
             paragraphs.append(para)
-
     return paragraphs
 
 
-def write_chapter_json(chapter_num: int, title: str, paragraphs: list[str]):
-    """Write a chapter JSON file."""
+def write_chapter_json(writer: ChapterWriter, chapter_num: int, title: str, paragraphs: list[str],
+                       before: int = None):
+    """Queue a chapter JSON file on writer.
+
+    before is the paragraph count ahead of post-processing, if it ran.
+    """
     data = {
         'chapterNumber': chapter_num,
         'title': title,
@@ -314,13 +277,21 @@ def write_chapter_json(chapter_num: int, title: str, paragraphs: list[str]):
     }
     filename = f'chapter-{chapter_num:03d}.json'
     filepath = os.path.join(OUTPUT_DIR, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"  Written: {filename} ({len(paragraphs)} paragraphs)")
+    writer.write(filepath, data)
+    if before is None:
+        print(f"  Written: {filename} ({len(paragraphs)} paragraphs)")
+    else:
+        diff = len(paragraphs) - before
+        diff_str = f" ({diff:+d})" if diff else ""
+        print(f"  Written: {filename} ({before} -> {len(paragraphs)} paragraphs{diff_str})")
+
 
+def main(postprocess=None):
+    """Run the full cleaning pipeline.
 
-def main():
-    """Run the full cleaning pipeline."""
+    postprocess, if given, maps each chapter's cleaned paragraphs to their
+    final form before the chapter is written (the V2 post-processing).
+    """
     print("=== Scapigliatura OCR Cleaning Pipeline v1 ===\n")
 
     # Read raw text
@@ -333,14 +304,11 @@ def main():
     lines = strip_front_matter(lines)
     print(f"  After front matter removal: {len(lines)} lines")
 
-    lines = remove_page_numbers(lines)
-    print(f"  After page number removal: {len(lines)} lines")
-
-    lines = remove_noise_lines(lines)
-    print(f"  After noise removal: {len(lines)} lines")
-
-    lines = remove_footnotes(lines)
-    print(f"  After footnote removal: {len(lines)} lines")
+    remaining = len(lines)
+    lines, removed = remove_structural_lines(lines)
+    for label, role in (('page number', 'PAGE_NUMBER'), ('noise', 'OCR_NOISE'), ('footnote', 'FOOTNOTE')):
+        remaining -= removed[role]
+        print(f"  After {label} removal: {remaining} lines")
 
     lines = strip_margin_chars(lines)
     print(f"  After margin char removal: {len(lines)} lines")
@@ -358,6 +326,8 @@ def main():
     # Process each chapter
     print("\nPhase 4: Processing chapters")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    writer = ChapterWriter()
+    total_before = total_after = 0
 
     for chapter_num, title, chapter_lines in chapters:
         # Convert to paragraphs
@@ -372,9 +342,25 @@ def main():
             if para and not is_noise_paragraph(para):
                 cleaned_paragraphs.append(para)
 
-        write_chapter_json(chapter_num, title, cleaned_paragraphs)
+        before = None
+        if postprocess is not None:
+            before = len(cleaned_paragraphs)
+            cleaned_paragraphs = postprocess(cleaned_paragraphs)
+            total_before += before
+            total_after += len(cleaned_paragraphs)
+
+        write_chapter_json(writer, chapter_num, title, cleaned_paragraphs, before)
+    writer.close()
+
+    if postprocess is not None:
+        print(f"\nTotal: {total_before} -> {total_after} paragraphs "
+              f"({total_before - total_after} removed/merged)")
+
+    print("\nCorrections applied:")
+    for correction, n in CORRECTION_COUNTS.most_common():
+        print(f"  {n:5d}  {correction}")
 
-    print(f"\nDone! {len(chapters)} chapter files written to {OUTPUT_DIR}")
+    print(f"\nDone! {len(chapters)} chapter files in {OUTPUT_DIR} ({writer.summary()})")
 
 
 if __name__ == '__main__':
@@ -2,17 +2,19 @@
 
 Primary issue: l/t confusion (OCR reads 't' as 'l' systematically).
 Secondary: clic -> che substitution.
+
+All corrections are whole-word, so apply_corrections() walks the words of a
+paragraph once: each word is looked up in a case-folded table built from
+WORD_CORRECTIONS and LT_CORRECTIONS, then checked against the -ala/-alo
+past-participle rule. Hits are counted per correction in CORRECTION_COUNTS.
 """
 import re
+from collections import Counter
 
-# clic -> che: only standalone word
-def fix_clic(text: str) -> str:
-    """Replace standalone 'clic' with 'che'. Case-sensitive."""
-    # Match 'clic' as standalone word (not part of cliché, click, etc.)
-    # Also handle Clic at start of sentence
-    text = re.sub(r'\bClic\b', 'Che', text)
-    text = re.sub(r'\bclic\b', 'che', text)
-    return text
+# clic -> che: only standalone word (not part of cliché, click, etc.)
+WORD_CORRECTIONS = {
+    'clic': 'che',
+}
 
 # l/t confusion dictionary: OCR form -> correct form
 # Built by scanning the actual text for Italian words where 'l' replaces 't'
@@ -138,19 +140,6 @@ for w in DANGEROUS_WORDS:
     LT_CORRECTIONS.pop(w, None)
 
 
-def fix_lt_confusion(text: str) -> str:
-    """Apply l/t correction dictionary to text."""
-    for wrong, correct in LT_CORRECTIONS.items():
-        # Word boundary match, case-sensitive
-        text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text)
-        # Also try capitalized version
-        if wrong[0].islower():
-            cap_wrong = wrong[0].upper() + wrong[1:]
-            cap_correct = correct[0].upper() + correct[1:]
-            text = re.sub(r'\b' + re.escape(cap_wrong) + r'\b', cap_correct, text)
-    return text
-
-
 # Words ending in -ala/-alo/-ali/-ale that are REAL Italian words (not l/t errors)
 REAL_ALA_WORDS = {
     'sala', 'scala', 'cala', 'mala', 'gala', 'tala', 'pala', 'ala',
@@ -172,39 +161,56 @@ REAL_ALA_WORDS = {
 }
 
 
-def fix_lt_pattern(text: str) -> str:
-    """Fix l/t confusion using pattern-based rules for past participles.
+def _capitalize(word: str) -> str:
+    return word[0].upper() + word[1:]
+
+
+def _build_lookup() -> dict:
+    """Case-folded word -> (OCR form, correct form).
 
-    Italian past participles end in -ato/-ata/-ati/-ate.
-    OCR systematically reads 't' as 'l', producing -alo/-ala/-ali/-ale.
-    We fix these unless the word is a known real Italian word.
+    An entry matches its OCR form exactly and, when that form is lowercase,
+    its capitalized variant too (corrected to the capitalized correct form).
     """
-    def replace_ala(m):
-        word = m.group(0)
-        if word.lower() in REAL_ALA_WORDS:
-            return word
-        # Replace the 'l' with 't' in the ending
-        # -ala -> -ata, -alo -> -ato, -ali -> -ati, -ale -> -ate
-        if word.endswith('ala'):
-            return word[:-3] + 'ata'
-        elif word.endswith('alo'):
-            return word[:-3] + 'ato'
-        elif word.endswith('ali'):
-            # Be careful: many -ali words are real (plurals of -ale)
-            return word  # Skip -ali, too many false positives
-        elif word.endswith('ale'):
-            return word  # Skip -ale, too many real words
-        return word
-
-    # Match words ending in -ala or -alo (but not the whole-word exceptions)
-    text = re.sub(r'\b[A-Za-zÀ-ÿ]+ala\b', replace_ala, text)
-    text = re.sub(r'\b[A-Za-zÀ-ÿ]+alo\b', replace_ala, text)
-    return text
+    lookup = {}
+    for table in (WORD_CORRECTIONS, LT_CORRECTIONS):
+        for wrong, correct in table.items():
+            lookup[wrong.lower()] = (wrong, correct)
+    return lookup
+
+
+WORD_LOOKUP = _build_lookup()
+WORD_RE = re.compile(r'\w+')
+
+# Past participles: Italian -ato/-ata read as -alo/-ala. (-ali/-ale are left
+# alone: most such words are real plurals/adjectives of -ale.)
+PARTICIPLE_RE = re.compile(r'[A-Za-zÀ-ÿ]+al[ao]')
+PARTICIPLE_FIXES = {'ala': ('ata', '-ala -> -ata'), 'alo': ('ato', '-alo -> -ato')}
+
+CORRECTION_COUNTS = Counter()
+
+
+def correct_word(word: str) -> str:
+    """Correct one word (a maximal run of word characters)."""
+    entry = WORD_LOOKUP.get(word.lower())
+    if entry is not None:
+        wrong, correct = entry
+        if word == wrong:
+            CORRECTION_COUNTS[f'{wrong} -> {correct}'] += 1
+            word = correct
+        elif wrong[0].islower() and word == _capitalize(wrong):
+            CORRECTION_COUNTS[f'{wrong} -> {correct}'] += 1
+            word = _capitalize(correct)
+
+    # Words ending in -ala/-alo that are not known real Italian words
+    ending = word[-3:]
+    if ending in PARTICIPLE_FIXES and PARTICIPLE_RE.fullmatch(word) \
+            and word.lower() not in REAL_ALA_WORDS:
+        fixed, label = PARTICIPLE_FIXES[ending]
+        CORRECTION_COUNTS[label] += 1
+        word = word[:-3] + fixed
+    return word
 
 
 def apply_corrections(text: str) -> str:
     """Apply all corrections to text."""
-    text = fix_clic(text)
-    text = fix_lt_confusion(text)
-    text = fix_lt_pattern(text)
-    return text
+    return WORD_RE.sub(lambda m: correct_word(m.group()), text)
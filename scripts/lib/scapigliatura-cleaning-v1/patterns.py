@@ -1,5 +1,11 @@
 """Regex patterns for OCR noise detection and removal."""
+import os
 import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ocr-lines'))
+import classify
+from classify import Profile, rule
 
 # Front matter ends before INTRODUZIONE (line 58 in original)
 FRONT_MATTER_END = re.compile(r'^INTRODUZIONE\.?\s*$')
@@ -76,3 +82,14 @@ STRAY_BULLETS = re.compile(r'\s•\s')
 
 # "FINE." marker
 FINE_MARKER = re.compile(r'^FINE\.\s*$')
+
+# Line roles for the structural cleanup. Order matters: page numbers go first,
+# then headings are protected from the noise test, then footnotes.
+PROFILE = Profile('scapigliatura', [
+    rule(classify.PAGE_NUMBER, PAGE_NUMBER),
+    rule(classify.HEADING, CHAPTER_HEADING),
+    rule(classify.HEADING, INTRODUZIONE_HEADING),
+    rule(classify.HEADING, FINE_MARKER),
+    rule(classify.OCR_NOISE, is_noise_line),
+    rule(classify.FOOTNOTE, FOOTNOTE),
+])
@@ -1,89 +1,167 @@
 #!/usr/bin/env python3
 """V2 post-processing for La Scapigliatura e il 6 Febbraio.
 
-Reads V1 output JSON files and applies fixes identified by the evaluator:
+Applies the fixes identified by the evaluator to the V1 paragraphs:
   P0: Remove garbage paragraphs, merge cross-paragraph soft hyphens
   P1: Additional l/t corrections, Cristina name fix
   P2: Strip trailing garbage, join regular-hyphen breaks
+
+All of them run in one streaming pass per chapter (postprocess_paragraphs),
+called by the V1 cleaner before each chapter is written, so V1 and V2 are a
+single pipeline and no intermediate V1 JSON is written. Each paragraph
+carries one Stats record whose character counts are computed on first use
+and shared by the merges and the garbage checks:
+
+    python3 scripts/lib/scapigliatura-cleaning-v2/postprocess.py
 """
-import json
+import functools
 import os
 import re
-import glob
+import sys
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..'))
-OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data', 'processed', 'scapigliatura-e-il-6-febbraio')
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'scapigliatura-cleaning-v1'))
 
 # --- P0: Garbage paragraph detection (tightened) ---
 
 # Italian vowels
 VOWELS = set('aeiouàèéìòùAEIOUÀÈÉÌÒÙ')
 
-def is_garbage_paragraph(text: str) -> bool:
-    """More aggressive garbage detection than V1."""
-    stripped = text.strip()
+NON_LETTER_RE = re.compile(r'[^A-Za-zÀ-ÿ]')
+VOWEL_RE = re.compile(r'[aeiouàèéìòùAEIOUÀÈÉÌÒÙ]')
+MID_UPPER_RE = re.compile(r'[a-z][A-Z]')
+
+SHORT_OK = {
+    'il', 'la', 'le', 'lo', 'un', 'in', 'di', 'da', 'si', 'no',
+    'ma', 'se', 'ha', 'ho', 'fa', 'io', 'al', 'ai', 'ad', 'oh',
+    'ah', 'su', 'me', 'te', 'ci', 'vi', 'che', 'chi', 'non', 'per',
+    'con', 'lui', 'lei', 'noi', 'voi', 'due', 'tre', 'era', 'gli',
+    'una', 'uno', 'col', 'del', 'nel', 'sul', 'fra', 'e', 'o',
+}
+
+
+class Stats:
+    """One paragraph's text and the character statistics the checks share.
+
+    Each statistic is computed the first time a check asks for it; a
+    paragraph whose text a step changes gets a new record.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @functools.cached_property
+    def stripped(self) -> str:
+        return self.text.strip()
+
+    @functools.cached_property
+    def end(self) -> str:
+        """The text without trailing whitespace."""
+        return self.text.rstrip()
+
+    @functools.cached_property
+    def letters(self) -> str:
+        """The stripped text's Latin letters (A-Z, a-z, À-ÿ)."""
+        return NON_LETTER_RE.sub('', self.stripped)
+
+    @functools.cached_property
+    def has_vowel(self) -> bool:
+        return any(c in VOWELS for c in self.letters)
+
+    @functools.cached_property
+    def alpha_ratio(self):
+        """Share of the non-space characters that are alphabetic; None when there are none."""
+        stripped = self.stripped
+        total = len(stripped) - stripped.count(' ')
+        return sum(1 for c in stripped if c.isalpha()) / total if total else None
+
+    @functools.cached_property
+    def words(self) -> list:
+        return self.stripped.split()
+
+    @functools.cached_property
+    def mid_upper(self) -> int:
+        """Lowercase-uppercase ASCII pairs, the mark of garbled OCR."""
+        return len(MID_UPPER_RE.findall(self.stripped))
+
+
+@functools.lru_cache(maxsize=None)
+def _word_shape(w: str):
+    """(letters only, has a vowel, mixed case mid-word, 4+ consonant run) for a word.
+
+    Words repeat a lot across paragraphs, so this is computed once per word.
+    """
+    clean = NON_LETTER_RE.sub('', w)
+    has_v = any(c in VOWELS for c in clean)
+    mixed = bool(MID_UPPER_RE.search(clean))
+    consonant_run = any(len(run) >= 4 for run in VOWEL_RE.sub(' ', clean.lower()).split())
+    return clean, has_v, mixed, consonant_run
+
+
+def is_plausible(w: str) -> bool:
+    """Word plausibility for paragraphs under 100 chars."""
+    clean, has_v, mixed, consonant_run = _word_shape(w)
+    if len(clean) < 2:
+        return len(clean) == 1 and clean.lower() in 'aeiou'
+    if len(clean) >= 3 and not has_v:
+        return False
+    # Mixed case mid-word
+    if len(clean) >= 3 and mixed:
+        return False
+    # 4+ consecutive consonants (very rare in Italian)
+    return not consonant_run
+
+
+def is_plausible_ext(w: str) -> bool:
+    """Word plausibility for paragraphs of 100-500 chars (single letters fail)."""
+    clean, has_v, mixed, consonant_run = _word_shape(w)
+    if len(clean) < 2:
+        return False
+    if len(clean) >= 3 and (not has_v or mixed):
+        return False
+    return not consonant_run
+
+
+def is_garbage_paragraph(text: str, stats: Stats = None) -> bool:
+    """More aggressive garbage detection than V1; stats is text's record, if
+    the caller already has one."""
+    if stats is None:
+        stats = Stats(text)
+    stripped = stats.stripped
     if not stripped:
         return True
+    length = len(stripped)
 
     # Very short fragments (< 8 chars) that aren't plausible Italian
-    if len(stripped) < 8:
-        clean = re.sub(r'[^A-Za-zÀ-ÿ]', '', stripped)
+    if length < 8:
         # Must have vowels and consonants
-        if len(clean) < 2:
+        if len(stats.letters) < 2:
             return True
-        has_vowel = any(c in VOWELS for c in clean)
-        if not has_vowel:
+        if not stats.has_vowel:
             return True
         # Check if it's a known short word/phrase
-        lower = stripped.lower().strip('.,;:!?\'"()[]{}')
-        short_ok = {
-            'il', 'la', 'le', 'lo', 'un', 'in', 'di', 'da', 'si', 'no',
-            'ma', 'se', 'ha', 'ho', 'fa', 'io', 'al', 'ai', 'ad', 'oh',
-            'ah', 'su', 'me', 'te', 'ci', 'vi', 'che', 'chi', 'non', 'per',
-            'con', 'lui', 'lei', 'noi', 'voi', 'due', 'tre', 'era', 'gli',
-            'una', 'uno', 'col', 'del', 'nel', 'sul', 'fra', 'e', 'o',
-        }
-        if lower not in short_ok:
+        if stripped.lower().strip('.,;:!?\'"()[]{}') not in SHORT_OK:
             return True
 
     # Alpha ratio check
-    alpha = sum(1 for c in stripped if c.isalpha())
-    total = len(stripped.replace(' ', ''))
-    if total == 0:
+    ratio = stats.alpha_ratio
+    if ratio is None:
         return True
-    ratio = alpha / total
 
     # Tightened: < 60% alpha for paragraphs under 50 chars
-    if len(stripped) < 50 and ratio < 0.60:
+    if length < 50 and ratio < 0.60:
         return True
     # Standard: < 50% alpha
     if ratio < 0.50:
         return True
 
     # Short paragraphs starting with punctuation/symbols are suspicious
-    if len(stripped) < 30 and stripped[0] in '.;:,/!?^*<>([{':
+    if length < 30 and stripped[0] in '.;:,/!?^*<>([{':
         return True
 
     # Word plausibility for short paragraphs (< 100 chars)
-    if len(stripped) < 100:
-        words = stripped.split()
-        def is_plausible(w):
-            clean = re.sub(r'[^A-Za-zÀ-ÿ]', '', w)
-            if len(clean) < 2:
-                return len(clean) == 1 and clean.lower() in 'aeiou'
-            has_v = any(c in VOWELS for c in clean)
-            if len(clean) >= 3 and not has_v:
-                return False
-            # Mixed case mid-word
-            if len(clean) >= 3 and re.search(r'[a-z][A-Z]', clean):
-                return False
-            # 4+ consecutive consonants (very rare in Italian)
-            consonant_pat = re.sub(r'[aeiouàèéìòùAEIOUÀÈÉÌÒÙ]', ' ', clean.lower())
-            if any(len(run) >= 4 for run in consonant_pat.split()):
-                return False
-            return True
-
+    if length < 100:
+        words = stats.words
         plausible_count = sum(1 for w in words if is_plausible(w))
         if len(words) >= 2 and plausible_count / len(words) < 0.65:
             return True
@@ -92,29 +170,16 @@ def is_garbage_paragraph(text: str) -> bool:
 
     # Additional heuristic: multiple mid-word uppercase ASCII letters (garbled OCR)
     # Only check ASCII uppercase to avoid false positives with accented chars
-    mid_upper_count = len(re.findall(r'[a-z][A-Z]', stripped))
-    if mid_upper_count >= 3 and len(stripped) < 80:
+    mid_upper_count = stats.mid_upper
+    if mid_upper_count >= 3 and length < 80:
         return True
     # For longer paragraphs, high density of mid-word uppercase = garbage
     if mid_upper_count >= 4:
         return True
 
     # Extended word plausibility for paragraphs 100-500 chars
-    if 100 <= len(stripped) <= 500:
-        words = stripped.split()
-        def is_plausible_ext(w):
-            clean = re.sub(r'[^A-Za-zÀ-ÿ]', '', w)
-            if len(clean) < 2:
-                return False
-            has_v = any(c in VOWELS for c in clean)
-            if len(clean) >= 3 and not has_v:
-                return False
-            if len(clean) >= 3 and re.search(r'[a-z][A-Z]', clean):
-                return False
-            consonant_pat = re.sub(r'[aeiouàèéìòùAEIOUÀÈÉÌÒÙ]', ' ', clean)
-            if any(len(run) >= 4 for run in consonant_pat.split()):
-                return False
-            return True
+    if 100 <= length <= 500:
+        words = stats.words
         plausible = sum(1 for w in words if is_plausible_ext(w))
         if len(words) >= 3 and plausible / len(words) < 0.5:
             return True
@@ -124,24 +189,33 @@ def is_garbage_paragraph(text: str) -> bool:
 
 # --- P0: Cross-paragraph soft hyphen merge ---
 
-def merge_soft_hyphen_paragraphs(paragraphs: list[dict]) -> list[dict]:
-    """Merge paragraphs where the first ends with ¬ into the next."""
-    result = []
-    i = 0
-    while i < len(paragraphs):
-        text = paragraphs[i]['text']
-        if text.rstrip().endswith('¬') and i + 1 < len(paragraphs):
-            # Remove ¬ and merge with next paragraph
-            merged = text.rstrip().rstrip('¬') + paragraphs[i + 1]['text'].lstrip()
-            result.append({'text': merged})
-            i += 2
+def merge_pairs(paragraphs, merge):
+    """Stream Stats records, replacing a paragraph and its successor by merge(a, b).
+
+    merge returns the merged paragraph's text or None; a merged pair is not
+    merged again with the paragraph after it.
+    """
+    pending = None
+    for para in paragraphs:
+        if pending is None:
+            pending = para
+            continue
+        merged = merge(pending, para)
+        if merged is None:
+            yield pending
+            pending = para
         else:
-            result.append({'text': text})
-            i += 1
-    # Re-index
-    for idx, p in enumerate(result):
-        p['index'] = idx
-    return result
+            yield Stats(merged)
+            pending = None
+    if pending is not None:
+        yield pending
+
+
+def merge_soft_hyphen(para: Stats, next_para: Stats):
+    """Merge a paragraph ending with ¬ into the next."""
+    if para.end.endswith('¬'):
+        return para.end.rstrip('¬') + next_para.text.lstrip()
+    return None
 
 
 # --- P1: Additional l/t corrections ---
@@ -194,24 +268,26 @@ ADDITIONAL_LT = {k: v for k, v in ADDITIONAL_LT.items() if k != v}
 # Remove 'volle' - it's a real Italian word (he/she wanted)
 ADDITIONAL_LT.pop('volle', None)
 
-def apply_additional_lt(text: str) -> str:
-    for wrong, correct in ADDITIONAL_LT.items():
-        text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text)
-    return text
-
+# Whole-word fixes looked up per word (one scan instead of one re.sub per entry)
+WORD_FIXES = {**ADDITIONAL_LT, 'Crisiina': 'Cristina', 'crisiina': 'cristina'}
+WORD_RE = re.compile(r'\w+')
+CRISI_INA_RE = re.compile(r'\b([Cc])risi\s+ina\b')
 
-# --- P1: Cristina fix ---
 
-def fix_cristina(text: str) -> str:
-    text = re.sub(r'\bCrisiina\b', 'Cristina', text)
-    text = re.sub(r'\bcrisiina\b', 'cristina', text)
-    text = re.sub(r'\bCrisi\s+ina\b', 'Cristina', text)
-    text = re.sub(r'\bcrisi\s+ina\b', 'cristina', text)
+def apply_word_fixes(text: str) -> str:
+    """P1: additional l/t corrections and the Cristina name fix."""
+    text = WORD_RE.sub(lambda m: WORD_FIXES.get(m.group(), m.group()), text)
+    if 'risi' in text:
+        text = CRISI_INA_RE.sub(r'\1ristina', text)
     return text
 
 
 # --- P2: Strip trailing garbage ---
 
+TRAILING_SEGMENT_RE = re.compile(r'([.!?;:»"\')\]]+)\s+(.{3,50})$')
+LAST_WORD_RE = re.compile(r'\s+([^\s]{3,})\s*$')
+
+
 def strip_trailing_garbage(text: str) -> str:
     """Remove trailing noise fragments from otherwise clean paragraphs."""
     # Match trailing sequences that look like OCR garbage:
@@ -223,7 +299,7 @@ def strip_trailing_garbage(text: str) -> str:
 
     # Pattern: trailing segment after last sentence-ending punctuation
     # that is mostly non-alphabetic or garbled
-    m = re.search(r'([.!?;:»"\')\]]+)\s+(.{3,50})$', text)
+    m = TRAILING_SEGMENT_RE.search(text)
     if m:
         trailing = m.group(2)
         alpha = sum(1 for c in trailing if c.isalpha())
@@ -234,16 +310,16 @@ def strip_trailing_garbage(text: str) -> str:
 
     # Also strip if paragraph ends with obvious garbage pattern
     # e.g., `.rmoixcg`, `hutjqeu`, etc.
-    m2 = re.search(r'\s+([^\s]{3,})\s*$', text)
+    m2 = LAST_WORD_RE.search(text)
     if m2:
         last_word = m2.group(1)
-        clean_word = re.sub(r'[^A-Za-zÀ-ÿ]', '', last_word)
+        clean_word = NON_LETTER_RE.sub('', last_word)
         if len(clean_word) >= 4:
             # Check if it has vowels (Italian words always do)
             if not any(c in VOWELS for c in clean_word):
                 return text[:m2.start()].rstrip()
             # Check consonant clusters
-            consonants = re.sub(r'[aeiouàèéìòùAEIOUÀÈÉÌÒÙ]', '', clean_word.lower())
+            consonants = VOWEL_RE.sub('', clean_word.lower())
             if len(consonants) > len(clean_word) * 0.7 and len(clean_word) >= 5:
                 return text[:m2.start()].rstrip()
 
@@ -252,106 +328,44 @@ def strip_trailing_garbage(text: str) -> str:
 
 # --- P2: Join regular-hyphen breaks ---
 
-def join_hyphen_paragraphs(paragraphs: list[dict]) -> list[dict]:
-    """Join paragraphs split at regular hyphens where next starts lowercase."""
-    result = []
-    i = 0
-    while i < len(paragraphs):
-        text = paragraphs[i]['text']
-        # Check if paragraph ends with a hyphen-split word
-        if (re.search(r'[a-zà-ÿ]{2,}-$', text.rstrip()) and
-                i + 1 < len(paragraphs)):
-            next_text = paragraphs[i + 1]['text']
-            # Only join if next paragraph starts lowercase (continuation)
-            if next_text and next_text[0].islower():
-                # Remove trailing hyphen and join
-                merged = text.rstrip().rstrip('-') + next_text
-                result.append({'text': merged})
-                i += 2
-                continue
-        result.append({'text': text})
-        i += 1
-    # Re-index
-    for idx, p in enumerate(result):
-        p['index'] = idx
-    return result
+HYPHEN_END_RE = re.compile(r'[a-zà-ÿ]{2,}-$')
 
 
-# --- Main pipeline ---
-
-def process_chapter(filepath: str) -> dict:
-    """Apply all V2 fixes to a chapter JSON file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def join_hyphen_break(para: Stats, next_para: Stats):
+    """Join a paragraph split at a regular hyphen when the next starts lowercase."""
+    next_text = next_para.text
+    if next_text and next_text[0].islower() and HYPHEN_END_RE.search(para.end):
+        return para.end.rstrip('-') + next_text
+    return None
 
-    paragraphs = data['sourceContent']['paragraphs']
 
-    # P0: Merge cross-paragraph soft hyphens
-    paragraphs = merge_soft_hyphen_paragraphs(paragraphs)
-
-    # P2: Join regular-hyphen breaks (before garbage removal so merged paras get checked)
-    paragraphs = join_hyphen_paragraphs(paragraphs)
-
-    # Apply text-level fixes and filter garbage
-    cleaned = []
-    for p in paragraphs:
-        text = p['text']
-
-        # P1: Additional l/t corrections
-        text = apply_additional_lt(text)
-
-        # P1: Cristina fix
-        text = fix_cristina(text)
+# --- Main pipeline ---
 
+def iter_postprocessed(texts):
+    """Yield the V2 paragraphs for one chapter's V1 paragraph texts."""
+    # P0: Merge cross-paragraph soft hyphens, then
+    # P2: join regular-hyphen breaks (before garbage removal so merged paras get checked)
+    paragraphs = (Stats(text) for text in texts)
+    for para in merge_pairs(merge_pairs(paragraphs, merge_soft_hyphen), join_hyphen_break):
+        # P1: Additional l/t corrections, Cristina fix
+        text = apply_word_fixes(para.text)
         # P2: Strip trailing garbage
-        text = strip_trailing_garbage(text)
-
-        text = text.strip()
-
+        text = strip_trailing_garbage(text).strip()
+        if text != para.text:
+            para = Stats(text)
         # P0: Remove garbage paragraphs (tightened filter)
-        if text and not is_garbage_paragraph(text):
-            cleaned.append(text)
-
-    # Rebuild
-    data['sourceContent']['paragraphs'] = [
-        {'index': i, 'text': t} for i, t in enumerate(cleaned)
-    ]
-    return data
+        if text and not is_garbage_paragraph(text, para):
+            yield text
 
 
-def main():
-    print("=== Scapigliatura V2 Post-Processing ===\n")
-
-    files = sorted(glob.glob(os.path.join(OUTPUT_DIR, 'chapter-*.json')))
-    print(f"Found {len(files)} chapter files\n")
-
-    total_before = 0
-    total_after = 0
-
-    for filepath in files:
-        filename = os.path.basename(filepath)
+def postprocess_paragraphs(texts) -> list[str]:
+    return list(iter_postprocessed(texts))
 
-        # Count before
-        with open(filepath, 'r', encoding='utf-8') as f:
-            before_data = json.load(f)
-        before_count = len(before_data['sourceContent']['paragraphs'])
-        total_before += before_count
 
-        # Process
-        data = process_chapter(filepath)
-        after_count = len(data['sourceContent']['paragraphs'])
-        total_after += after_count
-
-        # Write back
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-        diff = before_count - after_count
-        diff_str = f" (-{diff})" if diff > 0 else f" (+{-diff})" if diff < 0 else ""
-        print(f"  {filename}: {before_count} -> {after_count} paragraphs{diff_str}")
-
-    print(f"\nTotal: {total_before} -> {total_after} paragraphs ({total_before - total_after} removed/merged)")
-    print("Done!")
+def main():
+    print("=== Scapigliatura V1 + V2 Pipeline ===\n")
+    import cleaner
+    cleaner.main(postprocess=postprocess_paragraphs)
 
 
 if __name__ == '__main__':
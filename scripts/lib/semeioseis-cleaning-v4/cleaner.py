@@ -11,7 +11,6 @@ V4 FIXES (from V3 evaluator feedback, grade B - borderline):
 6. Abbreviated forms ending in period+comma
 """
 
-import json
 import re
 import sys
 from pathlib import Path
@@ -28,13 +27,35 @@ from patterns import (
     STAR_MARKER, OMICRON_MARKER, is_greek_char, greek_char_count,
     VALID_SHORT_GREEK as _PATTERNS_VALID_SHORT_GREEK
 )
-from filters import should_remove_line, is_footnote_line, is_page_header
+from filters import PROFILE, is_footnote_line, is_page_header
+from chapters import ChapterSpec, boundary_mismatches, chapter_ranges, greek_numeral, load_chapter_index
+from classify import ROLE_NAMES, TEXT, classify
+from paragraphs import ParagraphModel, iter_paragraphs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'processed-chapters'))
+from unicode_scripts import nfc
+from writer import ChapterWriter
 
 BASE_DIR = Path("/Users/bryancheong/claude_projects/translation-wiki")
 RAW_FILE = BASE_DIR / "data/raw/semeioseis_gnomikai/semeioseis_gnomikai_82_120.txt"
 OUTPUT_DIR = BASE_DIR / "data/processed/semeioseis-gnomikai"
 
-# Chapter line map (same as V1/V2 - chapter segmentation was correct)
+# Chapter headings: "ΚΕΦ. πβʹ." (chapter 82) ... "ΚΕΦ. ρκʹ." (chapter 120),
+# numbered in Greek numerals. A ΚΕΦ line whose numeral the OCR garbled is taken
+# as the chapter missing between its neighbours; chapter 118 may have none.
+def _chapter_number(match):
+    return greek_numeral(match.group('num') or '')
+
+
+CHAPTERS = ChapterSpec(
+    'semeioseis-gnomikai',
+    heading=r"\s*[\?\)\•\-]*\s*\d*\s*ΚΕΦ(?:ΑΛΑΙΟΝ)?\s*\.?\s*(?:(?P<num>[\u0370-\u03FF\u1F00-\u1FFF'ʹ’]+)(?=[\s.,;:·]|$))?",
+    number=_chapter_number, first=82, last=120,
+)
+
+# Heading lines (1-indexed) of the V1-V3 map, which the index must reproduce;
+# chapter 118 is looked up by find_chapter_118(). main() warns on a mismatch
+# and tests/python/test_chapters.py checks it.
 CHAPTER_LINE_MAP = [
     (1, 82), (220, 83), (392, 84), (594, 85), (736, 86),
     (1040, 87), (1159, 88), (1250, 89), (1348, 90), (1454, 91),
@@ -46,6 +67,28 @@ CHAPTER_LINE_MAP = [
     (8306, 117), (8779, 119), (9003, 120),
 ]
 
+
+def find_chapter_118(lines: list) -> int:
+    """0-indexed line of the chapter 118 heading, or -1."""
+    for i in range(8400, 8770):
+        if i >= len(lines):
+            break
+        line = lines[i].strip()
+        if 'ΚΕΦ' in line and 'ριη' in line:
+            return i
+    return -1
+
+
+def expected_chapter_lines(lines: list) -> dict:
+    """{chapter: heading line} the index should find. V3 inserted chapter 118
+    at the 0-indexed line as if it were 1-indexed, starting it one line early;
+    the index starts it on its heading."""
+    expected = {chapter: line for line, chapter in CHAPTER_LINE_MAP}
+    ch118_line = find_chapter_118(lines)
+    if ch118_line > 0:
+        expected[118] = ch118_line + 1
+    return expected
+
 stats = Counter()
 
 # Use the comprehensive valid words set from patterns.py
@@ -66,8 +109,10 @@ GREEK_PREFIXES = {
 
 
 def read_raw_file():
+    # NFC once here: the OCR mixes precomposed Greek with base letter plus
+    # combining accents, and every pattern downstream assumes the former.
     with open(RAW_FILE, 'r', encoding='utf-8') as f:
-        return f.readlines()
+        return [nfc(line) for line in f]
 
 
 def get_line_end_greek_fragment(line: str) -> str:
@@ -659,36 +704,17 @@ def post_clean_paragraph(text: str) -> str:
     return text
 
 
-def build_paragraphs(lines: list) -> list:
-    if not lines:
-        return []
-
-    paragraphs = []
-    current = []
-
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            if current:
-                paragraphs.append(' '.join(current))
-                current = []
-            continue
-
-        if current:
-            prev = current[-1]
-            prev_ends_sentence = prev.rstrip().endswith(('.', '\u00b7', ';'))
-            starts_with_capital = bool(re.match(r'^[\u0391-\u03A9\u1F08-\u1F6F\u1F88-\u1FAF]', stripped))
-            if prev_ends_sentence and starts_with_capital and len(stripped) > 20:
-                total_len = sum(len(s) for s in current)
-                if total_len > 200:
-                    paragraphs.append(' '.join(current))
-                    current = [stripped]
-                    continue
+# A capitalised line of more than 20 characters after a sentence end starts a
+# new paragraph once the current one has more than 200 characters.
+PARAGRAPHS = ParagraphModel(
+    'semeioseis-gnomikai', capital=r'[\u0391-\u03A9\u1F08-\u1F6F\u1F88-\u1FAF]',
+    terminal=('.', '\u00b7', ';'), weights={'terminal': 0.5, 'capital': 0.5},
+    min_line=20, min_chars=200,
+)
 
-        current.append(stripped)
 
-    if current:
-        paragraphs.append(' '.join(current))
+def build_paragraphs(lines: list) -> list:
+    paragraphs = list(iter_paragraphs(lines, PARAGRAPHS))
 
     # Merge very short paragraphs
     merged = []
@@ -712,8 +738,9 @@ def process_chapter(lines: list, chapter_num: int, start_line: int, end_line: in
 
     clean_lines = []
     in_footnote_block = False
+    roles = classify(raw_chapter_lines, PROFILE)
 
-    for raw_line in raw_chapter_lines:
+    for raw_line, role in zip(raw_chapter_lines, roles):
         raw_line_stripped = raw_line.rstrip('\n')
 
         if 'ΚΕΦ' in raw_line_stripped and raw_chapter_lines.index(raw_line) <= 1:
@@ -724,8 +751,8 @@ def process_chapter(lines: list, chapter_num: int, start_line: int, end_line: in
             if len(remaining) > 1 and 'VOCABULORUM' in remaining[1]:
                 break
 
-        should_remove, reason = should_remove_line(raw_line_stripped)
-        if should_remove:
+        if role != TEXT:
+            reason = ROLE_NAMES[role]
             stats[f'removed_{reason}'] += 1
             if reason in ('FOOTNOTE', 'APPARATUS', 'LATIN_EDITORIAL'):
                 in_footnote_block = True
@@ -809,16 +836,6 @@ def process_chapter(lines: list, chapter_num: int, start_line: int, end_line: in
     }
 
 
-def find_chapter_118(lines: list) -> int:
-    for i in range(8400, 8770):
-        if i >= len(lines):
-            break
-        line = lines[i].strip()
-        if 'ΚΕΦ' in line and 'ριη' in line:
-            return i
-    return -1
-
-
 def main():
     print("=" * 60)
     print("Semeioseis Gnomikai Cleaning Pipeline V4 (FINAL)")
@@ -827,32 +844,27 @@ def main():
     lines = read_raw_file()
     print(f"Read {len(lines)} lines from {RAW_FILE}")
 
-    ch118_line = find_chapter_118(lines)
-    chapter_map = list(CHAPTER_LINE_MAP)
-    if ch118_line > 0:
-        for idx, (line_num, ch_num) in enumerate(chapter_map):
-            if ch_num == 119:
-                chapter_map.insert(idx, (ch118_line, 118))
-                print(f"Found chapter 118 at line {ch118_line}")
-                break
-    else:
+    index = load_chapter_index(str(RAW_FILE), CHAPTERS)
+    for chapter in index['chapters']:
+        if chapter['source'] != 'heading':
+            print(f"Chapter {chapter['number']} {chapter['source']} at line {chapter['line']}")
+    if 118 in index['missing']:
         print("Chapter 118 not found - will not output empty chapter (V3 fix)")
+    for chapter_num, expected, found in boundary_mismatches(index, expected_chapter_lines(lines)):
+        print(f"WARNING: chapter {chapter_num} heading at line {found}, expected {expected}")
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     # V3: Remove stale chapter-118 if it exists
     ch118_file = OUTPUT_DIR / "chapter-118.json"
-    if ch118_file.exists() and ch118_line <= 0:
+    if ch118_file.exists() and 118 in index['missing']:
         ch118_file.unlink()
         print("Removed empty chapter-118.json")
 
-    for i, (start_line_1indexed, chapter_num) in enumerate(chapter_map):
-        start_line = start_line_1indexed - 1
-
-        if i + 1 < len(chapter_map):
-            end_line = chapter_map[i + 1][0] - 1
-        else:
-            end_line = len(lines)
+    ranges = chapter_ranges(index, len(lines), include_heading=True)
+    writer = ChapterWriter()
+    for i, (chapter_num, start_line, end_line) in enumerate(ranges):
+        if i + 1 == len(ranges):
             for j in range(start_line, len(lines)):
                 if 'INDEX' in lines[j]:
                     end_line = j
@@ -866,19 +878,19 @@ def main():
             continue
 
         output_file = OUTPUT_DIR / f"chapter-{chapter_num:03d}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(chapter_data, f, ensure_ascii=False, indent=2)
+        writer.write(output_file, chapter_data)
 
         para_count = len(chapter_data['sourceContent']['paragraphs'])
         title_preview = chapter_data['title'][:60]
         print(f"  Chapter {chapter_num:3d}: {para_count:2d} paragraphs | {title_preview}")
+    writer.close()
 
     print("\n" + "=" * 60)
     print("STATISTICS")
     print("=" * 60)
     for key, value in sorted(stats.items()):
         print(f"  {key}: {value}")
-    print(f"\nOutput written to: {OUTPUT_DIR}")
+    print(f"\nOutput written to: {OUTPUT_DIR} ({writer.summary()})")
 
     # Run validation
     print("\n" + "=" * 60)
@@ -3,7 +3,9 @@ Detection functions for identifying contamination lines in Semeioseis Gnomikai -
 Same as V2 but with improved Latin editorial detection.
 """
 
+import os
 import re
+import sys
 from patterns import (
     PAGE_HEADER, FOOTNOTE_START, FOOTNOTE_START_STAR, FOOTNOTE_CONTINUATION,
     MANUSCRIPT_SIGLA, LATIN_APPARATUS, ARABIC_SCRIPT, HEBREW_SCRIPT,
@@ -12,6 +14,10 @@ from patterns import (
     has_greek, greek_ratio, GREEK_CHARS
 )
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ocr-lines'))
+import classify
+from classify import Profile, rule
+
 
 def is_page_header(line: str) -> bool:
     return bool(PAGE_HEADER.match(line))
@@ -143,21 +149,23 @@ def is_index_line(line: str) -> bool:
     return False
 
 
+# Removal reasons in priority order; role names double as the reason strings
+# reported in the cleaner's stats. Lines are classified as-is (not stripped),
+# blank lines count as OCR noise.
+PROFILE = Profile('semeioseis-gnomikai', [
+    rule(classify.PAGE_HEADER, PAGE_HEADER),
+    rule(classify.PAGE_NUMBER, STANDALONE_PAGE_NUM),
+    rule(classify.FOOTNOTE, is_footnote_line),
+    rule(classify.APPARATUS, is_apparatus_line),
+    rule(classify.LATIN_EDITORIAL, is_latin_editorial),
+    rule(classify.FOREIGN_SCRIPT, is_arabic_or_foreign),
+    rule(classify.OCR_NOISE, is_ocr_noise),
+    rule(classify.INDEX, is_index_line),
+], strip=False, blank=classify.OCR_NOISE)
+
+
 def should_remove_line(line: str) -> tuple:
-    if is_page_header(line):
-        return True, 'PAGE_HEADER'
-    if is_standalone_page_number(line):
-        return True, 'PAGE_NUMBER'
-    if is_footnote_line(line):
-        return True, 'FOOTNOTE'
-    if is_apparatus_line(line):
-        return True, 'APPARATUS'
-    if is_latin_editorial(line):
-        return True, 'LATIN_EDITORIAL'
-    if is_arabic_or_foreign(line):
-        return True, 'FOREIGN_SCRIPT'
-    if is_ocr_noise(line):
-        return True, 'OCR_NOISE'
-    if is_index_line(line):
-        return True, 'INDEX'
-    return False, ''
+    role = PROFILE.role(line)
+    if role == classify.TEXT:
+        return False, ''
+    return True, classify.ROLE_NAMES[role]
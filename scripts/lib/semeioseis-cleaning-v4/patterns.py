@@ -8,7 +8,12 @@ V3 FIXES:
 4. Empty chapter 118 removal
 """
 
+import os
 import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from unicode_scripts import ratio
 
 # --- Page headers ---
 PAGE_HEADER = re.compile(
@@ -208,14 +213,14 @@ GREEK_CHARS = re.compile(r'[\u0370-\u03FF\u1F00-\u1FFF]')
 def has_greek(text: str) -> bool:
     return bool(GREEK_CHARS.search(text))
 
+# The Greek blocks plus the two combining-diacritics blocks (not Inherited,
+# which is every combining mark of any script).
+GREEK_OR_MARK = re.compile(r'[\u0370-\u03FF\u1F00-\u1FFF\u0300-\u036F\u1DC0-\u1DFF]')
+
 def greek_ratio(text: str) -> float:
-    if not text.strip():
-        return 0.0
-    greek = len(GREEK_CHARS.findall(text))
-    alpha = len(re.findall(r'[a-zA-Z\u0370-\u03FF\u1F00-\u1FFF]', text))
-    if alpha == 0:
-        return 0.0
-    return greek / alpha
+    """Greek share of the Greek-block characters and ASCII letters, the counts
+    the thresholds were tuned on."""
+    return ratio(text, 'Greek', among=('Greek', 'Latin'), ascii_latin=True)
 
 def is_greek_char(c: str) -> bool:
     """Check if a single character is Greek (including combining marks)."""
@@ -226,4 +231,4 @@ def is_greek_char(c: str) -> bool:
             0x1DC0 <= cp <= 0x1DFF)
 
 def greek_char_count(text: str) -> int:
-    return sum(1 for c in text if is_greek_char(c))
+    return len(GREEK_OR_MARK.findall(text))
@@ -3,9 +3,9 @@ Quality verification for cleaned Semeioseis Gnomikai output - V3.
 V3 adds: unhyphenated broken word detection, Latin word detection in body text.
 """
 
+import os
 import re
-import json
-from pathlib import Path
+import sys
 from patterns import (
     MANUSCRIPT_SIGLA, LATIN_APPARATUS, PAGE_HEADER, ARABIC_SCRIPT,
     HEBREW_SCRIPT, GREEK_CHARS, has_greek, greek_ratio,
@@ -18,6 +18,9 @@ from patterns import (
 
 from patterns import VALID_SHORT_GREEK
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed-chapters'))
+from corpus import Chapter, iter_chapters
+
 
 def detect_unhyphenated_breaks(text: str) -> list:
     """
@@ -219,15 +222,14 @@ def check_title_markers(title: str) -> list:
     return issues
 
 
-def validate_chapter(chapter_data: dict) -> dict:
-    paragraphs = chapter_data.get('sourceContent', {}).get('paragraphs', [])
+def validate_chapter(chapter: Chapter) -> dict:
+    paragraphs = chapter.texts()
     contamination = check_contamination(paragraphs)
     coherence = check_paragraph_coherence(paragraphs)
-    title = chapter_data.get('title', '')
-    title_issues = check_title_markers(title)
+    title_issues = check_title_markers(chapter.title)
     return {
-        'chapterNumber': chapter_data.get('chapterNumber'),
-        'title': title,
+        'chapterNumber': chapter.number,
+        'title': chapter.title,
         'paragraph_count': len(paragraphs),
         'contamination': contamination,
         'coherence': coherence,
@@ -236,7 +238,6 @@ def validate_chapter(chapter_data: dict) -> dict:
 
 
 def validate_all_chapters(output_dir: str) -> dict:
-    output_path = Path(output_dir)
     results = {
         'chapters': [],
         'total_paragraphs': 0,
@@ -248,10 +249,8 @@ def validate_all_chapters(output_dir: str) -> dict:
         'overall_contamination_rate': 0,
     }
 
-    for chapter_file in sorted(output_path.glob('chapter-*.json')):
-        with open(chapter_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        validation = validate_chapter(data)
+    for chapter in iter_chapters(output_dir):
+        validation = validate_chapter(chapter)
         results['chapters'].append(validation)
         results['total_paragraphs'] += validation['paragraph_count']
         results['total_contaminated'] += validation['contamination']['contaminated']
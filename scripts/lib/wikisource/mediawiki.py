@@ -0,0 +1,160 @@
+"""
+Batched MediaWiki API client for Wikisource texts.
+
+Fetches raw wikitext for many pages at once through
+action=query&prop=revisions&rvprop=content (up to 50 titles per request),
+follows continuation tokens, and caches each page's wikitext on disk so a
+re-run makes no network requests at all.
+
+Usage from a process-*.py script:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'wikisource'))
+    from mediawiki import MediaWikiClient
+
+    client = MediaWikiClient.for_wikisource('cs', cache_dir='data/raw/<slug>')
+    pages = client.fetch_wikitext([f'{BASE_TITLE}/{n}' for n in ROMAN])
+"""
+
+import hashlib
+import json
+import os
+import time
+import urllib.parse
+import urllib.request
+
+USER_AGENT = "TranslationWiki/1.0"
+MAX_TITLES_PER_REQUEST = 50
+
+
+def wikisource_api(lang: str) -> str:
+    """API endpoint for a language edition of Wikisource (cs, zh, la, ...)."""
+    return f"https://{lang}.wikisource.org/w/api.php"
+
+
+def subpage_titles(base: str, names) -> list[str]:
+    """Build 'Base/Name' subpage titles, e.g. chapters named by Roman numerals."""
+    return [f"{base}/{name}" for name in names]
+
+
+class MediaWikiClient:
+    def __init__(self, api_url: str, cache_dir: str | None = None,
+                 user_agent: str = USER_AGENT, delay: float = 1.0,
+                 batch_size: int = MAX_TITLES_PER_REQUEST, timeout: int = 60):
+        self.api_url = api_url
+        self.cache_dir = cache_dir
+        self.user_agent = user_agent
+        self.delay = delay
+        self.batch_size = min(batch_size, MAX_TITLES_PER_REQUEST)
+        self.timeout = timeout
+        self.requests_made = 0
+
+    @classmethod
+    def for_wikisource(cls, lang: str, **kwargs) -> "MediaWikiClient":
+        return cls(wikisource_api(lang), **kwargs)
+
+    # --- Cache ---
+
+    def _cache_path(self, title: str) -> str:
+        # Keyed on the wiki too: the same title on two wikis is two pages.
+        digest = hashlib.sha1(f"{self.api_url}\n{title}".encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"{digest}.wiki")
+
+    def _read_cache(self, title: str) -> str | None:
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(title)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _write_cache(self, title: str, text: str):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(title)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    # --- HTTP ---
+
+    def _post(self, params: dict) -> dict:
+        if self.requests_made and self.delay:
+            time.sleep(self.delay)
+        body = urllib.parse.urlencode(params).encode('utf-8')
+        req = urllib.request.Request(self.api_url, data=body, headers={
+            "User-Agent": self.user_agent,
+            "Content-Type": "application/x-www-form-urlencoded",
+        })
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            data = json.loads(resp.read())
+        self.requests_made += 1
+        if 'error' in data:
+            raise RuntimeError(f"MediaWiki API error: {data['error'].get('info', data['error'])}")
+        return data
+
+    def _query_batch(self, titles: list[str]) -> dict[str, str | None]:
+        """Fetch one batch of titles, following 'continue' until complete."""
+        params = {
+            "action": "query",
+            "prop": "revisions",
+            "rvprop": "content",
+            "rvslots": "main",
+            "redirects": "1",
+            "titles": "|".join(titles),
+            "format": "json",
+            "formatversion": "2",
+        }
+        # Map the title the API reports back to the title we asked for.
+        resolved = {t: t for t in titles}
+        content: dict[str, str] = {}
+        cont: dict = {}
+        while True:
+            data = self._post({**params, **cont})
+            query = data.get('query', {})
+            for step in ('normalized', 'redirects'):
+                for entry in query.get(step, []):
+                    for asked, current in resolved.items():
+                        if current == entry['from']:
+                            resolved[asked] = entry['to']
+            for page in query.get('pages', []):
+                revisions = page.get('revisions')
+                if page.get('missing') or page.get('invalid') or not revisions:
+                    continue
+                rev = revisions[0]
+                text = rev['slots']['main']['content'] if 'slots' in rev else rev.get('content')
+                if text is not None:
+                    content[page['title']] = text
+            if 'continue' not in data:
+                break
+            cont = data['continue']
+        return {asked: content.get(current) for asked, current in resolved.items()}
+
+    # --- Public API ---
+
+    def fetch_wikitext(self, titles) -> dict[str, str | None]:
+        """Return {title: wikitext} for every title, None for missing pages.
+
+        Cached pages are served from disk; the rest are requested in batches.
+        """
+        titles = list(dict.fromkeys(titles))
+        result: dict[str, str | None] = {}
+        pending = []
+        for title in titles:
+            cached = self._read_cache(title)
+            if cached is None:
+                pending.append(title)
+            else:
+                result[title] = cached
+        for i in range(0, len(pending), self.batch_size):
+            batch = self._query_batch(pending[i:i + self.batch_size])
+            for title, text in batch.items():
+                if text is not None:
+                    self._write_cache(title, text)
+                result[title] = text
+        return {title: result.get(title) for title in titles}
+
+    def fetch_one(self, title: str) -> str | None:
+        return self.fetch_wikitext([title])[title]
@@ -0,0 +1,207 @@
+"""
+Wikitext-to-paragraph converter for Wikisource pages.
+
+One compiled tokenizer regex drives a single left-to-right pass with a frame
+stack, so nested templates ({{a|{{b}}}}), links inside link captions, refs
+containing templates, <poem> and <br> are handled without the sequential
+re.sub chain (and its non-nesting {{[^}]*}} template pattern).
+
+Conventions match the original process-broucek.py clean_wikitext():
+- templates, refs, comments, categories, files and interwiki links are dropped
+- [[target|display]] -> display, [[target]] -> target, [url label] -> label
+- bold/italic quotes and remaining HTML tags are removed, <br> is a newline
+- heading (== x ==) and ---- lines act as blank lines
+- lines are stripped; blank lines separate paragraphs, lines are joined by ' '
+
+The old chain's pass order is kept too: templates and links go first, then
+quotes and <poem>, then the heading test, then refs, comments and other tags,
+then the ---- test. So "<center>== x ==" and "== x ==<!-- c -->" stay text,
+"== x =={{t}}" is a heading, and "'{{t}}'" loses its quotes. _scan() leaves a
+marker where a tag, ref or comment was so the line tests can see them.
+"""
+
+import re
+
+_TOKENS = r"\{\{|\}\}|\[\[|\]\]|\[(?=https?://|//)|<!--|</?[A-Za-z][^<>]*>"
+TOKEN_RE = re.compile(_TOKENS)
+# Inside an external link a single "]" closes it as well.
+EXTLINK_TOKEN_RE = re.compile(_TOKENS + r"|\]")
+TAG_NAME_RE = re.compile(r"</?\s*([A-Za-z]+)")
+
+CATEGORY_NAMESPACES = {
+    'category', 'kategorie', 'kategoria', 'categoria', 'catégorie', '分类', '分類',
+}
+FILE_NAMESPACES = {
+    'file', 'image', 'soubor', 'obrázek', 'plik', 'imago', 'fasciculus',
+    'fichier', 'immagine', '文件', '檔案', '图像', '圖像',
+}
+
+LINK, EXTLINK = 'link', 'extlink'
+# Left by _scan() where the old chain removed something only after its heading
+# test (refs, comments, tags) or before it (<poem>); control characters, like
+# MediaWiki's own strip markers, so they cannot clash with page text.
+DROPPED, POEM = '\x7f', '\x1f'
+BRACES_RE = re.compile(r"\{\{|\}\}")
+REF_CLOSE_RE = re.compile(r"</\s*ref\s*>", re.IGNORECASE)
+
+
+def _resolve_link(content: str) -> str:
+    """Text shown for [[content]]; '' for categories, files and interwikis."""
+    if content.startswith(':'):
+        content = content[1:]
+    else:
+        prefix, colon, _ = content.partition(':')
+        if colon:
+            ns = prefix.strip().lower()
+            if ns in CATEGORY_NAMESPACES or ns in FILE_NAMESPACES:
+                return ''
+            if 2 <= len(ns) <= 3 and ns.isascii() and ns.isalpha():
+                return ''
+    target, pipe, display = content.partition('|')
+    return display if pipe else target
+
+
+def _resolve_extlink(content: str) -> str:
+    _, space, label = content.partition(' ')
+    return label if space else ''
+
+
+def _is_heading(line: str) -> bool:
+    """Heading (== x ==) lines; a trailing tag or comment marker is not '='."""
+    return line.startswith('=') and line.rstrip().endswith('=') and len(line.strip()) > 1
+
+
+def _is_rule(line: str) -> bool:
+    """Horizontal rule (----) lines."""
+    return line.startswith('----') and not line.strip('-').strip()
+
+
+def _template_end(text: str, pos: int) -> int:
+    """Index just past the '}}' closing a template opened before pos, or -1."""
+    end = text.find('}}', pos)
+    if end != -1 and text.find('{{', pos, end) == -1:
+        return end + 2
+    depth = 1
+    for m in BRACES_RE.finditer(text, pos):
+        depth += 1 if m.group() == '{{' else -1
+        if depth == 0:
+            return m.end()
+    return -1
+
+
+def _scan(text: str) -> str:
+    """Tokenize text into its visible text, newlines kept.
+
+    Templates, refs and comments are skipped in place (their ends found with
+    a nesting-aware brace scan or a single find), so the frame stack only
+    ever holds links whose captions still need resolving. Refs, comments and
+    tags leave DROPPED behind, <poem> tags POEM (see iter_paragraphs).
+    """
+    out = []
+    stack = []         # (kind, buf) for open [[...]] / [http...] links
+    buf = out
+    token_re = TOKEN_RE
+    pos = 0
+    n = len(text)
+
+    while pos < n:
+        m = token_re.search(text, pos)
+        if m is None:
+            buf.append(text[pos:])
+            break
+        start = m.start()
+        if start > pos:
+            buf.append(text[pos:start])
+        tok = m.group()
+        pos = m.end()
+
+        if tok == '{{':
+            end = _template_end(text, pos)
+            if end == -1:
+                buf.append(tok)  # unbalanced {{ is plain text in MediaWiki
+            else:
+                pos = end
+        elif tok == '[[':
+            end = text.find(']]', pos)
+            inner = text[pos:end] if end != -1 else ''
+            if end != -1 and '[' not in inner and '{' not in inner and '<' not in inner:
+                buf.append(_resolve_link(inner))
+                pos = end + 2
+            else:
+                stack.append((LINK, buf))
+                buf = []
+        elif tok == '[':
+            stack.append((EXTLINK, buf))
+            buf = []
+            token_re = EXTLINK_TOKEN_RE
+        elif tok == ']]' or tok == ']':
+            kind = stack[-1][0] if stack else None
+            if kind is LINK and tok == ']]':
+                text_shown = _resolve_link(''.join(buf))
+            elif kind is EXTLINK:
+                text_shown = _resolve_extlink(''.join(buf))
+                if tok == ']]':
+                    text_shown += ']'  # "[http://x label]]": keep the stray "]"
+            else:
+                buf.append(tok)
+                continue
+            _, buf = stack.pop()
+            buf.append(text_shown)
+            token_re = EXTLINK_TOKEN_RE if stack and stack[-1][0] is EXTLINK else TOKEN_RE
+        elif tok == '}}':
+            buf.append(tok)
+        elif tok == '<!--':
+            end = text.find('-->', pos)
+            pos = n if end == -1 else end + 3
+            buf.append(DROPPED)
+        else:
+            name_match = TAG_NAME_RE.match(tok)
+            name = name_match.group(1).lower() if name_match else ''
+            if name == 'ref' and not tok.startswith('</') and not tok.endswith('/>'):
+                close = REF_CLOSE_RE.search(text, pos)
+                pos = n if close is None else close.end()
+                buf.append(DROPPED)
+            elif name == 'br':
+                buf.append('\n')
+            else:
+                # <poem> and every other tag: drop the tag, keep its content
+                buf.append(POEM if name == 'poem' else DROPPED)
+
+    # Unclosed links fall back to their literal text.
+    while stack:
+        kind, parent = stack.pop()
+        parent.append(('[[' if kind is LINK else '[') + ''.join(buf))
+        buf = parent
+    return ''.join(out)
+
+
+def iter_paragraphs(text: str):
+    """Yield cleaned paragraphs from a page's wikitext."""
+    text = _scan(text)
+    # Quotes go after templates and links but while tags are still markers,
+    # so "'{{t}}'" and "'<ref/>''" come out as the old chain had them.
+    if "''" in text:
+        text = text.replace("'''", '').replace("''", '')
+    if POEM in text:
+        text = text.replace(POEM, '')
+    has_dropped = DROPPED in text
+    current = []
+    for line in text.split('\n'):
+        if line[:1] == '=' and _is_heading(line):
+            line = ''
+        elif has_dropped and DROPPED in line:
+            line = line.replace(DROPPED, '')
+        if line[:1] == '-' and _is_rule(line):
+            line = ''
+        line = line.strip()
+        if line:
+            current.append(line)
+        elif current:
+            yield ' '.join(current)
+            current = []
+    if current:
+        yield ' '.join(current)
+
+
+def wikitext_to_paragraphs(text: str) -> list[str]:
+    return list(iter_paragraphs(text))
@@ -2,26 +2,28 @@
 """Process Nový epochální výlet pana Broučka from Czech Wikisource."""
 
 import json
+import os
 import re
+import sys
 import time
-import urllib.request
-import urllib.parse
 
-BASE = "https://cs.wikisource.org/w/api.php"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'wikisource'))
+from mediawiki import MediaWikiClient, subpage_titles
+from wikitext import wikitext_to_paragraphs
+
 SLUG = "novy-epochalni-vylet-pana-broucka"
 OUT_DIR = "data/processed/novy-epochalni-vylet-pana-broucka"
+RAW_DIR = f"data/raw/{SLUG}"
+BASE_TITLE = "Nový epochální výlet pana Broučka, tentokráte do XV. století"
 
 ROMAN = ["I","II","III","IV","V","VI","VII","VIII","IX","X","XI","XII","XIII","XIV"]
 
-def fetch_wikitext(subpage):
-    page = f"Nový epochální výlet pana Broučka, tentokráte do XV. století/{subpage}"
-    url = f"{BASE}?action=parse&page={urllib.parse.quote(page, safe='')}&prop=wikitext&format=json"
-    req = urllib.request.Request(url, headers={"User-Agent": "TranslationWiki/1.0"})
-    with urllib.request.urlopen(req) as resp:
-        data = json.loads(resp.read())
-    return data["parse"]["wikitext"]["*"]
+def clean_wikitext_regex(text):
+    """Original sequential re.sub chain, kept as the --bench baseline.
 
-def clean_wikitext(text):
+    Breaks on nested templates and lets <ref name=x/> swallow text up to the
+    next </ref>; wikitext_to_paragraphs() handles both.
+    """
     # Remove templates like {{...}}
     text = re.sub(r'\{\{[^}]*\}\}', '', text)
     # Remove categories
@@ -67,28 +69,61 @@ def clean_wikitext(text):
     paragraphs = [p.strip() for p in paragraphs if p.strip()]
     return paragraphs
 
-for i, numeral in enumerate(ROMAN):
-    ch_num = i + 1
-    print(f"Fetching chapter {ch_num} ({numeral})...")
-    wikitext = fetch_wikitext(numeral)
-    paragraphs = clean_wikitext(wikitext)
-
-    chapter = {
-        "chapterNumber": ch_num,
-        "title": numeral,
-        "sourceContent": {
-            "paragraphs": [
-                {"index": idx, "text": p}
-                for idx, p in enumerate(paragraphs)
-            ]
+def fetch_all():
+    # All 14 subpages come back in a single batched API request (cached under RAW_DIR)
+    client = MediaWikiClient.for_wikisource('cs', cache_dir=RAW_DIR)
+    titles = subpage_titles(BASE_TITLE, ROMAN)
+    print(f"Fetching {len(titles)} chapters...")
+    wikitexts = client.fetch_wikitext(titles)
+    print(f"  {client.requests_made} API request(s)")
+    return titles, wikitexts
+
+
+def bench(wikitexts, rounds=20):
+    """Time the regex chain against the tokenizer over the fetched chapters."""
+    pages = [w for w in wikitexts.values() if w is not None]
+    for name, fn in (("regex chain", clean_wikitext_regex), ("tokenizer", wikitext_to_paragraphs)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            paragraphs = [fn(w) for w in pages]
+        elapsed = (time.perf_counter() - start) / rounds
+        total = sum(len(p) for p in paragraphs)
+        print(f"  {name:12s} {elapsed * 1000:8.2f} ms/run, {total} paragraphs")
+
+
+def main():
+    titles, wikitexts = fetch_all()
+    if '--bench' in sys.argv:
+        bench(wikitexts)
+        return
+
+    for i, (numeral, title) in enumerate(zip(ROMAN, titles)):
+        ch_num = i + 1
+        wikitext = wikitexts[title]
+        if wikitext is None:
+            print(f"  Chapter {ch_num} ({numeral}): page missing, skipped")
+            continue
+        paragraphs = wikitext_to_paragraphs(wikitext)
+
+        chapter = {
+            "chapterNumber": ch_num,
+            "title": numeral,
+            "sourceContent": {
+                "paragraphs": [
+                    {"index": idx, "text": p}
+                    for idx, p in enumerate(paragraphs)
+                ]
+            }
         }
-    }
 
-    outfile = f"{OUT_DIR}/chapter-{ch_num:03d}.json"
-    with open(outfile, 'w', encoding='utf-8') as f:
-        json.dump(chapter, f, ensure_ascii=False, indent=2)
+        outfile = f"{OUT_DIR}/chapter-{ch_num:03d}.json"
+        with open(outfile, 'w', encoding='utf-8') as f:
+            json.dump(chapter, f, ensure_ascii=False, indent=2)
+
+        print(f"  Chapter {ch_num}: {len(paragraphs)} paragraphs")
+
+    print("Done!")
 
-    print(f"  Chapter {ch_num}: {len(paragraphs)} paragraphs")
-    time.sleep(1)
 
-print("Done!")
+if __name__ == '__main__':
+    main()
@@ -3,20 +3,29 @@
 Process Gregory's Carmina de se ipso from PDF.
 
 This script:
-1. Extracts text from PDF using pdftotext
+1. Extracts text from PDF using pdftotext, in page-range chunks run
+   concurrently (pdftotext -f/-l); each page's text is cached under the PDF's
+   hash, so re-running after a cleaning tweak never re-extracts the PDF
 2. Removes page footers and headers
 3. Identifies poem sections by Greek numeral markers (Αʹ., Βʹ., etc.)
 4. Splits continuous text into verse groups using Migne line numbers
 5. Outputs structured JSON for each poem/chapter
+
+    python3 scripts/process-carmina-de-se-ipso.py [--jobs N]
 """
 
+import hashlib
 import json
 import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib', 'processed-chapters'))
+from cli import option
+
 # Directories
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -24,6 +33,9 @@ RAW_DIR = PROJECT_ROOT / "data" / "raw" / "gregory-greekdownloads"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "processed" / "gregory-carmina"
 
 PDF_FILE = RAW_DIR / "carmina-de-se-ipso.pdf"
+# Per-page pdftotext output: <PAGE_CACHE_DIR>/<PDF sha1>/page-NNNN.txt
+PAGE_CACHE_DIR = RAW_DIR / "carmina-de-se-ipso.pages"
+PAGES_PER_CHUNK = 16
 
 # Footer patterns to remove
 FOOTER_PATTERNS = [
@@ -41,6 +53,8 @@ FOOTER_PATTERNS = [
     r'Τμήμα Πολιτισμικής Τεχνολογίας',
     r'^\s*\d+\s*$',  # Page numbers alone
 ]
+# One case-insensitive alternation: a line is a footer if any pattern matches
+FOOTER_RE = re.compile('|'.join(f'(?:{p})' for p in FOOTER_PATTERNS), re.IGNORECASE)
 
 # Greek numeral sign (U+0374)
 NUMERAL_SIGN = '\u0374'
@@ -55,18 +69,79 @@ POEM_MARKER_PATTERN = re.compile(
 LINE_NUMBER_PATTERN = re.compile(r'(?<!\d)\s+(\d{3,4})\s+(?=[Α-Ωα-ωἀ-ῶά-ώ])')
 
 
-def extract_pdf_text(pdf_path: Path) -> str:
-    """Extract text from PDF using pdftotext."""
-    result = subprocess.run(
-        ['pdftotext', '-layout', str(pdf_path), '-'],
-        capture_output=True,
-        text=True
-    )
+def _run(args: list) -> str:
+    result = subprocess.run(args, capture_output=True, text=True)
     if result.returncode != 0:
-        raise RuntimeError(f"pdftotext failed: {result.stderr}")
+        raise RuntimeError(f"{args[0]} failed: {result.stderr}")
     return result.stdout
 
 
+def pdf_sha1(pdf_path: Path) -> str:
+    sha1 = hashlib.sha1()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def pdf_page_count(pdf_path: Path) -> int:
+    m = re.search(r'^Pages:\s+(\d+)', _run(['pdfinfo', str(pdf_path)]), re.MULTILINE)
+    if not m:
+        raise RuntimeError(f"pdfinfo reported no page count for {pdf_path}")
+    return int(m.group(1))
+
+
+def extract_page_range(pdf_path: Path, first: int, last: int) -> list[str]:
+    """Text of pages first..last, each ending with the form feed pdftotext puts after a page."""
+    out = _run(['pdftotext', '-layout', '-f', str(first), '-l', str(last), str(pdf_path), '-'])
+    pages = out.split('\f')
+    if len(pages) != last - first + 2:
+        raise RuntimeError(f"pdftotext returned {len(pages) - 1} pages for {first}-{last}")
+    return [page + '\f' for page in pages[:-1]]
+
+
+def extract_pdf_text(pdf_path: Path, jobs: int = os.cpu_count() or 1) -> str:
+    """Extract text from PDF using pdftotext, one cached file per page.
+
+    Uncached pages are extracted in runs of consecutive pages (at most
+    PAGES_PER_CHUNK, fewer when that keeps all `jobs` pdftotext processes
+    busy). The result is the same text a single whole-document
+    pdftotext -layout run gives.
+    """
+    cache_dir = PAGE_CACHE_DIR / pdf_sha1(pdf_path)
+    page_count = pdf_page_count(pdf_path)
+
+    def page_file(n: int) -> Path:
+        return cache_dir / f"page-{n:04d}.txt"
+
+    missing = [n for n in range(1, page_count + 1) if not page_file(n).exists()]
+
+    if missing:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        size = max(1, min(PAGES_PER_CHUNK, -(-len(missing) // max(1, jobs))))
+        chunks = []
+        for n in missing:
+            if chunks and n == chunks[-1][1] + 1 and n - chunks[-1][0] < size:
+                chunks[-1][1] = n
+            else:
+                chunks.append([n, n])
+        print(f"  Extracting {len(missing)}/{page_count} pages in {len(chunks)} chunks")
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            results = pool.map(lambda c: (c[0], extract_page_range(pdf_path, c[0], c[1])), chunks)
+            for first, pages in results:
+                for n, text in enumerate(pages, first):
+                    tmp = page_file(n).with_suffix('.tmp')
+                    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+                        f.write(text)
+                    os.replace(tmp, page_file(n))
+
+    text = []
+    for n in range(1, page_count + 1):
+        with open(page_file(n), 'r', encoding='utf-8', newline='') as f:
+            text.append(f.read())
+    return ''.join(text)
+
+
 def clean_text(text: str) -> str:
     """Remove footers, headers, and normalize whitespace."""
     lines = text.split('\n')
@@ -74,12 +149,7 @@ def clean_text(text: str) -> str:
 
     for line in lines:
         # Skip footer lines
-        skip = False
-        for pattern in FOOTER_PATTERNS:
-            if re.search(pattern, line, re.IGNORECASE):
-                skip = True
-                break
-        if skip:
+        if FOOTER_RE.search(line):
             continue
 
         # Skip mostly empty lines that are just page numbers
@@ -216,7 +286,7 @@ def greek_numeral_to_int(marker: str) -> int:
     return 0
 
 
-def process_carmina():
+def process_carmina(jobs: int = os.cpu_count() or 1):
     """Main processing function."""
     print(f"Processing: {PDF_FILE}")
 
@@ -229,7 +299,7 @@ def process_carmina():
 
     # Extract and clean text
     print("Extracting PDF text...")
-    raw_text = extract_pdf_text(PDF_FILE)
+    raw_text = extract_pdf_text(PDF_FILE, jobs)
     print(f"  Extracted {len(raw_text):,} characters")
 
     print("Cleaning text...")
@@ -294,4 +364,5 @@ def process_carmina():
 
 
 if __name__ == "__main__":
-    process_carmina()
+    argv = sys.argv[1:]
+    process_carmina(option(argv, '--jobs', int, os.cpu_count() or 1))
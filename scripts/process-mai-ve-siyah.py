@@ -2,17 +2,41 @@
 """
 Process OCR'd Turkish novel "Mai ve Siyah" by Halit Ziya Uşaklıgil.
 Reads raw text, splits into chapters, cleans OCR artifacts, outputs JSON.
+
+The paragraph fixes that used to be separate fix passes over the written JSON
+(rn->m misreads, chapter 20 spacing, editorial footnotes, truncated endings,
+fused footnote markers) run as POST_STAGES before each chapter is written.
+
+    python3 scripts/process-mai-ve-siyah.py              # raw text -> JSON
+    python3 scripts/process-mai-ve-siyah.py --post-only  # re-apply POST_STAGES to the JSON
 """
 
-import json
 import os
 import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+from chapters import boundary_mismatches, chapter_ranges, load_chapter_index
+from classify import SECTION_BREAK, TEXT, iter_classified
+from paragraphs import iter_paragraphs
+from poststages import PostStage, PostStages, literal, pattern, report
+from profiles import MAI_VE_SIYAH, MAI_VE_SIYAH_CHAPTERS, MAI_VE_SIYAH_PARAGRAPHS
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'processed-chapters'))
+from corpus import chapter_files, read_chapter
+from unicode_scripts import nfc
+from writer import ChapterWriter
 
 RAW_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'mai_ve_saiyah', 'mai_ve_saiyah.txt')
 OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed', 'mai-ve-siyah')
 
-# Chapter marker lines (1-indexed). These are standalone numbers with NO trailing space.
-# Chapter 9 marker is missing from OCR; we place it at line 3308 based on content analysis.
+# Chapter markers (standalone numbers with no trailing space, plus an anchor
+# for the missing chapter 9 marker) are found by MAI_VE_SIYAH_CHAPTERS and
+# cached next to RAW_FILE as mai_ve_saiyah.chapters.json.
+
+# The marker lines (1-indexed) as they were hand-placed for this OCR run;
+# chapter 9 at line 3308 by content analysis. process() warns when the index
+# disagrees, and tests/python/test_chapters.py checks them.
 CHAPTER_LINES = {
     1: 75, 2: 330, 3: 499, 4: 630, 5: 1094, 6: 1903,
     7: 2209, 8: 2822, 9: 3308, 10: 3763, 11: 3990, 12: 4214,
@@ -20,41 +44,114 @@ CHAPTER_LINES = {
     18: 6651, 19: 7459, 20: 7760
 }
 
-# Page numbers appear as standalone numbers with trailing space (e.g. "1 ", "253 ")
-# Also some footnote lines to skip
-PAGE_NUM_RE = re.compile(r'^\d{1,3}\s*\.?\s*$')
-ROMAN_RE = re.compile(r'^[IVXLCivxlc]+\s*$')
-# Footnote patterns: start with digit(s) + space + short explanation text
-FOOTNOTE_RE = re.compile(r'^\d\s+\S')
-# Section break
-SECTION_BREAK_RE = re.compile(r'^\*\*\*\s*$')
+# Page numbers (standalone numbers, roman numerals), footnote lines and ***
+# section breaks are recognised by the MAI_VE_SIYAH profile in lib/ocr-lines.
+
+# --- Post-stages (run on each chapter's paragraphs, in this order) ---
+
+POST_STAGES = PostStages()
+
+# Systematic OCR 'rn' -> 'm' misread: Cernil -> Cemil, Nazrni -> Nazmi
+POST_STAGES.register(PostStage('rn-to-m', [
+    literal('Cernil', 'Cemil'),
+    literal('Nazrni', 'Nazmi'),
+    literal('cernil', 'cemil'),
+]))
+
+# Broken word spacing in chapter 20
+POST_STAGES.register(PostStage('ch20-spacing', [
+    literal(old, new) for old, new in (
+        ("duva r", "duvar"),
+        ("Cihangi r", "Cihangir"),
+        ("cam i ierin", "camilerin"),
+        ("fı sk i ye", "fıskiye"),
+        ("Üsküda r", "Üsküdar"),
+        ("M a rma ra", "Marmara"),
+        ("y iiksekte", "yüksekte"),
+        ("ayrı la rak", "ayrılarak"),
+        ("karanl ıın", "karanlığın"),
+        ("ii rkiitiicii", "ürkütücü"),
+        ("şekl inde", "şeklinde"),
+        ("saklanı yor", "saklanıyor"),
+        ("minarcierin", "minarelerin"),
+        ("sernalara", "semalara"),
+        ("şek linde", "şeklinde"),
+        ("sank i", "sanki"),
+        ("i lerliyor", "ilerliyor"),
+        ("tiil geçi ri lmiş", "tül geçirilmiş"),
+        ("siyahl ıklar", "siyahlıklar"),
+        ("siyahl ığın", "siyahlığın"),
+        ("lıakikatler", "hakikatler"),
+        ("k üçük", "küçük"),
+        ("bell isiz", "belirsiz"),
+        ("yuvadana yuvadana", "yuvarlanarak yuvarlanarak"),
+        ("yüzi.iyorla rıııı", "yüzüyorlarmış"),
+        ("nağmcsiyle", "nağmesiyle"),
+        ("boğu lan", "boğulan"),
+        ("kenanndan", "kenarından"),
+        ("kaynaa rak", "kaynayarak"),
+        ("gürnıüyordu", "görmüyordu"),
+        ("yokl uk", "yokluk"),
+        ("silkin di", "silkindi"),
+    )
+], chapters={20}))
+
+# Editorial footnotes that ended up inside paragraphs
+POST_STAGES.register(PostStage('editorial-footnotes', [
+    # Chapter 5: "Büht" / "beht"
+    pattern(r'\s*"Büht",\s*1938 ve 1942 baskılarında dizgi yanlışı, özgün metinde "beht"\.', '',
+            name='Büht/beht'),
+    # Chapter 4: "şuhka" note embedded mid-sentence
+    pattern(r'yakışırRomanın 1938 ve 1942 baskılarında "şuhka" yazılması yazarın gözünden kaçmış bir dizgi yaniışı olsa gerek\. Eski yazı metinde "şehka-i büka" olarak geçiyor\. dı\.',
+            'yakışırdı.', name='şuhka/şehka-i büka'),
+    # Chapter 20: "sekerat"
+    pattern(r'\s*ı\s*"Bir siyah inci yağmuru"\s*sadeleştirmesindeki\s*"sekerat"\s*kelimesinin\s*"sekerat-ı mevt"\s*gibi alınabileceği düşünülerek\.', '',
+            name='sekerat'),
+]))
+
+# Editorial apparatus markers still left in the text (reported, not changed)
+POST_STAGES.register(PostStage('editorial-markers', [
+    report(marker) for marker in (
+        "baskılarında",
+        "özgün metinde",
+        "dizgi yanlışı",
+        "sadeleştirmesindeki",
+    )
+]))
+
+# Chapter 20 fixes by paragraph index (0-based)
+POST_STAGES.register(PostStage('ch20-paragraphs', [
+    literal('malışer', 'mahşer', paragraphs={13}),
+    literal('malıfazası', 'mahfazası', paragraphs={13}),
+    literal('kuru yoı;', 'kuru yor;', paragraphs={17}),
+    literal('üslCıbunun', 'üslubunun', paragraphs={21}),
+    literal('siyah ind yağınuru', 'siyah inci yağmuru', paragraphs={25}),
+    literal('Karanl ıın', 'Karanlığın', paragraphs={27}),
+], chapters={20}))
+
+# Global OCR correction, then trailing character truncation:
+# oı; -> or;, yoı -> yor, laı -> ları, leı -> leri
+_WORD_END = r'(?=[\s,.;:!?\-\)\]\'"]|$)'
+POST_STAGES.register(PostStage('truncation', [
+    literal('malışer', 'mahşer'),
+    literal('oı;', 'or;'),
+    literal('oı.', 'or.'),
+    literal('oı,', 'or,'),
+    pattern(r'yoı' + _WORD_END, 'yor', name='yoı -> yor'),
+    pattern(r'laı' + _WORD_END, 'ları', name='laı -> ları'),
+    pattern(r'leı' + _WORD_END, 'leri', name='leı -> leri'),
+]))
+
+# Footnote markers fused to words ("kelime2,"); digits after digits are kept.
+POST_STAGES.register(PostStage('footnote-markers', [
+    pattern(r"(?<=[a-zA-ZçğıöşüÇĞİÖŞÜâîû])([1-9])(?=[\s,.;:!?\-\)\]\"\u201c\u201d']|$)", '',
+            name='letter + digit'),
+]))
 
 
 def read_raw():
     with open(RAW_FILE, 'r', encoding='utf-8') as f:
-        return f.readlines()
-
-
-def is_page_number(text):
-    """Check if a line is a standalone page number."""
-    return bool(PAGE_NUM_RE.match(text)) or bool(ROMAN_RE.match(text))
-
-
-def is_footnote_line(text, prev_text=''):
-    """
-    Detect footnote lines that appear at bottom of pages in OCR.
-    These are typically short lines starting with a digit, containing
-    bibliographic info or word definitions.
-    """
-    # Lines like "Bez peçete.", "Figüran.", "ı Korist, koro şarkıcısı."
-    # Lines like "2 İki şair."
-    # Lines like "Eskiden yazıdaki mürekkebi kuruımak için üzerine dökülen renkli, ince kwn."
-    # Footnote references embedded in text like "ı" at line end
-    if re.match(r'^[ıi12]\s+[A-ZÇĞİÖŞÜa-zçğıöşü]', text) and len(text) < 80:
-        return True
-    if re.match(r'^\d\s+(Bu konuda|Eskiyazı|Eskiden|bkz)', text):
-        return True
-    return False
+        return [nfc(line) for line in f]
 
 
 def clean_line(text):
@@ -83,97 +180,29 @@ def clean_line(text):
     return text.strip()
 
 
+def iter_text_lines(lines):
+    """Cleaned text lines, with '' for each *** section break."""
+    for raw, role in iter_classified(lines, MAI_VE_SIYAH):
+        if role == SECTION_BREAK:
+            yield ''
+        elif role == TEXT:
+            line = clean_line(raw.strip())
+            if line:
+                yield line
+
+
 def lines_to_paragraphs(lines):
     """
     Convert raw OCR lines into paragraphs.
 
-    OCR text has no blank lines between paragraphs. We detect paragraph
-    boundaries using these heuristics:
-    1. Dialogue lines starting with "- " or "-" begin new paragraphs
-    2. Section breaks (***) create paragraph boundaries
-    3. After a line ending with sentence-terminal punctuation (. ! ? ...),
-       if the next content line starts with a capital letter (Turkish or Latin),
-       it's likely a new paragraph
-    4. Short lines that end a sentence followed by a new sentence
+    OCR text has no blank lines between paragraphs. Page numbers and
+    footnotes are dropped, section breaks (***) end a paragraph, and the
+    other boundaries are scored by MAI_VE_SIYAH_PARAGRAPHS: a dialogue line
+    ("- ...") starts a new paragraph, as does a line starting with a capital
+    letter (Turkish or Latin) after one ending with . ! ? or …
     """
-    # First pass: clean lines and remove page numbers/footnotes
-    cleaned = []
-    i = 0
-    while i < len(lines):
-        text = lines[i].rstrip('\n').rstrip()
-        stripped = text.strip()
-
-        if not stripped:
-            i += 1
-            continue
-
-        if is_page_number(stripped):
-            i += 1
-            continue
-
-        if SECTION_BREAK_RE.match(stripped):
-            cleaned.append(('break', '***'))
-            i += 1
-            continue
-
-        if is_footnote_line(stripped):
-            i += 1
-            continue
-
-        # Multi-line footnotes at page bottoms — skip lines that are clearly
-        # footnote continuations (after a footnote marker, before next page number)
-
-        line = clean_line(stripped)
-        if line:
-            cleaned.append(('text', line))
-        i += 1
-
-    # Second pass: group lines into paragraphs
-    paragraphs = []
-    current_lines = []
-
-    SENTENCE_END = re.compile(r'[.!?…]\s*$|\.{3}\s*$')
-    # Turkish capital letters including İ, Ö, Ü, Ç, Ş, Ğ
-    CAPITAL_START = re.compile(r'^[A-ZÇĞİÖŞÜ]')
-    DIALOGUE_START = re.compile(r'^-\s*')
-
-    for idx, (typ, text) in enumerate(cleaned):
-        if typ == 'break':
-            # Section break — flush current paragraph
-            if current_lines:
-                paragraphs.append(' '.join(current_lines))
-                current_lines = []
-            continue
-
-        # Determine if this line starts a new paragraph
-        is_new_para = False
-
-        if not current_lines:
-            is_new_para = True
-        elif DIALOGUE_START.match(text):
-            # Dialogue always starts new paragraph
-            is_new_para = True
-        elif current_lines:
-            prev_joined = current_lines[-1] if current_lines else ''
-            # Previous line ends with sentence punctuation and this starts with capital
-            if SENTENCE_END.search(prev_joined) and CAPITAL_START.match(text):
-                is_new_para = True
-
-        if is_new_para and current_lines:
-            paragraphs.append(' '.join(current_lines))
-            current_lines = [text]
-        else:
-            current_lines.append(text)
-
-    if current_lines:
-        paragraphs.append(' '.join(current_lines))
-
-    # Post-process: fix broken words across line joins
-    # Pattern: word ending with space + next word starting lowercase (already handled by join)
-    # Also fix "oı;" -> likely "or;" or just OCR noise for periods
-
     final = []
-    for p in paragraphs:
+    for p in iter_paragraphs(iter_text_lines(lines), MAI_VE_SIYAH_PARAGRAPHS):
         # Skip very short non-content paragraphs
         if len(p) < 5:
             continue
@@ -186,25 +215,22 @@ def lines_to_paragraphs(lines):
 
 def process():
     lines = read_raw()
-    sorted_chapters = sorted(CHAPTER_LINES.items(), key=lambda x: x[1])
+    index = load_chapter_index(RAW_FILE, MAI_VE_SIYAH_CHAPTERS)
+    if index['missing']:
+        print(f"WARNING: no marker found for chapters {index['missing']}")
+    for ch_num, expected, found in boundary_mismatches(index, CHAPTER_LINES):
+        print(f"WARNING: chapter {ch_num} marker at line {found}, expected {expected}")
 
     os.makedirs(OUT_DIR, exist_ok=True)
+    writer = ChapterWriter()
     results = []
 
-    for i, (ch_num, start_line) in enumerate(sorted_chapters):
-        # start_line is 1-indexed line of the chapter marker
-        # Chapter content starts on the NEXT line
-        content_start = start_line  # 0-indexed = start_line - 1, but content is after marker so start_line
-
-        if i + 1 < len(sorted_chapters):
-            content_end = sorted_chapters[i + 1][1] - 1  # line before next marker (1-indexed)
-        else:
-            content_end = len(lines)
-
-        # Extract lines (convert to 0-indexed)
+    for ch_num, content_start, content_end in chapter_ranges(index, len(lines)):
+        # Chapter content starts on the line after the marker and ends on the
+        # line before the next marker (0-indexed slice)
         chapter_lines = lines[content_start:content_end]
 
-        paragraphs = lines_to_paragraphs(chapter_lines)
+        paragraphs = POST_STAGES.apply(ch_num, lines_to_paragraphs(chapter_lines))
 
         if not paragraphs:
             print(f"WARNING: Chapter {ch_num} has no paragraphs!")
@@ -217,17 +243,37 @@ def process():
 
         filename = f"chapter-{ch_num:03d}.json"
         filepath = os.path.join(OUT_DIR, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(chapter_data, f, ensure_ascii=False, indent=2)
+        writer.write(filepath, chapter_data)
 
         results.append((ch_num, len(paragraphs), filename))
         print(f"Chapter {ch_num:2d}: {len(paragraphs):3d} paragraphs -> {filename}")
 
-    print(f"\nTotal: {len(results)} chapters processed")
+    writer.close()
+    print(f"\nTotal: {len(results)} chapters processed ({writer.summary()})")
     total_paras = sum(r[1] for r in results)
     print(f"Total paragraphs: {total_paras}")
     print(f"Output: {os.path.abspath(OUT_DIR)}")
+    POST_STAGES.print_summary()
+
+
+def post_only():
+    """Re-apply POST_STAGES to the chapter JSON already in OUT_DIR."""
+    writer = ChapterWriter()
+    for filepath in chapter_files(OUT_DIR):
+        chapter = read_chapter(filepath)
+        texts = chapter.texts()
+        paragraphs = POST_STAGES.apply(chapter.number, texts)
+        if paragraphs != texts:
+            for p, text in zip(chapter.paragraphs, paragraphs):
+                p.text = text
+            writer.write(filepath, chapter.to_dict())
+            print(f"{os.path.basename(filepath)}: updated")
+    writer.close()
+    POST_STAGES.print_summary()
 
 
 if __name__ == '__main__':
-    process()
+    if '--post-only' in sys.argv:
+        post_only()
+    else:
+        process()
@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-import json, os, re, time, urllib.parse, urllib.request
+import json, os, re, sys, time, urllib.parse, urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib", "processed-chapters"))
+from cli import option
+from writer import write_json
 
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 RAW_DIR = "data/raw/ouyangxiu-ji"
@@ -48,6 +53,268 @@ def fetch(url, cache_path):
     time.sleep(0.4)
     return html
 
+# --- Streaming tokenizer ---------------------------------------------------
+#
+# iter_blocks() walks the page with str.find cursors instead of DOTALL regexes.
+# It reads blocks as the regex reference implementation further down does,
+# except that a dropped element (ruby text, reference, pagenum or editsection
+# span) is dropped through its matching close even when it holds a nested
+# element of the same name, where the reference stopped at the first close.
+# Irregular markup is handed to the reference. tests/python/test_ouyangxiu_ji.py
+# pins this down; --parity compares both over the cached juan pages.
+
+CONTENT_OPEN = '<div class="mw-content-ltr mw-parser-output"'
+FOOTER_MARKERS = (
+    '<!-- ' + chr(10) + 'NewPP',
+    '<div class="printfooter',
+    '<div id="catlinks"',
+    '<div class="licenseContainer',
+)
+HEADER_TABLE_CLASSES = ("headerbox", "header_notes")
+NAV_MARKERS = ("前一卷", "后一卷", "後一卷")
+TOC_HEADINGS = {"目录", "目錄", "目次", "Contents"}
+ENTITIES = (
+    ("&nbsp;", chr(12288)), ("&amp;", "&"), ("&lt;", "<"), ("&gt;", ">"),
+    ("&quot;", chr(34)), ("&#160;", chr(12288)),
+)
+
+def _class_contains(tag, name):
+    """True if any class="..." attribute of the open tag contains name."""
+    pos = tag.find('class="')
+    while pos != -1:
+        start = pos + 7
+        end = tag.find('"', start)
+        if end == -1:
+            return False
+        if name in tag[start:end]:
+            return True
+        pos = tag.find('class="', start)
+    return False
+
+def _content_bounds(html):
+    """Return (start, end) of the mw-parser-output body, footers excluded."""
+    start = 0
+    pos = html.find(CONTENT_OPEN)
+    if pos != -1:
+        gt = html.find(">", pos + len(CONTENT_OPEN))
+        if gt != -1:
+            start = gt + 1
+    end = len(html)
+    for marker in FOOTER_MARKERS:
+        idx = html.find(marker, start)
+        if start < idx < end:
+            end = idx
+    return start, end
+
+def _drop_tables(html, start, end, cls):
+    """Copy html[start:end] without <table class="...cls..."> ... </table>."""
+    out = []
+    pos = start
+    i = html.find("<table", start, end)
+    while i != -1:
+        gt = html.find(">", i, end)
+        if gt == -1:
+            break
+        close = -1
+        if _class_contains(html[i + 6:gt], cls):
+            close = html.find("</table>", gt + 1, end)
+        if close == -1:
+            i = html.find("<table", i + 1, end)
+            continue
+        out.append(html[pos:i])
+        pos = close + 8
+        i = html.find("<table", pos, end)
+    out.append(html[pos:end])
+    return "".join(out)
+
+DROPPED_ELEMENTS = ("rt", "rp", "sup", "span")
+
+def _tag_name(tag):
+    """Element name of an open or close tag body ("span class=..." -> "span")."""
+    end = len(tag)
+    for sep in (" ", "\t", "\n", "/"):
+        i = tag.find(sep, 1 if tag[:1] == "/" else 0)
+        if i != -1 and i < end:
+            end = i
+    return tag[:end]
+
+def _is_dropped_span(tag):
+    if 'class="mw-cite-backlink"' in tag or 'class="mw-editsection"' in tag:
+        return True
+    pos = tag.find('class="pagenum')
+    return pos != -1 and tag.find('"', pos + 14) != -1
+
+def _drop_close(tag):
+    """Close marker of an element whose whole content is dropped, else None."""
+    name = _tag_name(tag)
+    if name == "rt" or name == "rp":
+        return "/" + name + ">"
+    if name == "span" and _is_dropped_span(tag):
+        return "/span>"
+    if name == "sup" and 'class="reference"' in tag:
+        return "/sup>"
+    return None
+
+def _is_numeric_ref(text):
+    return len(text) > 2 and text[0] == "[" and text[-1] == "]" and text[1:-1].isdecimal()
+
+def _is_regular(parts):
+    """True if the tags in parts (inner HTML split on "<") are ones the
+    tokenizer reads exactly as the regex reference does.
+
+    That rules out a bare "<", a class="pagenum... left open inside its tag,
+    rt/rp/sup/span elements that cross or are left unclosed, names that only
+    start like them (<rtc>, <spanx>) and markup inside a plain <sup>, which
+    the reference's ordered passes would first rewrite.
+    """
+    stack = []
+    n = len(parts)
+    for i in range(1, n):
+        part = parts[i]
+        gt = part.find(">")
+        if gt <= 0:
+            return False
+        tag = part[:gt]
+        closing = tag[0] == "/"
+        name = _tag_name(tag)
+        bare = name[1:] if closing else name
+        if bare not in DROPPED_ELEMENTS:
+            if bare.startswith(DROPPED_ELEMENTS):
+                return False
+            continue
+        if closing:
+            if tag != name or not stack or stack.pop() != bare:
+                return False
+            continue
+        if 'class="pagenum' in tag and not _is_dropped_span(tag):
+            return False
+        if (bare == "sup" and 'class="reference"' not in tag
+                and (i + 1 == n or not parts[i + 1].startswith("/sup>"))):
+            return False
+        stack.append(bare)
+    return not stack
+
+def _skip_element(parts, i, close):
+    """Index of the piece holding the close of the element opened in parts[i],
+    counting nested elements of the same name; len(parts) when unclosed."""
+    name = close[1:-1]
+    depth = 1
+    k = i + 1
+    n = len(parts)
+    while k < n:
+        part = parts[k]
+        if part.startswith(close):
+            depth -= 1
+            if depth == 0:
+                return k
+        elif part.startswith(name):
+            gt = part.find(">")
+            if gt != -1 and _tag_name(part[:gt]) == name:
+                depth += 1
+        k += 1
+    return n
+
+def _inner_text(inner):
+    """Strip tags from a block's inner HTML, dropping ruby/ref/pagenum spans.
+
+    Every tag and close marker starts with "<", so splitting on it once lets
+    each piece be classified by its prefix without rescanning the block.
+    Dropped elements are skipped through their matching close, nested
+    elements of the same name included; irregular markup (see _is_regular)
+    goes through strip_tags() so it is read the way it always was.
+    """
+    if "<" in inner:
+        parts = inner.split("<")
+        if not _is_regular(parts):
+            return strip_tags(inner)
+        out = [parts[0]]
+        i, n = 1, len(parts)
+        while i < n:
+            part = parts[i]
+            gt = part.find(">")
+            if part[0] != "r" and part[0] != "s":
+                out.append(part[gt + 1:])
+                i += 1
+                continue
+            tag = part[:gt]
+            close = _drop_close(tag)
+            if close is not None:
+                k = _skip_element(parts, i, close)
+                out.append(parts[k][len(close):])
+                i = k + 1
+                continue
+            if (tag.startswith("sup") and i + 1 < n and _is_numeric_ref(part[gt + 1:])
+                    and parts[i + 1].startswith("/sup>")):
+                out.append(parts[i + 1][5:])
+                i += 2
+                continue
+            out.append(part[gt + 1:])
+            i += 1
+        text = "".join(out)
+    else:
+        text = inner
+    if "&" in text:
+        for entity, char in ENTITIES:
+            text = text.replace(entity, char)
+    return text.strip()
+
+class _BlockOpens:
+    """Cursor over <h1-6> and <p...> opens; remembers misses so scans stay linear."""
+
+    def __init__(self, body):
+        self.body = body
+        self.p = body.find("<p")
+        self.h = body.find("<h")
+
+    def next(self, pos):
+        """Return (lt, tag) of the next block open at or after pos; lt is -1 when none."""
+        body = self.body
+        if self.p != -1 and self.p < pos:
+            self.p = body.find("<p", pos)
+        if self.h != -1 and self.h < pos:
+            self.h = body.find("<h", pos)
+        while self.h != -1 and (self.p == -1 or self.h < self.p):
+            if body[self.h + 2:self.h + 3] in ("1", "2", "3", "4", "5", "6"):
+                return self.h, body[self.h + 1:self.h + 3]
+            self.h = body.find("<h", self.h + 1)
+        return self.p, "p"
+
+def iter_blocks(html):
+    """Yield (kind, text) blocks from a juan page in one forward scan."""
+    start, end = _content_bounds(html)
+    body = _drop_tables(html, start, end, HEADER_TABLE_CLASSES[0])
+    body = _drop_tables(body, 0, len(body), HEADER_TABLE_CLASSES[1])
+    opens = _BlockOpens(body)
+    # Next close marker position per tag; -1 once the body has none left.
+    next_close = {}
+    lt, tag = opens.next(0)
+    while lt != -1:
+        gt = body.find(">", lt + 1)
+        if gt == -1:
+            return
+        close_marker = "</" + tag + ">"
+        close = next_close.get(close_marker)
+        if close is None or (close != -1 and close <= gt):
+            close = body.find(close_marker, gt + 1)
+            next_close[close_marker] = close
+        if close == -1:
+            lt, tag = opens.next(lt + 1)
+            continue
+        text = _inner_text(body[gt + 1:close])
+        kind = "h" if tag.startswith("h") else "p"
+        lt, tag = opens.next(close + len(close_marker))
+        if not text:
+            continue
+        if any(m in text for m in NAV_MARKERS):
+            continue
+        if text.startswith("@media") or text.startswith(".mw-parser-output"):
+            continue
+        if kind == "h" and text in TOC_HEADINGS:
+            continue
+        yield (kind, text)
+
+# --- Regex reference implementation (irregular markup and --parity) ----------
+
 def strip_tags(html):
     html = re.sub(r"<rt[^>]*>.*?</rt>", "", html, flags=re.DOTALL)
     html = re.sub(r"<rp[^>]*>.*?</rp>", "", html, flags=re.DOTALL)
@@ -107,47 +374,94 @@ def build_paragraphs(blocks):
             paragraphs.append(text)
     return paragraphs
 
-def main():
-    os.makedirs(RAW_DIR, exist_ok=True)
-    os.makedirs(OUT_DIR, exist_ok=True)
-    written = 0
-    skipped = 0
-    issues = []
-    for n in range(1, 154):
-        sub_zh, en_label, genre = juan_metadata(n)
+def process_juan(n, compact=False):
+    """Fetch (or read from cache), extract and write one juan.
+
+    Returns (n, issue) where issue is None when the chapter was written.
+    Runs unchanged in a worker process for --jobs.
+    """
+    sub_zh, en_label, genre = juan_metadata(n)
+    nnn = f"{n:03d}"
+    url = JUAN_URL + nnn
+    cache_path = os.path.join(RAW_DIR, f"juan-{nnn}.html")
+    try:
+        html = fetch(url, cache_path)
+    except Exception as ex:
+        return n, f"juan {n}: fetch error {ex}"
+    paragraphs = build_paragraphs(iter_blocks(html))
+    if not paragraphs:
+        return n, f"juan {n}: no paragraphs extracted"
+    zh_juan = _zh_num(n)
+    title = f"卷{zh_juan} {sub_zh} (Juan {n}: {en_label})"
+    out = {
+        "title": title,
+        "genre": genre,
+        "subCollection": sub_zh,
+        "paragraphs": [{"index": i, "text": p} for i, p in enumerate(paragraphs)],
+    }
+    write_json(os.path.join(OUT_DIR, f"chapter-{nnn}.json"), out, compact)
+    return n, None
+
+def warm_cache(juans):
+    """Fetch uncached juan pages one at a time (rate-limited) before fanning out.
+
+    Returns {n: issue} for pages that could not be fetched.
+    """
+    failed = {}
+    for n in juans:
         nnn = f"{n:03d}"
-        url = JUAN_URL + nnn
-        cache_path = os.path.join(RAW_DIR, f"juan-{nnn}.html")
         try:
-            html = fetch(url, cache_path)
+            fetch(JUAN_URL + nnn, os.path.join(RAW_DIR, f"juan-{nnn}.html"))
         except Exception as ex:
-            issues.append(f"juan {n}: fetch error {ex}")
-            skipped += 1
-            continue
-        body = isolate_content(html)
-        blocks = extract_blocks(body)
-        paragraphs = build_paragraphs(blocks)
-        if not paragraphs:
-            issues.append(f"juan {n}: no paragraphs extracted")
-            skipped += 1
-            continue
-        zh_juan = _zh_num(n)
-        title = f"卷{zh_juan} {sub_zh} (Juan {n}: {en_label})"
-        out = {
-            "title": title,
-            "genre": genre,
-            "subCollection": sub_zh,
-            "paragraphs": [{"index": i, "text": p} for i, p in enumerate(paragraphs)],
-        }
-        out_path = os.path.join(OUT_DIR, f"chapter-{nnn}.json")
-        with open(out_path, "w", encoding="utf-8") as fh:
-            json.dump(out, fh, ensure_ascii=False, indent=2)
-        written += 1
-    print(f"Written: {written}, Skipped: {skipped}")
+            failed[n] = f"juan {n}: fetch error {ex}"
+    return failed
+
+def main(jobs=1, compact=False):
+    os.makedirs(RAW_DIR, exist_ok=True)
+    os.makedirs(OUT_DIR, exist_ok=True)
+    juans = range(1, 154)
+    results = []
+    if jobs > 1:
+        # Network access stays sequential; only the CPU-bound extraction is parallel.
+        failed = warm_cache(juans)
+        results.extend(failed.items())
+        todo = [n for n in juans if n not in failed]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results.extend(pool.map(process_juan, todo, [compact] * len(todo), chunksize=4))
+    else:
+        results.extend(process_juan(n, compact) for n in juans)
+    issues = sorted((n, issue) for n, issue in results if issue is not None)
+    written = len(results) - len(issues)
+    print(f"Written: {written}, Skipped: {len(issues)}")
     if issues:
         print("Issues:")
-        for x in issues:
+        for _, x in issues:
             print(" -", x)
 
+def parity():
+    """Compare iter_blocks() with the regex reference over every cached juan."""
+    checked = 0
+    mismatches = []
+    for n in range(1, 154):
+        cache_path = os.path.join(RAW_DIR, f"juan-{n:03d}.html")
+        if not os.path.exists(cache_path):
+            continue
+        with open(cache_path, "r", encoding="utf-8") as fh:
+            html = fh.read()
+        checked += 1
+        expected = extract_blocks(isolate_content(html))
+        actual = list(iter_blocks(html))
+        if actual != expected:
+            first = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b),
+                         min(len(actual), len(expected)))
+            mismatches.append(f"juan {n}: {len(actual)} vs {len(expected)} blocks, first difference at block {first}")
+    print(f"Parity: {checked - len(mismatches)}/{checked} cached juan identical")
+    for x in mismatches:
+        print(" -", x)
+    return not mismatches
+
 if __name__ == "__main__":
-    main()
+    argv = sys.argv[1:]
+    if "--parity" in argv:
+        sys.exit(0 if parity() else 1)
+    main(jobs=option(argv, "--jobs", int, 1), compact="--compact" in argv)
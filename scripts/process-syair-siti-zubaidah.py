@@ -5,148 +5,158 @@ Process Syair Siti Zubaidah raw OCR text into structured JSON chapters.
 Input: data/raw/syar_siti/syar_siti.txt (12,454 lines)
 Output: data/processed/syair-siti-zubaidah/chapter-NNN.json (~19 chapters)
 
-Each chapter contains quatrains (4-line stanzas) as paragraph units.
+Each chapter contains quatrains (4-line stanzas) as paragraph units. Stanza
+boundaries come from the rhyme (syair stanzas rhyme aaaa) and the stanza
+numbers printed in the margin, not from counting lines, so a line lost or
+split by the OCR does not shift every later quatrain.
 """
 
-import json
+import itertools
 import os
 import re
 import sys
+from collections import Counter, namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'ocr-lines'))
+from chapters import boundary_mismatches, load_chapter_index
+from classify import ROLE_NAMES, TEXT, iter_classified
+from profiles import SYAIR_SITI_ZUBAIDAH, SYAIR_SITI_ZUBAIDAH_CHAPTERS
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib', 'processed-chapters'))
+from unicode_scripts import nfc
+from writer import ChapterWriter
 
 RAW_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'syar_siti', 'syar_siti.txt')
 OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed', 'syair-siti-zubaidah')
 
-# --- Step 1: OCR correction patterns ---
+# The poem's first and last lines (1-indexed) in this OCR run, i.e. the old
+# islice(f, 248, 12443); process() warns when the anchors find others.
+SYAIR_SPAN = {'start': 249, 'end': 12443}
 
-def ocr_fix(line: str) -> str:
-    """Apply OCR correction regex patterns to a single line."""
+# --- Step 1: OCR correction patterns ---
+#
+# The corrections are an ordered table of (stage, pattern, replacement, needs).
+# Consecutive rules sharing a stage are compiled once into a single alternation
+# (earlier rules listed first, so they win at the same position); stages run
+# in order, and a stage is skipped when the line contains none of its `needs`
+# characters, which is the case for most lines. Rules were only grouped into a
+# stage where no rule can create (or destroy) a match for another rule of the
+# same stage. The `!` rules each keep their own stage: `!ni` -> `ini` removes
+# the word boundary that `\b!(?=agi\b)` needs in `!agi!ni`, so applying them
+# in one left-to-right scan would change the output.
 
+# Known Malay words that genuinely start with I (capital):
+_I_WORDS = frozenset({
+    'Islam', 'Ibrahim', 'Imam', 'Istana', 'Intan', 'Ismail', 'Irak',
+    'Ini', 'Itu', 'Ibunda', 'Istimewa', 'Iman', 'Ilmu', 'Indah',
+    'Inang', 'Ipar', 'Ikan', 'Ikut', 'Izin', 'Ingat', 'Isi',
+    'Isteri', 'Istri', 'Indra',
+})
+# Stems that keep their I whatever follows (Islami, Istanamu, Ingatlah, ...)
+_I_PREFIXES = (
+    'Islam', 'Ibrahim', 'Imam', 'Istana', 'Intan', 'Ismail', 'Ibunda', 'Isti',
+    'Ilmu', 'Indah', 'Inang', 'Ipar', 'Ikan', 'Ikut', 'Izin', 'Ingat', 'Indra',
+)
+
+
+def _fix_capital_I(match):
+    """Decide whether I at word start should become l (match is `I[a-z]+`)."""
+    word = match.group()
+    if word in _I_WORDS or word.startswith(_I_PREFIXES):
+        return word
+    return 'l' + word[1:]
+
+
+OCR_RULES = [
     # Remove trailing OCR noise: underscores, tildes, stray punctuation clusters at end
-    line = re.sub(r'[\s,]*[-_~.•]+[\s_~.\-,]*$', '', line)
+    ('trailing', r'[\s,]*[-_~.•]+[\s_~.\-,]*$', '', '-_~.•'),
 
     # --- Digit-to-letter fixes FIRST (before ! fix, since !1 combos exist) ---
-
     # Fix `1` (digit one) -> `l` in word context
-    line = re.sub(r'\b1(?=[a-z])', 'l', line)
-    line = re.sub(r'(?<=[a-zA-Z!])1(?=[a-z])', 'l', line)
-
-    # Fix `9i` -> `di` at word start
-    line = re.sub(r'\b9i\b', 'di', line)
-    line = re.sub(r'\b9i(?=[a-z])', 'di', line)
-
-    # Fix `0J` or `0j` -> word start patterns
-    line = re.sub(r'\b0J\b', 'Di', line)
-    line = re.sub(r'\b0j\b', 'di', line)
+    ('digit1', r'\b1(?=[a-z])', 'l', '1'),
+    ('digit1', r'(?<=[a-zA-Z!])1(?=[a-z])', 'l', '1'),
+    # Fix `9i` -> `di` at word start, `0J`/`0j` -> `Di`/`di`
+    ('digit', r'\b9i\b', 'di', '9'),
+    ('digit', r'\b9i(?=[a-z])', 'di', '9'),
+    ('digit', r'\b0J\b', 'Di', '0'),
+    ('digit', r'\b0j\b', 'di', '0'),
 
     # Fix `+` -> `t` in word context
-    line = re.sub(r'(?<=[a-zA-Z])\+(?=[a-zA-Z])', 't', line)
-
+    ('plus', r'(?<=[a-zA-Z])\+(?=[a-zA-Z])', 't', '+'),
     # --- ! -> l/i fix (after digit fixes) ---
-
     # `!` at word start -> `i` or `l` for specific known words
-    line = re.sub(r'\b!(?=ni\b)', 'i', line)    # !ni -> ini
-    line = re.sub(r'\b!(?=tu\b)', 'i', line)    # !tu -> itu
-    line = re.sub(r'\b!(?=bu\b)', 'i', line)    # !bu -> ibu
-    line = re.sub(r'\b!(?=ntan\b)', 'I', line)  # !ntan -> Intan
-    line = re.sub(r'\b!(?=nang\b)', 'I', line)  # !nang -> Inang
-    line = re.sub(r'\b!(?=agi\b)', 'l', line)   # !agi -> lagi
-    line = re.sub(r'\b!(?=embatan\b)', 'j', line)  # !embatan -> jembatan
+    ('bang_ni', r'\b!(?=ni\b)', 'i', '!'),                # !ni -> ini
+    ('bang_tu', r'\b!(?=tu\b)', 'i', '!'),                # !tu -> itu
+    ('bang_bu', r'\b!(?=bu\b)', 'i', '!'),                # !bu -> ibu
+    ('bang_ntan', r'\b!(?=ntan\b)', 'I', '!'),            # !ntan -> Intan
+    ('bang_nang', r'\b!(?=nang\b)', 'I', '!'),            # !nang -> Inang
+    ('bang_agi', r'\b!(?=agi\b)', 'l', '!'),              # !agi -> lagi
+    ('bang_embatan', r'\b!(?=embatan\b)', 'j', '!'),      # !embatan -> jembatan
     # `!` inside/end of word -> `l` (most common substitution)
-    line = re.sub(r'(?<=[a-zA-Z])!(?=[a-zA-Z0-9\s,.\'\";:?\-]|$)', 'l', line)
+    ('bang', r'(?<=[a-zA-Z])!(?=[a-zA-Z0-9\s,.\'\";:?\-]|$)', 'l', '!'),
 
     # --- I -> l fix ---
     # `I` at start of word followed by lowercase -> `l`
     # EXCEPT known I-words (Islam, Ibrahim, Imam, Istana, etc.)
-    line = re.sub(r'\bI(?=[a-z])', lambda m: _fix_capital_I(m, line), line)
-
-    # Fix `J` -> `j` in middle of word (JaJu -> lalu already handled, but other cases)
-    # Actually `J` as capital is fine for names (Jafar, Jauhari). Only fix mid-word `J`.
+    ('capital_I', r'\bI[a-z]+', _fix_capital_I, 'I'),
 
     # Remove stray isolated punctuation artifacts
-    line = re.sub(r'\s+[_~•]+\s*$', '', line)
+    ('stray', r'\s+[_~•]+\s*$', '', '_~•'),
 
     # Nice-to-have: Fix tidal< -> tidak
-    line = re.sub(r'\btidal<', 'tidak', line)
+    ('tidal', r'\btidal<', 'tidak', '<'),
 
     # Nice-to-have: Fix !-in-words patterns the main pass missed
     # te!Jumlah -> terjumlah, ha!lku -> halku, be!Jalan -> berjalan, Be!)aJan -> Berjalan
-    line = re.sub(r'!(?=[A-Z][a-z])', 'r', line)  # !J -> rJ -> handled below
+    ('bang_r', r'!(?=[A-Z][a-z])', 'r', '!'),
     # General: any remaining ! between letters -> l
-    line = re.sub(r'(?<=[a-zA-Z])!(?=[a-zA-Z])', 'l', line)
+    ('bang_l', r'(?<=[a-zA-Z])!(?=[a-zA-Z])', 'l', '!'),
 
     # Fix double spaces
-    line = re.sub(r'  +', ' ', line)
+    ('spaces', r'  +', ' ', ' '),
+]
 
-    # Fix #3: Strip any remaining tabs
-    line = line.replace('\t', ' ')
 
-    # Strip trailing whitespace
-    line = line.rstrip()
+def _compile_stages(rules):
+    """Group consecutive same-stage rules into (needs, regex, replace) triples."""
+    stages = []
+    for stage, pattern, repl, needs in rules:
+        if stages and stages[-1][0] == stage:
+            stages[-1][1].append((pattern, repl))
+            stages[-1][2].update(needs)
+        else:
+            stages.append((stage, [(pattern, repl)], set(needs)))
 
-    return line
+    compiled = []
+    for _, members, needs in stages:
+        if len(members) == 1:
+            pattern, repl = members[0]
+            regex = re.compile(pattern)
+        else:
+            regex = re.compile('|'.join(f'(?P<r{i}>{p})' for i, (p, _) in enumerate(members)))
+            repls = [r for _, r in members]
 
+            def repl(m, repls=repls):
+                r = repls[int(m.lastgroup[1:])]
+                return r if isinstance(r, str) else r(m)
+        compiled.append((frozenset(needs), regex, repl))
+    return compiled
+
+
+_OCR_STAGES = _compile_stages(OCR_RULES)
 
-# Known Malay words that genuinely start with I (capital):
-_I_WORDS = {'Islam', 'Ibrahim', 'Imam', 'Istana', 'Intan', 'Ismail', 'Irak',
-             'Ini', 'Itu', 'Ibunda', 'Istimewa', 'Iman', 'Ilmu', 'Indah',
-             'Inang', 'Ipar', 'Ikan', 'Ikut', 'Izin', 'Ingat', 'Isi',
-             'Isteri', 'Istri', 'Indra'}
-
-def _fix_capital_I(match, line):
-    """Decide whether I at word start should become l."""
-    pos = match.start()
-    # Extract the full word starting at this position
-    word_match = re.match(r'I[a-z]+', line[pos:])
-    if word_match:
-        word = word_match.group()
-        # Check if this is a known I-word
-        for iw in _I_WORDS:
-            if word.startswith(iw[1:]):  # Compare without the I
-                # Hmm, this doesn't work well. Let's check the full word.
-                pass
-        # Check if the capitalized form is a known word
-        if word.capitalize() in _I_WORDS or word in _I_WORDS:
-            return 'I'  # Keep as-is
-        # Check common patterns that should stay as I
-        if re.match(r'I(?:slam|brahim|mam|stana|ntan|smail|ni\b|tu\b|bunda|sti|lmu|ndah|nang|par|kan|kut|zin|ngat|si\b|rak\b|man\b|ndra)', line[pos:]):
-            return 'I'
-        return 'l'
-    return 'I'
-
-
-def is_page_number(line: str) -> bool:
-    """Check if a line is a standalone page number (including OCR-garbled ones)."""
-    stripped = line.strip()
-    # Pure digits (original check)
-    if re.match(r'^\s*\d{1,3}\s*$', stripped):
-        return True
-    # Roman numerals: I, II, III, IV, IX, X, etc.
-    if re.match(r'^\s*[IVX]{1,4}\s*$', stripped):
-        return True
-    # OCR-garbled page numbers: short lines (<6 chars) with digits but few consecutive letters
-    # Known patterns: "S4", "J27", "i48", "ISS", "29 1", "30)", "\09", "f8f"
-    if len(stripped) < 6 and re.search(r'\d', stripped):
-        # Count consecutive letter runs
-        letter_runs = re.findall(r'[a-zA-Z]+', stripped)
-        max_letters = max((len(r) for r in letter_runs), default=0)
-        if max_letters < 3:
-            return True
-    # Short lines that are known garbled patterns without digits
-    if stripped in ('ISS',):
-        return True
-    return False
-
-
-def is_library_stamp(line: str) -> bool:
-    """Check if line is part of the library stamp artifact."""
-    stamp_patterns = [
-        r'PERPU>TAK',
-        r'PUS\s*~\s*T\s*rE',
-        r'PE\s*j\s*,Ff',
-        r'OEP\s*~TE',
-        r'DAN\s+KEBU[DO]AYAAN',
-    ]
-    return any(re.search(p, line) for p in stamp_patterns)
+
+def ocr_fix(line: str) -> str:
+    """Apply OCR correction regex patterns to a single line."""
+    for needs, regex, repl in _OCR_STAGES:
+        if not needs.isdisjoint(line):
+            line = regex.sub(repl, line)
+
+    # Fix #3: Strip any remaining tabs
+    line = line.replace('\t', ' ')
+
+    # Strip trailing whitespace
+    return line.rstrip()
 
 
 def strip_inline_stanza_number(line: str) -> str:
@@ -171,41 +181,161 @@ def strip_inline_stanza_number(line: str) -> str:
     return line
 
 
-def process():
-    # Read raw file
-    with open(RAW_PATH, 'r', encoding='utf-8') as f:
-        all_lines = f.readlines()
-
-    print(f"Read {len(all_lines)} lines from raw file")
-
-    # Step 1: Extract syair section (lines 249-12443, 1-indexed)
-    # In 0-indexed: 248 to 12442
-    syair_lines = all_lines[248:12443]
-    print(f"Syair section: {len(syair_lines)} lines")
-
-    # Step 2: Clean lines
-    cleaned = []
-    stamp_removed = 0
-    page_nums_removed = 0
-    blank_lines = 0
-
-    for i, raw_line in enumerate(syair_lines):
-        line = raw_line.rstrip('\n').rstrip('\r')
-
-        # Skip library stamp (around original lines 324-328, i.e., offset 75-79)
-        if is_library_stamp(line):
-            stamp_removed += 1
+# --- Step 3: Stanza segmentation ---
+#
+# Each stanza length gets a score; a stanza scores +10 for every adjacent pair
+# of lines ending in the same rhyme, +3 when only the last letter agrees and
+# -10 otherwise, plus MARKER_SCORE when it starts on a stanza-number line and
+# minus MARKER_SCORE for a stanza number inside it (integers, so ties always
+# break the same way). The best-scoring split of the line stream is found with
+# a dynamic programme over line positions. Stanzas are at most six lines long,
+# so every split still open passes through one of the last six boundaries;
+# once all of those agree on an earlier boundary, the stanzas before it are
+# final and are yielded. Memory stays bounded by the lag (at most MAX_LAG
+# lines) rather than the length of the poem.
+
+STANZA_MARKER_RE = re.compile(r'(?:(\d+)\s*\t|/\s*(\d+)\s*/\s*[\t ]+|!(\d+)!)')
+RHYME_WORD_RE = re.compile(r'[a-z]+')
+
+# Quatrains are the norm; a line lost or split by the OCR gives 3 or 5.
+STANZA_LENGTH_SCORE = {4: 0, 3: -15, 5: -15, 2: -30, 6: -30, 1: -45}
+LENGTH_CONFIDENCE = {4: 1.0, 3: 0.6, 5: 0.6, 2: 0.3, 6: 0.3, 1: 0.0}
+MAX_STANZA = max(STANZA_LENGTH_SCORE)
+MARKER_SCORE = 30
+MAX_LAG = 64
+
+Stanza = namedtuple('Stanza', 'lines confidence')
+
+
+def rhyme_key(line: str) -> str:
+    """Last two letters of the line's last word ('' if it has none)."""
+    words = RHYME_WORD_RE.findall(line.lower())
+    return words[-1][-2:] if words else ''
+
+
+def rhyme_score(a: str, b: str) -> int:
+    if not a or not b:
+        return 0
+    if a == b:
+        return 10
+    if a[-1] == b[-1]:
+        return 3
+    return -10
+
+
+def stanza_marker(line: str):
+    """Stanza number printed at the start of a line ("12<tab>", "/12/ ", "!4!"), or None."""
+    m = STANZA_MARKER_RE.match(line)
+    if not m:
+        return None
+    return int(m.group(1) or m.group(2) or m.group(3))
+
+
+def _stanza(lines, keys, markers, s, e) -> Stanza:
+    n = e - s
+    pairs = [rhyme_score(keys[i - 1], keys[i]) for i in range(s + 1, e)]
+    agreement = sum(max(p, 0) for p in pairs) / (10 * len(pairs)) if pairs else 0.0
+    confidence = agreement * LENGTH_CONFIDENCE[n]
+    if markers[s] is not None and n == 4:
+        confidence = max(confidence, 0.8)
+    if any(markers[i] is not None for i in range(s + 1, e)):
+        confidence *= 0.5
+    return Stanza(lines[s:e], round(confidence, 2))
+
+
+def segment_stanzas(lines):
+    """Group (text, stanza_number_or_None) lines into stanzas.
+
+    A generator: stanzas are yielded as soon as their boundaries can no
+    longer change, so the input can be any iterable of lines.
+    """
+    texts, keys, markers = [], [], []
+    pair_sum = [0, 0]   # pair_sum[j]: rhyme scores of adjacent pairs in lines[:j]
+    marker_sum = [0]    # marker_sum[j]: stanza numbers in lines[:j]
+    best = [0]          # best[j]: best score of a split ending at boundary j
+    back = [0]          # back[j]: start of the last stanza in that split
+
+    def extend(e):
+        top, start = float('-inf'), 0
+        for length, length_score in STANZA_LENGTH_SCORE.items():
+            s = e - length
+            if s < 0 or best[s] == float('-inf'):
+                continue
+            score = (best[s] + length_score
+                     + pair_sum[e] - pair_sum[s + 1]
+                     - MARKER_SCORE * (marker_sum[e] - marker_sum[s + 1]))
+            if markers[s] is not None:
+                score += MARKER_SCORE
+            if score > top:
+                top, start = score, s
+        best.append(top)
+        back.append(start)
+
+    def path(e):
+        bounds = [e]
+        while e > 0:
+            e = back[e]
+            bounds.append(e)
+        return bounds[::-1]
+
+    def settled_boundary():
+        """Latest boundary shared by the splits ending at the last MAX_STANZA positions."""
+        n = len(texts)
+        common = None
+        for e in range(max(0, n - MAX_STANZA + 1), n + 1):
+            if best[e] == float('-inf'):
+                continue
+            bounds = set(path(e))
+            common = bounds if common is None else common & bounds
+        return max(b for b in common if b < n - MAX_STANZA + 1) if common else 0
+
+    def emit(bounds):
+        for s, e in zip(bounds, bounds[1:]):
+            yield _stanza(texts, keys, markers, s, e)
+
+    for text, marker in lines:
+        texts.append(text)
+        keys.append(rhyme_key(text))
+        markers.append(marker)
+        n = len(texts)
+        if n > 1:
+            pair_sum.append(pair_sum[-1] + rhyme_score(keys[-2], keys[-1]))
+        marker_sum.append(marker_sum[-1] + (marker is not None))
+        extend(n)
+
+        if n <= MAX_STANZA:
             continue
-
-        # Skip standalone page numbers
-        if is_page_number(line):
-            page_nums_removed += 1
-            continue
-
-        # Skip empty/blank lines (we'll regroup later)
-        if line.strip() == '' or line.strip() == '•':
-            blank_lines += 1
+        cut = settled_boundary()
+        forced = not cut and n > MAX_LAG
+        if forced:
+            # No agreement yet: settle the older half along the best split so far.
+            top = max(range(n - MAX_STANZA + 1, n + 1), key=lambda e: best[e])
+            cut = max(b for b in path(top) if b <= n // 2)
+        if cut:
+            yield from emit(path(cut))
+            # Only differences of these prefix sums are used, so slicing is enough.
+            texts, keys, markers = texts[cut:], keys[cut:], markers[cut:]
+            pair_sum, marker_sum = pair_sum[cut:], marker_sum[cut:]
+            best, back = best[cut:], [b - cut for b in back[cut:]]
+            if forced:
+                # Splits that did not pass through the cut are gone; redo them.
+                del best[1:], back[1:]
+                for e in range(1, len(texts) + 1):
+                    extend(e)
+
+    if texts:
+        yield from emit(path(len(texts)))
+
+
+def iter_clean_lines(raw_lines, counts: Counter):
+    """Yield (text, stanza_number_or_None) for each content line, counting line roles."""
+    pending_marker = None
+    for raw_line, role in iter_classified(raw_lines, SYAIR_SITI_ZUBAIDAH):
+        counts[ROLE_NAMES[role]] += 1
+        if role != TEXT:
             continue
+        line = raw_line.rstrip('\n').rstrip('\r')
+        marker = stanza_marker(line)
 
         # Strip inline stanza numbers
         line = strip_inline_stanza_number(line)
@@ -213,31 +343,47 @@ def process():
         # Apply OCR fixes
         line = ocr_fix(line)
 
-        # Skip if line is now empty after cleaning
+        # A stanza number on a line of its own belongs to the next line
         if not line.strip():
+            if marker is not None:
+                pending_marker = marker
             continue
+        if marker is None:
+            marker = pending_marker
+        pending_marker = None
 
-        cleaned.append(line.strip())
-
-    print(f"After cleaning: {len(cleaned)} content lines")
-    print(f"  Stamp lines removed: {stamp_removed}")
-    print(f"  Page numbers removed: {page_nums_removed}")
-    print(f"  Blank lines skipped: {blank_lines}")
-
-    # Step 3: Group into quatrains (every 4 lines)
-    quatrains = []
-    for i in range(0, len(cleaned) - 3, 4):
-        q = '\n'.join(cleaned[i:i+4])
-        quatrains.append(q)
+        counts['CONTENT'] += 1
+        yield line.strip(), marker
 
-    # Handle remainder lines (if not divisible by 4)
-    remainder = len(cleaned) % 4
-    if remainder:
-        leftover = '\n'.join(cleaned[-(remainder):])
-        quatrains.append(leftover)
-        print(f"  WARNING: {remainder} leftover lines (not a full quatrain)")
 
-    print(f"Total quatrains: {len(quatrains)}")
+def process():
+    # Step 1: Extract the syair section. Its first and last lines are found
+    # by the SYAIR_SITI_ZUBAIDAH_CHAPTERS anchors (cached in syar_siti.chapters.json).
+    index = load_chapter_index(RAW_PATH, SYAIR_SITI_ZUBAIDAH_CHAPTERS)
+    for key, expected, found in boundary_mismatches(index, SYAIR_SPAN):
+        print(f"WARNING: syair {key} at line {found}, expected {expected}")
+    span = index['span']
+    counts = Counter()
+    with open(RAW_PATH, 'r', encoding='utf-8') as f:
+        syair_lines = map(nfc, itertools.islice(f, span['start'] - 1, span['end']))
+
+        # Step 2: Clean lines. Library stamp lines (on the first pages of
+        # the poem), standalone page numbers and blank lines are classified by
+        # the SYAIR_SITI_ZUBAIDAH profile.
+        # Step 3: Group the cleaned lines into stanzas as they stream in.
+        quatrains = list(segment_stanzas(iter_clean_lines(syair_lines, counts)))
+
+    print(f"Syair section: {sum(counts[name] for name in ROLE_NAMES)} lines")
+    print(f"After cleaning: {counts['CONTENT']} content lines")
+    print(f"  Stamp lines removed: {counts['STAMP']}")
+    print(f"  Page numbers removed: {counts['PAGE_NUMBER']}")
+    print(f"  Blank lines skipped: {counts['BLANK']}")
+
+    lengths = Counter(len(q.lines) for q in quatrains)
+    print(f"Total stanzas: {len(quatrains)}")
+    for length, n in sorted(lengths.items()):
+        if length != 4:
+            print(f"  WARNING: {n} stanzas of {length} lines")
 
     # Step 4: Divide into ~19 chapters of roughly equal size
     num_chapters = 19
@@ -248,6 +394,7 @@ def process():
     os.makedirs(OUT_DIR, exist_ok=True)
 
     # Distribute quatrains into chapters
+    writer = ChapterWriter()
     idx = 0
     for ch in range(1, num_chapters + 1):
         count = per_chapter + (1 if ch <= extra else 0)
@@ -258,7 +405,7 @@ def process():
         for qi, q in enumerate(chapter_quatrains):
             paragraphs.append({
                 "index": qi,
-                "text": q
+                "text": '\n'.join(q.lines)
             })
 
         chapter_data = {
@@ -270,12 +417,12 @@ def process():
         }
 
         out_path = os.path.join(OUT_DIR, f"chapter-{ch:03d}.json")
-        with open(out_path, 'w', encoding='utf-8') as f:
-            json.dump(chapter_data, f, ensure_ascii=False, indent=2)
+        writer.write(out_path, chapter_data)
 
         print(f"  Chapter {ch}: {len(chapter_quatrains)} quatrains -> {out_path}")
 
-    print(f"\nDone! {num_chapters} chapters written to {OUT_DIR}")
+    writer.close()
+    print(f"\nDone! {num_chapters} chapters in {OUT_DIR} ({writer.summary()})")
     return quatrains
 
 
@@ -285,8 +432,9 @@ def validate(quatrains):
 
     # Check a sample of quatrains for issues
     issues = []
-    for i, q in enumerate(quatrains):
-        lines = q.split('\n')
+    for i, stanza in enumerate(quatrains):
+        lines = stanza.lines
+        q = '\n'.join(lines)
         # Check for remaining OCR artifacts
         if '!' in q and re.search(r'[a-z]![a-z]', q):
             issues.append(f"Quatrain {i}: possible remaining ! artifact: {q[:80]}")
@@ -297,6 +445,8 @@ def validate(quatrains):
         # Check line count
         if len(lines) != 4:
             issues.append(f"Quatrain {i}: has {len(lines)} lines instead of 4")
+        elif stanza.confidence < 0.5:
+            issues.append(f"Quatrain {i}: low boundary confidence {stanza.confidence}: {q[:80]}")
 
     if issues:
         print(f"Found {len(issues)} potential issues:")
@@ -313,8 +463,8 @@ def validate(quatrains):
     random.seed(42)
     samples = sorted(random.sample(range(len(quatrains)), min(10, len(quatrains))))
     for s in samples:
-        print(f"\n--- Quatrain {s} ---")
-        print(quatrains[s])
+        print(f"\n--- Quatrain {s} (confidence {quatrains[s].confidence}) ---")
+        print('\n'.join(quatrains[s].lines))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,120 @@
+"""Chapter boundary detection (scripts/lib/ocr-lines/chapters.py).
+
+The raw OCR files are not in the repository; the checks against the old
+hand-placed line maps are skipped unless they are present.
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import importlib.util
+import os
+import random
+import stat
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts', 'lib', 'ocr-lines'))
+import chapters
+from chapters import GAP_PENALTY, ChapterSpec, boundary_mismatches, load_chapter_index
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _quadratic_chain(candidates, first):
+    """The original O(c^2) _best_chain, as the reference."""
+    best, back = [], []
+    for i, cand in enumerate(candidates):
+        top = cand['score'] - GAP_PENALTY * (cand['number'] - first)
+        prev = None
+        for j in range(i):
+            other = candidates[j]
+            if other['number'] >= cand['number'] or other['line'] >= cand['line']:
+                continue
+            score = best[j] + cand['score'] - GAP_PENALTY * (cand['number'] - other['number'] - 1)
+            if score >= top:
+                top, prev = score, j
+        best.append(top)
+        back.append(prev)
+    if not candidates:
+        return []
+    end = max(range(len(candidates)), key=lambda i: (best[i], i))
+    chain = []
+    while end is not None:
+        chain.append(candidates[end])
+        end = back[end]
+    return chain[::-1]
+
+
+def test_best_chain_matches_quadratic():
+    rng = random.Random(34)
+    for _ in range(2000):
+        first = rng.randint(1, 90)
+        lines = sorted(rng.sample(range(1, 5000), rng.randint(0, 40)))
+        candidates = [{'line': line, 'number': rng.randint(first, first + 30),
+                       'score': rng.choice((1.0, 1.5, 2.0))} for line in lines]
+        assert chapters._best_chain(candidates, first) == _quadratic_chain(candidates, first)
+
+
+def test_scan_synthetic(tmp_path):
+    text = ['Contents', '1', '2', '3', '', 'preface', '']
+    for n in range(1, 6):
+        if n == 4:
+            text += ['the fourth begins here', 'more']
+        else:
+            text += [str(n), 'chapter text', '12 ', 'text']
+        text += ['']
+    text += ['THE END', 'index']
+    raw = tmp_path / 'book.txt'
+    raw.write_text('\n'.join(text) + '\n', encoding='utf-8')
+    spec = ChapterSpec('book', heading=r'(?P<num>\d{1,2})$', first=1, last=5,
+                       anchors={4: r'fourth begins', 'end': r'THE END'})
+
+    index = load_chapter_index(str(raw), spec)
+    found = {c['number']: (c['line'], c['source']) for c in index['chapters']}
+    assert found == {1: (8, 'heading'), 2: (13, 'heading'), 3: (18, 'heading'),
+                     4: (22, 'anchor'), 5: (26, 'heading')}
+    assert index['span'] == {'start': 1, 'end': 31} and index['missing'] == []
+    assert boundary_mismatches(index, {1: 8, 2: 13, 3: 18, 4: 22, 5: 26, 'end': 31}) == []
+    assert boundary_mismatches(index, {1: 2, 2: 13, 3: 18, 4: 22, 'start': 5}) == [
+        (1, 2, 8), ('start', 5, 1), (5, None, 26)]
+
+    # Saved with the usual file mode, not mkstemp's 0600, and reused.
+    path = chapters.index_path(str(raw))
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+    assert load_chapter_index(str(raw), spec) == index
+
+
+def _raw(path):
+    path = os.path.join(ROOT, path)
+    if not os.path.exists(path):
+        pytest.skip(f'{path} not present')
+    return path
+
+
+def test_mai_ve_siyah_chapter_lines():
+    mai = _load('process_mai_ve_siyah', 'scripts/process-mai-ve-siyah.py')
+    index = load_chapter_index(_raw('data/raw/mai_ve_saiyah/mai_ve_saiyah.txt'), mai.MAI_VE_SIYAH_CHAPTERS)
+    assert boundary_mismatches(index, mai.CHAPTER_LINES) == []
+
+
+def test_syair_span():
+    syair = _load('process_syair_siti_zubaidah', 'scripts/process-syair-siti-zubaidah.py')
+    index = load_chapter_index(_raw('data/raw/syar_siti/syar_siti.txt'), syair.SYAIR_SITI_ZUBAIDAH_CHAPTERS)
+    assert boundary_mismatches(index, syair.SYAIR_SPAN) == []
+
+
+def test_semeioseis_chapter_line_map():
+    cleaner = _load('semeioseis_cleaner_v4', 'scripts/lib/semeioseis-cleaning-v4/cleaner.py')
+    raw = _raw('data/raw/semeioseis_gnomikai/semeioseis_gnomikai_82_120.txt')
+    cleaner.RAW_FILE = raw
+    index = load_chapter_index(raw, cleaner.CHAPTERS)
+    assert boundary_mismatches(index, cleaner.expected_chapter_lines(cleaner.read_raw_file())) == []
@@ -0,0 +1,26 @@
+"""Option parsing shared by the processed-chapters tools (cli.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+from cli import option, positionals
+
+
+def test_option():
+    argv = ['query', '--jobs', '4', '--n=7', 'word', '--text']
+    assert option(argv, '--jobs', int, 1) == 4
+    assert option(argv, '--n', int, 20) == 7
+    assert option(argv, '--text') is None        # no value after it
+    assert option(argv, '--context', int, 60) == 60
+    assert option(['--n=', 'x'], '--n') == ''
+
+
+def test_positionals():
+    argv = ['query', '--jobs', '4', 'alpha', '--n=7', '--all-words', 'beta', '--text', 'mai-ve-siyah']
+    assert positionals(argv, ('--jobs', '--text', '--n')) == ['query', 'alpha', 'beta']
+    # A switch does not swallow the argument after it.
+    assert positionals(['--write', 'text'], ('--jobs',)) == ['text']
@@ -0,0 +1,126 @@
+"""The streaming chapter reader (scripts/lib/processed-chapters/corpus.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import io
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+import corpus
+from corpus import iter_events, loads_chapter
+
+CHUNKS = (1, 2, 3, 7, 64)
+
+
+def _random_value(rng, depth=0):
+    r = rng.random()
+    if depth > 2 or r < 0.5:
+        return rng.choice([
+            rng.randint(-10 ** 6, 10 ** 6),
+            rng.uniform(-1e3, 1e3),
+            rng.choice([2.5, -0.125, 1e-7, 6.02e23, 0.0, 10.0]),
+            rng.choice([True, False, None]),
+            _random_text(rng),
+        ])
+    if r < 0.75:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return {_random_text(rng): _random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))}
+
+
+def _random_text(rng):
+    return ''.join(rng.choice('ab λόγος 子曰"\\\n\t{}[],:0.5e') for _ in range(rng.randint(0, 12)))
+
+
+def _random_chapter(rng):
+    """A document in one of the shapes Chapter.to_dict() writes back."""
+    texts = [_random_text(rng) for _ in range(rng.randint(0, 5))]
+    base = rng.choice([0, 1])
+    objects = [{'index': i + base, 'text': t} for i, t in enumerate(texts)]
+    shape = rng.randrange(4)
+    if shape == 0:
+        doc = {'chapterNumber': rng.randint(1, 300), 'title': _random_text(rng),
+               'sourceContent': {'paragraphs': objects}}
+    elif shape == 1:
+        doc = {'chapterNumber': rng.randint(1, 300), 'title': _random_text(rng),
+               'sourceContent': {'paragraphs': texts, 'source': _random_value(rng)}}
+    elif shape == 2:
+        doc = {'title': _random_text(rng), 'paragraphs': texts}
+    else:
+        doc = {'title': _random_text(rng), 'genre': _random_text(rng), 'subCollection': _random_value(rng),
+               'paragraphs': [{'text': o['text'], 'index': o['index']} for o in objects]}
+    # Extra members, numbers among them, anywhere in the top level.
+    for _ in range(rng.randint(0, 3)):
+        items = list(doc.items())
+        items.insert(rng.randint(0, len(items)), (f'x{rng.randrange(1000)}', _random_value(rng)))
+        doc = dict(items)
+    return doc
+
+
+def _key_order(doc):
+    """Keys of the document, sourceContent and each paragraph object, in order."""
+    nested = doc.get('sourceContent', {})
+    paragraphs = doc['paragraphs'] if 'paragraphs' in doc else nested['paragraphs']
+    return list(doc), list(nested), [list(p) for p in paragraphs if isinstance(p, dict)]
+
+
+def _dumps(rng, doc):
+    return json.dumps(doc, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1, 2]))
+
+
+def test_float_split_after_integer_part(monkeypatch):
+    data = '{"title": "t", "x": 2.5, "y": 1e5, "z": -3.25E-2, "paragraphs": ["a"]}'
+    for chunk in range(1, len(data) + 1):
+        monkeypatch.setattr(corpus, '_CHUNK', chunk)
+        chapter = loads_chapter(data)
+        assert chapter.extra == {'x': 2.5, 'y': 1e5, 'z': -3.25e-2}, chunk
+        assert chapter.texts() == ['a']
+
+
+def test_events_match_json_loads(monkeypatch):
+    rng = random.Random(41)
+    for chunk in CHUNKS:
+        monkeypatch.setattr(corpus, '_CHUNK', chunk)
+        for _ in range(200):
+            value = _random_value(rng)
+            data = _dumps(rng, value)
+            events = list(iter_events(io.StringIO(data)))
+            if isinstance(value, dict):
+                rebuilt = {}
+                for event, path, v in events:
+                    if event == 'array':
+                        rebuilt[path[-1]] = []
+                    elif event == 'item':
+                        rebuilt[path[-1]].append(v)
+                    else:
+                        rebuilt[path[-1]] = v
+                assert rebuilt == json.loads(data), (chunk, data)
+            else:
+                assert events == [('value', (), json.loads(data))], (chunk, data)
+
+
+def test_chapter_shapes_round_trip(monkeypatch):
+    rng = random.Random(410)
+    for chunk in CHUNKS:
+        monkeypatch.setattr(corpus, '_CHUNK', chunk)
+        for _ in range(300):
+            doc = _random_chapter(rng)
+            data = _dumps(rng, doc)
+            chapter = loads_chapter(data, 'chapter-007.json')
+            assert chapter.issues == [], (chunk, data)
+            back = chapter.to_dict()
+            assert back == json.loads(data), (chunk, data)
+            assert list(back) == list(doc)
+            assert _key_order(back) == _key_order(doc)
+
+
+def test_issues_are_recorded_not_raised(monkeypatch):
+    monkeypatch.setattr(corpus, '_CHUNK', 2)
+    chapter = loads_chapter('{"title": 5, "paragraphs": [{"index": 1, "text": "a"}, {"index": 3, "text": null}]}')
+    assert chapter.title == ''
+    assert chapter.texts() == ['a', '']
+    assert chapter.issues == ['title is int', 'paragraph 1: text is NoneType', 'paragraph 1: index 3, expected 2']
+    assert loads_chapter('[1, 2]').issues == ['document is a list, not an object']
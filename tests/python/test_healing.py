@@ -0,0 +1,33 @@
+"""Paragraph healing rules (scripts/lib/processed-chapters/healing.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+from healing import ALPHABETIC, GREEK, VERSE, heal, rules_for
+
+
+def _healed(texts, rules):
+    return [text for text, _ in heal(texts, rules)]
+
+
+def test_rules_for():
+    assert rules_for('epitome-of-histories', 'Καὶ ὁ βασιλεὺς ἐξῆλθεν') is GREEK
+    assert rules_for('mai-ve-siyah', 'Ahmet Cemil geldi') is ALPHABETIC
+    assert rules_for('syair-siti-zubaidah', 'Orang Fabian naik berperi') is VERSE
+    assert rules_for('zhuziyulei', '問：「性既無形，復言以理。」') is None
+
+
+def test_greek():
+    assert _healed(['ὁ δὲ βασιλεὺς', 'ἐξῆλθεν.', 'Καὶ τότε'], GREEK) == ['ὁ δὲ βασιλεὺς ἐξῆλθεν.', 'Καὶ τότε']
+    assert _healed(['τέλος.', 'ἀρχή'], GREEK) == ['τέλος.', 'ἀρχή']
+    # U+037A YPOGEGRAMMENI is not a lowercase letter (category Lm).
+    assert _healed(['ὁ δὲ', 'ͺ ἀρχή ' + 'x' * 60], GREEK) == ['ὁ δὲ', 'ͺ ἀρχή ' + 'x' * 60]
+
+
+def test_alphabetic_hyphen():
+    assert _healed(['a broken wo-', 'rd here.', 'New one.'], ALPHABETIC) == ['a broken word here.', 'New one.']
+    assert _healed(['It ended.', 'lower start'], ALPHABETIC) == ['It ended.', 'lower start']
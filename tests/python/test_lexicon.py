@@ -0,0 +1,40 @@
+"""Lexicon-backed OCR confusion correction (scripts/lib/ocr-lines/lexicon.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'ocr-lines'))
+from lexicon import LANGUAGES, ConfusionCorrector, Lexicon, main
+
+IT = LANGUAGES['it']
+TEXT = ' '.join(['stette'] * 20 + ['stato'] * 12 + ['tutto'] * 8 + ['stelle'] * 2 + ['slato', 'lutlo'])
+
+
+def test_candidates_are_lexicon_words():
+    lexicon = Lexicon.from_texts([TEXT], IT)
+    assert lexicon.candidates('slato', IT) == {'stato': 1}
+    assert lexicon.candidates('lutlo', IT) == {'tutto': 2}
+    assert lexicon.candidates('stelle', IT) == {'stette': 2}
+
+
+def test_attested_words_are_kept():
+    corrector = ConfusionCorrector(Lexicon.from_texts([TEXT], IT), IT)
+    assert corrector.correct_text('Slato e lutlo, stelle.') == 'Stato e tutto, stelle.'
+    assert corrector.counts == {'Slato -> Stato': 1, 'lutlo -> tutto': 1}
+    # With min_count 3 a word seen twice is rare enough to be corrected.
+    loose = ConfusionCorrector(Lexicon.from_texts([TEXT], IT), IT, min_count=3)
+    assert loose.decide('stelle') == 'stette'
+
+
+def test_main_options_anywhere(tmp_path, capsys):
+    path = tmp_path / 'text.txt'
+    path.write_text(TEXT + '\n', encoding='utf-8')
+    assert main(['--ratio', '10', 'it', str(path)]) == 0
+    assert 'slato -> stato' in capsys.readouterr().out
+    # A flag without its value is ignored, not an IndexError.
+    assert main(['it', str(path), '--min-count=50', '--ratio']) == 0
+    assert '->' not in capsys.readouterr().out
+    assert main(['--ratio', '10', 'it']) == 1
@@ -0,0 +1,115 @@
+"""MediaWikiClient against a local stub of the MediaWiki query API.
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import json
+import os
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'wikisource'))
+from mediawiki import MediaWikiClient
+
+PAGES = {f'Kniha/{n}': f'== {n} ==\ntext {n}' for n in range(1, 61)}
+PAGES['Nová kapitola'] = 'redirect target'
+NORMALIZED = {'Kniha_/1': 'Kniha /1', 'kniha/2': 'Kniha/2'}
+REDIRECTS = {'Stará kapitola': 'Nová kapitola', 'Kniha /1': 'Kniha/1'}
+REVISIONS_PER_RESPONSE = 20
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    """action=query&prop=revisions over PAGES, answering at most
+    REVISIONS_PER_RESPONSE revisions per response and continuing with
+    rvcontinue, as the real API does for large batches."""
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+        params = dict(urllib.parse.parse_qsl(body))
+        titles = params['titles'].split('|')
+        type(self).requests.append(params)
+
+        query = {'normalized': [], 'redirects': [], 'pages': []}
+        current = []
+        for title in titles:
+            if title in NORMALIZED:
+                query['normalized'].append({'from': title, 'to': NORMALIZED[title]})
+                title = NORMALIZED[title]
+            if title in REDIRECTS:
+                query['redirects'].append({'from': title, 'to': REDIRECTS[title]})
+                title = REDIRECTS[title]
+            current.append(title)
+        start = int(params.get('rvcontinue', 0))
+        existing = [t for t in current if t in PAGES]
+        served = set(existing[start:start + REVISIONS_PER_RESPONSE])
+        for title in current:
+            if title not in PAGES:
+                query['pages'].append({'ns': 0, 'title': title, 'missing': True})
+            elif title in served:
+                query['pages'].append({'pageid': 1, 'title': title, 'revisions': [
+                    {'slots': {'main': {'contentmodel': 'wikitext', 'content': PAGES[title]}}}]})
+            else:
+                query['pages'].append({'pageid': 1, 'title': title})
+        data = {'batchcomplete': start + REVISIONS_PER_RESPONSE >= len(existing), 'query': query}
+        if start + REVISIONS_PER_RESPONSE < len(existing):
+            data['continue'] = {'rvcontinue': str(start + REVISIONS_PER_RESPONSE), 'continue': '||'}
+
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve():
+    server = HTTPServer(('127.0.0.1', 0), StubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/w/api.php'
+
+
+def test_batches_continuation_and_cache(tmp_path):
+    server, url = serve()
+    try:
+        StubAPI.requests = []
+        titles = [f'Kniha/{n}' for n in range(3, 61)] + ['Kniha_/1', 'kniha/2', 'Stará kapitola', 'Chybí']
+        client = MediaWikiClient(url, cache_dir=str(tmp_path), delay=0)
+        pages = client.fetch_wikitext(titles)
+
+        assert list(pages) == titles
+        assert pages['Kniha/3'] == PAGES['Kniha/3']
+        assert pages['Kniha_/1'] == PAGES['Kniha/1']          # normalized, then redirected
+        assert pages['kniha/2'] == PAGES['Kniha/2']           # normalized
+        assert pages['Stará kapitola'] == 'redirect target'   # redirected
+        assert pages['Chybí'] is None                         # missing
+
+        batches = [r['titles'].split('|') for r in StubAPI.requests if 'rvcontinue' not in r]
+        assert [len(b) for b in batches] == [50, 12]
+        continued = [r for r in StubAPI.requests if 'rvcontinue' in r]
+        assert [r['rvcontinue'] for r in continued] == ['20', '40']
+        assert client.requests_made == len(StubAPI.requests) == 4
+
+        StubAPI.requests = []
+        again = MediaWikiClient(url, cache_dir=str(tmp_path), delay=0)
+        assert again.fetch_wikitext(titles[:-1]) == {t: pages[t] for t in titles[:-1]}
+        assert again.requests_made == 0 and StubAPI.requests == []
+    finally:
+        server.shutdown()
+
+
+def test_cache_is_per_wiki(tmp_path):
+    server, url = serve()
+    try:
+        MediaWikiClient(url, cache_dir=str(tmp_path), delay=0).fetch_wikitext(['Kniha/1'])
+        other = MediaWikiClient(url.replace('127.0.0.1', 'localhost'), cache_dir=str(tmp_path), delay=0)
+        StubAPI.requests = []
+        assert other.fetch_one('Kniha/1') == PAGES['Kniha/1']
+        assert other.requests_made == 1
+    finally:
+        server.shutdown()
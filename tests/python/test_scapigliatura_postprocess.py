@@ -0,0 +1,41 @@
+"""Scapigliatura V2 post-processing (scripts/lib/scapigliatura-cleaning-v2/postprocess.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'scapigliatura-cleaning-v2'))
+from postprocess import Stats, is_garbage_paragraph, iter_postprocessed
+
+LONG = 'Era una sera di febbraio, e la città taceva sotto la neve.'
+
+
+def test_merges():
+    texts = ['La strada era lun¬ ', 'ga e deserta quella sera di febbraio.',
+             'Il vecchio guardava lontano, verso le colline intorno alla cit-',
+             'tà addormentata nella nebbia.', LONG]
+    assert list(iter_postprocessed(texts)) == [
+        'La strada era lunga e deserta quella sera di febbraio.',
+        'Il vecchio guardava lontano, verso le colline intorno alla città addormentata nella nebbia.',
+        LONG]
+    # Within one pass a merged pair is not merged again with the paragraph
+    # after it; the hyphen pass still sees the soft-hyphen pass's output.
+    assert list(iter_postprocessed([LONG + ' pri¬', 'ma neve¬', 'vicina e bianca su tutta la pianura.'])) == [
+        LONG + ' prima neve¬', 'vicina e bianca su tutta la pianura.']
+    assert list(iter_postprocessed([LONG + ' pri¬', 'ma cit-', 'tà sotto la neve, poi silenzio.'])) == [
+        LONG + ' prima città sotto la neve, poi silenzio.']
+
+
+def test_garbage_uses_the_paragraph_record():
+    # Fragments under 8 characters pass only as known short words.
+    assert is_garbage_paragraph('Non so.') and not is_garbage_paragraph('Che?')
+    assert is_garbage_paragraph('  ') and is_garbage_paragraph('.;,') and is_garbage_paragraph('qwrtz')
+    assert not is_garbage_paragraph('Non so nulla.') and not is_garbage_paragraph(LONG)
+    assert is_garbage_paragraph('aBcDeFgH ijKl mnOp')
+    stats = Stats('  ' + LONG + '\n')
+    assert not is_garbage_paragraph(stats.text, stats)
+    assert stats.stripped == LONG and stats.end == '  ' + LONG
+    assert stats.mid_upper == 0 and stats.has_vowel and stats.alpha_ratio > 0.8
+    assert list(iter_postprocessed(['12 34', 'x', LONG, ''])) == [LONG]
@@ -0,0 +1,120 @@
+"""Full-text index (scripts/lib/processed-chapters/search.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+import search
+from search import SearchIndex, Segment, build_index, get_varint, put_varint, query_slots, write_segment
+
+
+def _write_chapter(processed, text, number, paragraphs):
+    os.makedirs(processed / text, exist_ok=True)
+    data = {'chapterNumber': number, 'title': f'{number}',
+            'sourceContent': {'paragraphs': [{'index': i, 'text': t} for i, t in enumerate(paragraphs)]}}
+    (processed / text / f'chapter-{number:03d}.json').write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def _hits(index, query, **kwargs):
+    return [(h.file, h.paragraph) for h in index.search(query, **kwargs)]
+
+
+def test_varint_round_trip():
+    values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 21, 2 ** 32 + 5, 2 ** 63]
+    buf = bytearray()
+    for n in values:
+        put_varint(buf, n)
+    assert len(buf) == sum(max(1, (n.bit_length() + 6) // 7) for n in values)
+    pos = 0
+    decoded = []
+    while pos < len(buf):
+        n, pos = get_varint(buf, pos)
+        decoded.append(n)
+    assert decoded == values
+
+
+def test_cursor_seek_across_skip_blocks(tmp_path):
+    # "common" is in every third paragraph, so its postings span several BLOCKs.
+    paragraphs = [('common ' if i % 3 == 0 else '') + f'w{i} x' for i in range(3 * 4 * search.BLOCK)]
+    _write_chapter(tmp_path, 'text', 1, paragraphs)
+    write_segment(str(tmp_path / 'seg.fts'), ['text/chapter-001.json'], str(tmp_path))
+    segment = Segment(str(tmp_path / 'seg.fts'))
+    try:
+        i = segment.lookup('common')
+        assert segment.doc_count(i) == 4 * search.BLOCK
+        cursor = segment.cursor(i)
+        assert len(cursor.skips) == 3
+        assert list(segment.cursor(i)) == [(d, [0]) for d in range(0, len(paragraphs), 3)]
+
+        rng = random.Random(49)
+        targets = sorted(rng.sample(range(len(paragraphs)), 200))
+        for target in targets:
+            assert cursor.seek(target) == ([0] if target % 3 == 0 else None), target
+        # Seeking far ahead jumps straight to the last block.
+        cursor = segment.cursor(i)
+        assert cursor.seek(len(paragraphs) - 3) == [0]
+        assert cursor.next_skip == 3
+        assert segment.lookup('missing') is None
+    finally:
+        segment.close()
+
+
+def test_phrase_and_prefix_queries(tmp_path):
+    _write_chapter(tmp_path / 'processed', 'latin', 1, [
+        'xx alpha beta',
+        'alpha beta alpha',
+        'beta alpha gamma',
+        'Alphabet, beta.',
+        'Ἀλφα λόγος',
+    ])
+    _write_chapter(tmp_path / 'processed', 'chinese', 1, ['子曰：學而時習之', '學者'])
+    processed, directory = str(tmp_path / 'processed'), str(tmp_path / 'search')
+    build_index(processed, directory)
+    with SearchIndex(directory, processed) as index:
+        latin = 'latin/chapter-001.json'
+        # A term at two offsets of the phrase must be found at both.
+        assert _hits(index, 'alpha beta alpha') == [(latin, 1)]
+        assert _hits(index, 'alpha beta') == [(latin, 0), (latin, 1)]
+        assert _hits(index, 'beta alpha') == [(latin, 1), (latin, 2)]
+        assert _hits(index, 'alpha gamma beta') == []
+        assert _hits(index, 'alpha beta alpha', phrase=False) == [(latin, 0), (latin, 1), (latin, 2)]
+        assert _hits(index, 'alphabet beta') == [(latin, 3)]
+        assert _hits(index, 'ΛΟΓΟΣ') == [(latin, 4)]
+        hit = index.search('beta alpha')[0]
+        assert (hit.start, hit.length) == (1, 2)
+        assert index.context(hit) == 'alpha [beta alpha]'
+
+        chinese = 'chinese/chapter-001.json'
+        assert query_slots('子曰')[0] == [(0, '子曰', False)]
+        assert query_slots('學')[0] == [(0, '學', True)]
+        assert _hits(index, '子，曰') == [(chinese, 0)]
+        assert _hits(index, '學') == [(chinese, 0), (chinese, 1)]     # prefix of 學而 and 學者
+        assert _hits(index, '學而時') == [(chinese, 0)]
+        assert _hits(index, '時學') == []
+        assert _hits(index, '學', text='latin') == []
+
+
+def test_incremental_build_shadows_old_segment(tmp_path):
+    processed, directory = tmp_path / 'processed', str(tmp_path / 'search')
+    _write_chapter(processed, 'text', 1, ['first omissis'])
+    _write_chapter(processed, 'text', 2, ['second omissis'])
+    assert build_index(str(processed), directory) == (2, 0, 0, 1)
+    assert build_index(str(processed), directory) == (0, 2, 0, 1)
+
+    _write_chapter(processed, 'text', 2, ['second revised text'])
+    assert build_index(str(processed), directory) == (1, 1, 0, 2)
+    with SearchIndex(directory, str(processed)) as index:
+        assert len(index.segments) == 2
+        # The old segment still holds chapter 2's "omissis", but no longer owns the file.
+        assert _hits(index, 'omissis') == [('text/chapter-001.json', 0)]
+        assert _hits(index, 'revised') == [('text/chapter-002.json', 0)]
+
+    assert build_index(str(processed), directory, full=True) == (2, 0, 0, 1)
+    assert sorted(n for n in os.listdir(directory) if n.endswith('.fts')) == ['seg-00002.fts']
+    with SearchIndex(directory, str(processed)) as index:
+        assert _hits(index, 'omissis') == [('text/chapter-001.json', 0)]
@@ -0,0 +1,89 @@
+"""Packed per-text store (scripts/lib/processed-chapters/store.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+from store import PackedText, is_current, pack_path, pack_text, verify_text
+
+CHAPTERS = {
+    'chapter-001.json': ({'chapterNumber': 1, 'title': 'Α', 'sourceContent': {'paragraphs': [
+        {'index': 0, 'text': 'Καὶ ὁ λόγος ἦν πρὸς τὸν θεόν.'}, {'index': 1, 'text': 'δεύτερον ' * 40}]}}, True),
+    'chapter-002.json': ({'chapterNumber': 2, 'title': 'B', 'sourceContent': {'paragraphs': [
+        {'index': 1, 'text': 'short'}, {'index': 2, 'text': ''}], 'source': 'wikisource'}}, False),
+    'chapter-003.json': ({'title': 'Üçüncü', 'genre': 'roman', 'paragraphs': ['Ahmet Cemil geldi.', 'x']}, True),
+}
+
+
+def _write_text(processed, text='text', chapters=CHAPTERS):
+    directory = processed / text
+    os.makedirs(directory, exist_ok=True)
+    for name, (doc, newline) in chapters.items():
+        data = json.dumps(doc, ensure_ascii=False, indent=2) + ('\n' if newline else '')
+        (directory / name).write_bytes(data.encode('utf-8'))
+    return directory
+
+
+def test_export_is_byte_identical(tmp_path):
+    directory = _write_text(tmp_path / 'processed')
+    assert pack_text('text', str(tmp_path / 'processed'), str(tmp_path / 'packed'))[:2] == (3, 6)
+    with PackedText(pack_path('text', str(tmp_path / 'packed'))) as packed:
+        packed.export(str(tmp_path / 'out'))
+    for name in CHAPTERS:
+        assert (tmp_path / 'out' / name).read_bytes() == (directory / name).read_bytes(), name
+    assert verify_text('text', str(tmp_path / 'processed'), str(tmp_path / 'packed')) == []
+
+
+def test_paragraph_and_chapter_by_number_and_file(tmp_path):
+    _write_text(tmp_path / 'processed')
+    pack_text('text', str(tmp_path / 'processed'), str(tmp_path / 'packed'))
+    with PackedText(pack_path('text', str(tmp_path / 'packed'))) as packed:
+        assert len(packed) == 3
+        assert packed.paragraph(1, 0) == 'Καὶ ὁ λόγος ἦν πρὸς τὸν θεόν.'
+        assert packed.paragraph('chapter-001.json', 1) == 'δεύτερον ' * 40
+        assert packed.paragraph('chapter-002', 0) == 'short'
+        assert packed.paragraph('chapter-003.json', 1) == 'x'
+        with pytest.raises(IndexError):
+            packed.paragraph(2, 2)
+        with pytest.raises(KeyError):
+            packed.chapter(9)
+
+        chapter = packed.chapter(2)
+        assert (chapter.number, chapter.title, chapter.base) == (2, 'B', 1)
+        assert chapter.texts() == ['short', '']
+        assert chapter.extra == {'sourceContent.source': 'wikisource'}
+        chapter = packed.chapter('chapter-003.json')
+        assert chapter.number == 3 and chapter.texts() == ['Ahmet Cemil geldi.', 'x']
+        assert chapter.to_dict() == CHAPTERS['chapter-003.json'][0]
+
+
+def test_is_current_and_verify_see_added_and_removed_chapters(tmp_path):
+    processed, packed_dir = tmp_path / 'processed', str(tmp_path / 'packed')
+    directory = _write_text(processed)
+    assert not is_current('text', str(processed), packed_dir)
+    pack_text('text', str(processed), packed_dir)
+    assert is_current('text', str(processed), packed_dir)
+
+    os.remove(directory / 'chapter-002.json')
+    assert not is_current('text', str(processed), packed_dir)
+    assert verify_text('text', str(processed), packed_dir) == ['chapter-002.json']
+
+    pack_text('text', str(processed), packed_dir)
+    assert is_current('text', str(processed), packed_dir)
+    _write_text(processed, chapters={'chapter-004.json': ({'title': '', 'paragraphs': []}, True)})
+    built = os.path.getmtime(pack_path('text', packed_dir))
+    os.utime(directory / 'chapter-004.json', (built - 10, built - 10))   # older than the pack
+    assert not is_current('text', str(processed), packed_dir)
+    assert verify_text('text', str(processed), packed_dir) == ['chapter-004.json']
+
+    pack_text('text', str(processed), packed_dir)
+    (directory / 'chapter-001.json').write_text('{"title": "", "paragraphs": ["changed"]}', encoding='utf-8')
+    os.utime(directory / 'chapter-001.json', (built + 3600, built + 3600))
+    assert not is_current('text', str(processed), packed_dir)
+    assert verify_text('text', str(processed), packed_dir) == ['chapter-001.json']
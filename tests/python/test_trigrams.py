@@ -0,0 +1,132 @@
+"""Trigram planning and sweeps (scripts/lib/processed-chapters/trigrams.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+from trigrams import Sweep, TrigramIndex, build_trigrams, describe, fold, plan
+
+
+def _plan(pattern, flags=0):
+    return describe(plan(re.compile(pattern, flags)))
+
+
+def _satisfies(query, trigrams) -> bool:
+    if query is None:
+        return True
+    if isinstance(query, str):
+        return query in trigrams
+    op, parts = query
+    return (all if op == 'and' else any)(_satisfies(q, trigrams) for q in parts)
+
+
+def test_plan_literals_and_alternation():
+    assert _plan('omissis') == "('omi' AND 'mis' AND 'iss' AND 'ssi' AND 'sis')"
+    assert _plan(r'\bead\.\s*man\.') == "('ead' AND 'ad.' AND 'man' AND 'an.')"
+    assert _plan('(abc|abd)e') == "(('abc' AND 'bce') OR ('abd' AND 'bde'))"
+    assert _plan('omissis|lacuna') == ("(('lac' AND 'acu' AND 'cun' AND 'una') OR "
+                                       "('omi' AND 'mis' AND 'iss' AND 'ssi' AND 'sis'))")
+    # One branch too short to need any trigram: every paragraph is a candidate.
+    assert _plan('ab|cdef') == '*'
+    assert _plan('a(?=bcd)') == '*'
+
+
+def test_plan_repeats():
+    assert _plan('x{3}') == "'xxx'"
+    assert _plan('(?:ab){2}') == "('aba' AND 'bab')"
+    assert _plan('(?:omissis)+') == _plan('omissis')
+    assert _plan('(?:foo)?bar') == "'bar'"
+    assert _plan('(?:foo)*') == '*'
+    assert _plan('fol(?:io)*\\.') == "'fol'"
+
+
+def test_plan_charsets():
+    assert _plan('[ab]cd') == "('acd' OR 'bcd')"
+    assert _plan('[A-C]wp') == "('awp' OR 'bwp' OR 'cwp')"
+    # Large, negated and category sets are not expanded.
+    assert _plan('[A-Z]wp') == '*'
+    assert _plan('[^a]wp') == '*'
+    assert _plan(r'[\d]wp') == '*'
+    assert _plan(r'[A-Z]{2,}wpx') == "'wpx'"
+
+
+def test_plan_ignorecase_folding():
+    # Every spelling re.IGNORECASE treats as the same maps to the same trigram.
+    assert fold('ſ') == fold('s') == fold('S')
+    assert fold('ς') == fold('σ') == fold('Σ')
+    assert fold('İ') == fold('i') == fold('I')
+    assert fold('ΛΟΓΟΣ') == fold('λογος') == fold('λογοσ')
+    assert _plan('ſed', re.IGNORECASE) == _plan('SED') == "'sed'"
+    assert _plan('λογοσ', re.IGNORECASE) == _plan('ΛΟΓΟΣ') == _plan('λογος')
+    assert _plan('İstanbul', re.IGNORECASE) == _plan('istanbul')
+    for pattern, text in [('ſed', 'SED'), ('sed', 'ſed'), ('λογοσ', 'ΛΟΓΟΣ'), ('λογος', 'λογοσ'),
+                          ('İst', 'ist'), ('ist', 'İST')]:
+        assert re.search(pattern, text, re.IGNORECASE)
+        f = fold(text)
+        assert _satisfies(plan(re.compile(pattern, re.IGNORECASE)), {f[i:i + 3] for i in range(len(f) - 2)})
+
+
+def test_plan_never_skips_a_match():
+    atoms = ['a', 'b', 'S', 's', 'ſ', 'σ', 'ς', 'Σ', 'İ', 'i', 'I', '.', '[ab]', '[a-c]', '[^a]',
+             r'\b', r'\w', '(?=ab)', '^', '$']
+    alphabet = 'absSſσςΣİiI '
+    rng = random.Random(50)
+
+    def regex(depth=0):
+        r = rng.random()
+        if depth > 3 or r < 0.4:
+            return rng.choice(atoms)
+        if r < 0.6:
+            return regex(depth + 1) + regex(depth + 1) + regex(depth + 1)
+        if r < 0.75:
+            return f'({regex(depth + 1)}|{regex(depth + 1)})'
+        return f'(?:{regex(depth + 1)})' + rng.choice(['*', '+', '?', '{2}', '{1,3}', '{3}', '+?', '{2,}'])
+
+    matched = 0
+    for _ in range(3000):
+        compiled = re.compile(regex(), rng.choice([0, re.IGNORECASE]))
+        query = plan(compiled)
+        for _ in range(20):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            if compiled.search(text):
+                f = fold(text)
+                assert _satisfies(query, {f[i:i + 3] for i in range(len(f) - 2)}), (compiled, text)
+                matched += 1
+    assert matched > 10000
+
+
+def _write_chapter(processed, number, paragraphs):
+    os.makedirs(processed / 'text', exist_ok=True)
+    data = {'chapterNumber': number, 'title': f'{number}',
+            'sourceContent': {'paragraphs': [{'index': i, 'text': t} for i, t in enumerate(paragraphs)]}}
+    (processed / 'text' / f'chapter-{number:03d}.json').write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def test_sweep_candidates_and_stale_files(tmp_path):
+    processed = tmp_path / 'processed'
+    _write_chapter(processed, 1, ['Hic omissis verbis', 'nihil', 'LACVNA hic'])
+    _write_chapter(processed, 2, ['omissis'])
+    index_path = str(tmp_path / 'trigrams.idx')
+    assert build_trigrams(str(processed), index_path)[:2] == (2, 4)
+
+    patterns = [re.compile('omissis'), re.compile('lacvna', re.IGNORECASE), re.compile(r'\b[A-Z]{2}\b')]
+    sweep = Sweep(patterns, index=TrigramIndex(index_path, str(processed)), processed_dir=str(processed))
+    try:
+        chapter_1 = str(processed / 'text' / 'chapter-001.json')
+        assert sweep.candidates(chapter_1, 3) == [[0, 2], [2], [1, 2]]
+        assert sweep.candidates(str(processed / 'text' / 'chapter-002.json'), 1) == [[0, 2]]
+
+        # Rewritten since the build: every pattern is a candidate again, so
+        # the new "omissis" in paragraph 1 is not skipped.
+        _write_chapter(processed, 1, ['Hic verbis', 'omissis nihil', 'hic'])
+        assert sweep.candidates(chapter_1, 3) == [[0, 1, 2]] * 3
+        found = [(os.path.basename(path), p, i) for path, p, i, _ in sweep.run()]
+        assert found == [('chapter-001.json', 1, 0), ('chapter-002.json', 0, 0)]
+    finally:
+        sweep.close()
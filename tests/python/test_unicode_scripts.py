@@ -0,0 +1,95 @@
+"""Script detection (scripts/lib/processed-chapters/unicode_scripts.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import random
+import re
+import sys
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+from unicode_scripts import (SCRIPTS, count, dominant_script, letter_counts, nfc, ratio, script_codes,
+                             script_of, script_runs)
+
+
+def test_script_runs_absorb_neutral_characters():
+    assert script_runs('Καὶ ὁ λόγος (verbum)') == [('Greek', 0, 13), ('Latin', 13, 20)]
+    # Leading neutral characters join the first run; trailing ones the last.
+    assert script_runs('« 子曰 »') == [('Han', 0, 6)]
+    assert script_runs('1. Ahmet, 2. Cemil.') == [('Latin', 0, 19)]
+    # A run of the same script resumes across punctuation.
+    assert script_runs('ab, cd; εφ') == [('Latin', 0, 8), ('Greek', 8, 10)]
+    assert script_runs('12, 34.') == [('Common', 0, 7)]
+    assert script_runs('') == []
+    assert script_runs('ab 12 εφ', resolve=False) == [('Latin', 0, 2), ('Common', 2, 6), ('Greek', 6, 8)]
+
+
+def test_script_runs_cover_the_text():
+    rng = random.Random(47)
+    alphabet = 'aé λό子曰 ,.1́ա\U00020000'
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 15)))
+        for resolve in (True, False):
+            runs = script_runs(text, resolve)
+            if not text:
+                assert runs == []
+                continue
+            assert [start for _, start, _ in runs] == [0] + [end for _, _, end in runs[:-1]]
+            assert runs[-1][2] == len(text)
+            if not resolve:
+                assert all(script_of(ch) == script for script, start, end in runs for ch in text[start:end])
+
+
+def test_script_codes_past_the_table():
+    # Plane 3 and beyond are not in the table; script_of() is asked instead.
+    for ch in ('\U00031350', '\U000E0100', '\U0001F600', '\U0010FFFD', '\U00020000', 'a'):
+        assert script_codes('x' + ch) == chr(SCRIPTS.index('Latin')) + chr(SCRIPTS.index(script_of(ch)))
+    assert script_of('\U000E0100') == 'Inherited'
+    assert count('\U000E0100a\U00031350', 'Latin', 'Inherited') == 2
+
+
+def test_dominant_script():
+    assert dominant_script('Καὶ ὁ λόγος (verbum)') == 'Greek'
+    assert dominant_script('Hic λόγος est verbum') == 'Latin'
+    assert dominant_script('子曰：學而時習之') == 'Han'
+    assert dominant_script('12, 34.') == 'Common'
+    assert dominant_script('', default=None) is None
+
+
+def test_ratio_and_letter_counts():
+    text = 'λόγος\u037e ÆLIUS 12 ſ'
+    assert letter_counts(text) == {'Greek': 6, 'Latin': 6}          # U+037E ; is in the Greek block
+    assert letter_counts(text, ascii_latin=True) == {'Greek': 6, 'Latin': 4}
+    assert ratio(text, 'Greek') == 0.5
+    assert ratio(text, 'Greek', among=('Greek', 'Latin'), ascii_latin=True) == 0.6
+    assert ratio('λόγος עברית', 'Greek', among=('Greek',)) == 1.0
+    assert ratio('12 ,.', 'Greek') == 0.0
+    assert letter_counts('λόγος', ascii_latin=True) == {'Greek': 5}
+
+
+def test_ascii_latin_matches_the_greek_cleaners_classes():
+    greek = re.compile(r'[\u0370-\u03FF\u1F00-\u1FFF]')
+    alpha = re.compile(r'[a-zA-Z\u0370-\u03FF\u1F00-\u1FFF]')
+    rng = random.Random(470)
+    for _ in range(5000):
+        text = ''.join(chr(rng.choice([rng.randrange(0x80), rng.randrange(0x370, 0x400),
+                                       rng.randrange(0x1F00, 0x2000), rng.randrange(0x100, 0x250)]))
+                       for _ in range(rng.randint(0, 20)))
+        letters = alpha.findall(text)
+        expected = len(greek.findall(text)) / len(letters) if letters else 0.0
+        assert ratio(text, 'Greek', among=('Greek', 'Latin'), ascii_latin=True) == expected, text
+        assert count(text, 'Greek') == len(greek.findall(text))
+
+
+def test_nfc():
+    decomposed = unicodedata.normalize('NFD', 'λόγος ἦν')
+    assert decomposed != 'λόγος ἦν'
+    assert nfc(decomposed) == 'λόγος ἦν'
+    assert nfc('ascii') == 'ascii'
+    precomposed = 'Καὶ ὁ λόγος'
+    assert nfc(precomposed) is precomposed
+    # Decomposed, the accents would count as Inherited rather than Greek.
+    assert letter_counts(nfc(decomposed)) == {'Greek': 7}
+    assert count(decomposed, 'Inherited') == 3 and count(nfc(decomposed), 'Inherited') == 0
@@ -0,0 +1,48 @@
+"""wikitext_to_paragraphs against process-broucek's old re.sub chain.
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts', 'lib', 'wikisource'))
+from wikitext import wikitext_to_paragraphs
+
+_spec = importlib.util.spec_from_file_location('process_broucek', os.path.join(ROOT, 'scripts', 'process-broucek.py'))
+broucek = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(broucek)
+
+# Pages both must read the same way: no nested templates, no <ref .../>.
+PARITY = {
+    'heading and rule': 'a\n== Hlava ==\nb\n----\nc',
+    'tag before heading': '<center>== Hlava ==</center>\ntext',
+    'template after heading': '== Hlava =={{x}}\ntext',
+    'comment after heading': '== Hlava ==<!-- c -->\ntext',
+    'ref after heading': '== Hlava ==<ref>n</ref>\ntext',
+    'poem before heading': '<poem>\n== Hlava ==\nverš\n</poem>',
+    'poem on heading line': '<poem>== Hlava ==</poem>\ntext',
+    'tag before rule': '<div>----</div>\ntext',
+    'quotes around template': "a '{{x}}' b",
+    'quotes around ref': "a '<ref>n</ref>'' b",
+    'quotes around poem': "a '<poem>' b",
+    'quotes around link': "a '[[x|y]]'' b",
+    'quotes in link': "[[a|''b'']] c",
+    'bold and italic': "'''Pan''' ''Brouček''\n\nnext",
+    'links': '[[Kategorie:X]][[en:Y]] [[cíl|text]] [[cíl]]',
+    'br': 'a<br/>b<br>c<br />d',
+    'ref': 'a<ref name="x">pozn. {{t}}</ref> b',
+}
+
+
+def test_parity_with_regex_chain():
+    for name, text in PARITY.items():
+        assert wikitext_to_paragraphs(text) == broucek.clean_wikitext_regex(text), name
+
+
+def test_chain_bugs_fixed():
+    assert wikitext_to_paragraphs('a {{x|{{y}}}} b') == ['a  b']
+    assert wikitext_to_paragraphs('a<ref name="x"/> b\n\nc<ref>n</ref>') == ['a b', 'c']
+    assert broucek.clean_wikitext_regex('a<ref name="x"/> b\n\nc<ref>n</ref>') == ['a']
@@ -0,0 +1,76 @@
+"""Atomic chapter writes (scripts/lib/processed-chapters/writer.py).
+
+Run from the repository root: python3 -m pytest tests/python
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'lib', 'processed-chapters'))
+import writer
+from writer import ChapterWriter, dumps_json, write_bytes, write_json
+
+CHAPTER = {'title': 'Α', 'paragraphs': ['Καὶ ὁ λόγος', 'x']}
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_skip_if_unchanged(tmp_path):
+    path = tmp_path / 'chapter-001.json'
+    assert write_json(path, CHAPTER)
+    assert path.read_bytes() == dumps_json(CHAPTER)
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert not write_json(path, CHAPTER)
+    assert os.stat(path).st_mtime_ns == 1_000_000_000
+    # Same length, different bytes.
+    assert write_json(path, {'title': 'Β', 'paragraphs': ['Καὶ ὁ λόγος', 'x']})
+    assert os.stat(path).st_mtime_ns != 1_000_000_000
+    assert write_json(path, CHAPTER, compact=True)
+    assert path.read_bytes() == dumps_json(CHAPTER, compact=True)
+    assert os.listdir(tmp_path) == ['chapter-001.json']
+
+
+def test_mode_is_kept(tmp_path):
+    path = tmp_path / 'chapter-001.json'
+    assert write_bytes(path, b'one')
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert _mode(path) == 0o666 & ~umask
+    os.chmod(path, 0o640)
+    assert write_bytes(path, b'two')
+    assert _mode(path) == 0o640 and path.read_bytes() == b'two'
+
+
+def test_failed_write_leaves_the_target(tmp_path, monkeypatch):
+    path = tmp_path / 'chapter-001.json'
+    write_bytes(path, b'original')
+
+    def fail(fd):
+        raise OSError('disk full')
+    monkeypatch.setattr(writer.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        write_bytes(path, b'replacement')
+    assert path.read_bytes() == b'original'
+    assert os.listdir(tmp_path) == ['chapter-001.json']
+
+    with pytest.raises(OSError):
+        with ChapterWriter(jobs=2) as chapters:
+            chapters.write(path, CHAPTER)
+    assert path.read_bytes() == b'original'
+
+
+def test_chapter_writer(tmp_path):
+    with ChapterWriter(jobs=3) as chapters:
+        for n in range(6):
+            chapters.write(tmp_path / f'chapter-{n:03d}.json', CHAPTER)
+    assert chapters.summary() == '6 written, 0 unchanged'
+    with ChapterWriter(jobs=1) as chapters:
+        chapters.write(tmp_path / 'chapter-000.json', CHAPTER)
+        chapters.write(tmp_path / 'chapter-001.json', {'title': 'new', 'paragraphs': []})
+    assert chapters.summary() == '1 written, 1 unchanged'
+    assert chapters.written == [str(tmp_path / 'chapter-001.json')]